@@ -0,0 +1,147 @@
+# benchmarks/bench_pipeline.py
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_pos import time_call
+from benchmarks.synthetic import OracleFaceDetector, OraclePoseLandmarker, SyntheticScene, synthetic_traces
+from utils.frame_processor import FrameProcessor
+from utils.heart_rate import (HR_BAND, RATE_METHODS, bandpass_filter_signal, cpu_POS, estimate_heart_rate,
+                              estimate_respiration_rate, moving_average_filter)
+from utils.vitals import ESTIMATOR_RATE_METHODS, VitalSignsEstimator
+
+RESOLUTIONS = {'480p': (640, 480), '720p': (1280, 720), '1080p': (1920, 1080)}
+
+
+def bench_stages(window_seconds, fps, repeats, rng):
+    """
+    Latency of the individual signal stages on one analysis window, in microseconds per sample.
+    """
+    n_samples = int(window_seconds * fps)
+    rgb, resp = synthetic_traces(n_samples, fps, 72.0, 15.0, rng=rng)
+    pulse = cpu_POS(rgb[np.newaxis], fps)[0]
+    filtered = bandpass_filter_signal(pulse, *HR_BAND, fps)
+    stages = {
+        'cpu_POS': lambda: cpu_POS(rgb[np.newaxis], fps),
+        'bandpass_filter_signal': lambda: bandpass_filter_signal(pulse, *HR_BAND, fps),
+        'moving_average_filter': lambda: moving_average_filter(filtered, int(fps / 2)),
+    }
+    for method in RATE_METHODS:
+        stages[f'estimate_heart_rate[{method}]'] = lambda method=method: estimate_heart_rate(rgb, fps, method=method)
+        stages[f'estimate_respiration_rate[{method}]'] = (
+            lambda method=method: estimate_respiration_rate(resp, fps, method=method))
+    return {name: time_call(func, repeats) / n_samples * 1e6 for name, func in stages.items()}
+
+
+def bench_accuracy(window_seconds, fps, trials, noise, motion, rng):
+    """
+    HR/RR mean absolute error of every rate method over random synthetic traces, in BPM.
+    """
+    n_samples = int(window_seconds * fps)
+    errors = {method: ([], []) for method in RATE_METHODS}
+    for _ in range(trials):
+        hr_bpm, rr_bpm = rng.uniform(50, 150), rng.uniform(8, 25)
+        rgb, resp = synthetic_traces(n_samples, fps, hr_bpm, rr_bpm, noise=noise, motion=motion, rng=rng)
+        for method in RATE_METHODS:
+            heart_rate, _, _ = estimate_heart_rate(rgb, fps, method=method)
+            respiration_rate, _, _ = estimate_respiration_rate(resp, fps, method=method)
+            errors[method][0].append(abs((heart_rate or 0.0) - hr_bpm))
+            errors[method][1].append(abs((respiration_rate or 0.0) - rr_bpm))
+    return {method: (float(np.mean(hr)), float(np.mean(rr))) for method, (hr, rr) in errors.items()}
+
+
+def bench_frames(resolution, seconds, fps, window_seconds, rate_method, inference_scale, noise, motion, seed):
+    """
+    Runs synthetic frames through FrameProcessor (with oracle detectors) and VitalSignsEstimator.
+
+    Returns:
+        dict: Frame rate of the frame stage, estimator cost per sample and the final HR/RR error.
+    """
+    width, height = RESOLUTIONS[resolution]
+    rng = np.random.default_rng(seed)
+    hr_bpm, rr_bpm = rng.uniform(55, 120), rng.uniform(10, 22)
+    scene = SyntheticScene(width, height, fps, hr_bpm, rr_bpm, noise=noise, motion=motion, seed=seed)
+    face_detector, pose_landmarker = OracleFaceDetector(rng=rng), OraclePoseLandmarker(rng=rng)
+    processor = FrameProcessor(face_detector, pose_landmarker, inference_scale=inference_scale)
+    estimator = VitalSignsEstimator(fps, window_seconds=window_seconds, rate_method=rate_method)
+
+    frame_time = estimator_time = 0.0
+    n_frames = 0
+    for index, (frame, truth) in enumerate(scene.frames(seconds)):
+        face_detector.truth = pose_landmarker.truth = truth
+        start = time.perf_counter()
+        result = processor.process(frame, int(index * 1000 / fps))
+        frame_time += time.perf_counter() - start
+        start = time.perf_counter()
+        estimator.add(result)
+        estimator_time += time.perf_counter() - start
+        n_frames += 1
+
+    vitals = estimator.vitals
+    return {
+        'resolution': resolution,
+        'frames_per_s': n_frames / frame_time,
+        'estimator_us_per_sample': estimator_time / n_frames * 1e6,
+        'hr_error_bpm': abs(vitals.heart_rate - hr_bpm) if vitals.heart_rate is not None else None,
+        'rr_error_bpm': abs(vitals.respiration_rate - rr_bpm) if vitals.respiration_rate is not None else None,
+    }
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else '--'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless accuracy and throughput benchmark on synthetic data.")
+    parser.add_argument('--resolutions', nargs='+', choices=tuple(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument('--windows', type=float, nargs='+', default=[10.0, 20.0, 30.0],
+                        help="Analysis window lengths in seconds.")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--trials', type=int, default=20, help="Random traces per window length for the MAE.")
+    parser.add_argument('--seconds', type=float, default=15.0, help="Length of each synthetic video.")
+    parser.add_argument('--rate-method', choices=ESTIMATOR_RATE_METHODS, default='fft',
+                        help="Rate method of the end-to-end frame benchmark.")
+    parser.add_argument('--inference-scale', type=float, default=1.0)
+    parser.add_argument('--noise', type=float, default=0.2, help="Trace noise; frames use 10x this per pixel.")
+    parser.add_argument('--motion', type=float, default=0.0, help="Motion and illumination artifact strength.")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write all results to this JSON file, for comparing runs.")
+    args = parser.parse_args()
+
+    report = {'stages': {}, 'accuracy': {}, 'frames': []}
+    for window_seconds in args.windows:
+        rng = np.random.default_rng(args.seed)
+        stages = report['stages'][window_seconds] = bench_stages(window_seconds, args.fps, args.repeats, rng)
+        accuracy = report['accuracy'][window_seconds] = bench_accuracy(
+            window_seconds, args.fps, args.trials, args.noise, args.motion, rng)
+
+        print(f"\n== Window {window_seconds:g} s ({int(window_seconds * args.fps)} samples) ==")
+        print(f"{'stage':<36} | {'us/sample':>10}")
+        for name, per_sample in stages.items():
+            print(f"{name:<36} | {per_sample:>10.3f}")
+        print(f"{'method':<8} | {'HR MAE (BPM)':>12} | {'RR MAE (BPM)':>12}")
+        for method, (hr_mae, rr_mae) in accuracy.items():
+            print(f"{method:<8} | {hr_mae:>12.2f} | {rr_mae:>12.2f}")
+
+    window_seconds = min(args.windows[0], args.seconds)
+    print(f"\n== Frames ({args.seconds:g} s video, {window_seconds:g} s window, {args.rate_method}) ==")
+    print(f"{'resolution':<10} | {'frames/s':>9} | {'est us/sample':>13} | {'HR err':>7} | {'RR err':>7}")
+    for resolution in args.resolutions:
+        row = bench_frames(resolution, args.seconds, args.fps, window_seconds, args.rate_method,
+                           args.inference_scale, args.noise * 10, args.motion, args.seed)
+        report['frames'].append(row)
+        print(f"{resolution:<10} | {row['frames_per_s']:>9.1f} | {row['estimator_us_per_sample']:>13.1f} | "
+              f"{_fmt(row['hr_error_bpm'], '>7.2f')} | {_fmt(row['rr_error_bpm'], '>7.2f')}")
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to '{args.json}'.")
+
+
+if __name__ == '__main__':
+    main()
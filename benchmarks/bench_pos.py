@@ -0,0 +1,75 @@
+# benchmarks/bench_pos.py
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.heart_rate import cpu_POS
+
+
+def legacy_cpu_POS(input_video, fps):
+    """
+    The previous `cpu_POS` implementation (single trace, global alpha, per-sample loop),
+    kept here as the baseline for the comparison.
+    """
+    C = input_video[0]
+    H = np.zeros(C.shape[1])
+    norm_C = C / (np.linalg.norm(C, axis=0) + 1e-6)
+    alpha = np.std(norm_C[0]) / (np.std(norm_C[1]) + 1e-6)
+    beta = np.std(norm_C[0]) / (np.std(norm_C[2]) + 1e-6)
+    S = alpha * norm_C[0] + norm_C[1]
+    P = beta * norm_C[0] + norm_C[2]
+    for t in range(C.shape[1]):
+        H[t] = S[t] - P[t]
+    return H
+
+
+def synthetic_rgb(batch, n_samples, fps, rng):
+    """
+    Creates `batch` mean-RGB traces with a pulse, slow illumination drift and noise.
+    """
+    t = np.arange(n_samples) / fps
+    hr_hz = rng.uniform(1.0, 2.0, size=(batch, 1))
+    pulse = np.sin(2 * np.pi * hr_hz * t)
+    drift = np.cumsum(rng.normal(0, 0.05, size=(batch, n_samples)), axis=-1)
+    base = np.array([140.0, 110.0, 90.0])[None, :, None]
+    gain = np.array([0.3, 0.8, 0.2])[None, :, None]
+    noise = rng.normal(0, 0.2, size=(batch, 3, n_samples))
+    return base + gain * pulse[:, None, :] + drift[:, None, :] + noise
+
+
+def time_call(func, repeats):
+    """
+    Returns the best wall-clock time of `repeats` calls, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized POS against the previous implementation.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[300, 3000, 30000], help="Trace lengths N.")
+    parser.add_argument('--batch', type=int, default=8, help="Number of traces B for the batched run.")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>7} | {'legacy (ms)':>11} | {'POS B=1 (ms)':>12} | {f'POS B={args.batch} (ms)':>13} | {'us/sample B=' + str(args.batch):>15}")
+    for n_samples in args.sizes:
+        traces = synthetic_rgb(args.batch, n_samples, args.fps, rng)
+        single = traces[:1]
+        legacy = time_call(lambda: legacy_cpu_POS(single, args.fps), args.repeats)
+        pos_single = time_call(lambda: cpu_POS(single, args.fps), args.repeats)
+        pos_batch = time_call(lambda: cpu_POS(traces, args.fps), args.repeats)
+        per_sample = pos_batch / (args.batch * n_samples) * 1e6
+        print(f"{n_samples:>7} | {legacy * 1e3:>11.3f} | {pos_single * 1e3:>12.3f} | {pos_batch * 1e3:>13.3f} | {per_sample:>15.4f}")
+
+
+if __name__ == '__main__':
+    main()
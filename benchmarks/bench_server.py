@@ -0,0 +1,163 @@
+# benchmarks/bench_server.py
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_traces
+from utils.ingest_server import IngestClient, IngestServer
+from utils.instrumentation import QUANTILES, Instrumentation
+from utils.pipeline import BLOCK, QUEUE_POLICIES
+from utils.vitals import ESTIMATOR_RATE_METHODS
+
+
+async def run_session(index, host, port, seconds, fps, batch, speed, rate_method, noise, rng):
+    """
+    Streams the synthetic samples of one simulated client and collects its results.
+
+    Returns:
+        dict: True and final rates, result latencies (seconds) and the server's closing message.
+    """
+    hr_bpm, rr_bpm = rng.uniform(55, 120), rng.uniform(10, 22)
+    rgb, resp = synthetic_traces(int(seconds * fps), fps, hr_bpm, rr_bpm, noise=noise, rng=rng)
+    timestamps_ms = (np.arange(rgb.shape[1]) * 1000 / fps).astype(np.int64)
+
+    client = await IngestClient.connect(host, port, fps, rate_method=rate_method, name=f'load-{index}')
+    sent_at = {}
+    latencies, messages = [], []
+
+    async def receive():
+        while True:
+            message = await client.receive()
+            if message is None:
+                return
+            messages.append(message)
+            if message['type'] == 'vitals' and message['timestamp_ms'] in sent_at:
+                latencies.append(time.perf_counter() - sent_at[message['timestamp_ms']])
+            elif message['type'] == 'bye':
+                return
+
+    receiver = asyncio.ensure_future(receive())
+    start = time.perf_counter()
+    for begin in range(0, len(timestamps_ms), batch):
+        end = min(begin + batch, len(timestamps_ms))
+        if speed > 0:
+            # Kirim seperti client real time: batch berangkat setelah sampel terakhirnya "terekam"
+            delay = start + end / fps / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        sent_at[int(timestamps_ms[end - 1])] = time.perf_counter()
+        await client.send_samples(timestamps_ms[begin:end], rgb[:, begin:end].T, resp[begin:end])
+    await client.close()
+    await receiver
+
+    vitals = [message for message in messages if message['type'] == 'vitals']
+    last = vitals[-1] if vitals else {}
+    return {
+        'hr_bpm': hr_bpm,
+        'rr_bpm': rr_bpm,
+        'heart_rate': last.get('heart_rate'),
+        'respiration_rate': last.get('respiration_rate'),
+        'latencies': latencies,
+        'errors': [message['error'] for message in messages if message['type'] == 'error'],
+        'bye': messages[-1] if messages and messages[-1]['type'] == 'bye' else None,
+    }
+
+
+async def load_test(args):
+    """
+    Runs `args.sessions` concurrent clients against a server, starting one in-process if no port is given.
+
+    Returns:
+        dict: Throughput, result latency quantiles, dropped messages and HR/RR errors.
+    """
+    server = None
+    host, port = args.host, args.port
+    if port is None:
+        server = IngestServer(host, 0, max_session_bytes=int(args.max_session_mb * (1 << 20)),
+                              policy=args.policy, workers=args.workers, instrumentation=Instrumentation())
+        await server.start()
+        port = server.port
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    # Koneksi dibuka bertahap agar backlog listen tidak meluap pada ratusan sesi
+    tasks = []
+    for index in range(args.sessions):
+        tasks.append(asyncio.ensure_future(run_session(
+            index, host, port, args.seconds, args.fps, args.batch, args.speed, args.rate_method, args.noise,
+            np.random.default_rng(rng.integers(1 << 32)))))
+        await asyncio.sleep(args.ramp / max(1, args.sessions))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results if isinstance(result, BaseException)]
+    results = [result for result in results if not isinstance(result, BaseException)]
+    latencies = np.concatenate([result['latencies'] for result in results]) if results else np.empty(0)
+    hr_errors = [abs(result['heart_rate'] - result['hr_bpm']) for result in results if result['heart_rate'] is not None]
+    rr_errors = [abs(result['respiration_rate'] - result['rr_bpm'])
+                 for result in results if result['respiration_rate'] is not None]
+    report = {
+        'sessions': args.sessions,
+        'failed_sessions': len(failed) + sum(bool(result['errors']) for result in results),
+        'elapsed_s': elapsed,
+        'samples_per_s': args.sessions * int(args.seconds * args.fps) / elapsed,
+        'latency_ms': {f'p{int(q * 100)}': float(np.quantile(latencies, q)) * 1e3
+                       for q in QUANTILES} if len(latencies) else {},
+        'dropped': sum(result['bye']['dropped'] for result in results if result['bye']),
+        'hr_mae_bpm': float(np.mean(hr_errors)) if hr_errors else None,
+        'rr_mae_bpm': float(np.mean(rr_errors)) if rr_errors else None,
+    }
+    if failed:
+        report['first_failure'] = repr(failed[0])
+    if server is not None:
+        report['server_stages'] = server.instrumentation.snapshot()['stages']
+        await server.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the ingest server with many simulated clients.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None,
+                        help="Port of a running `python -m utils.ingest_server`; default starts one in-process.")
+    parser.add_argument('--sessions', type=int, default=50, help="Concurrent client sessions.")
+    parser.add_argument('--seconds', type=float, default=20.0, help="Length of each session's signal.")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--batch', type=int, default=10, help="Samples per message.")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Send rate as a multiple of real time; 0 sends as fast as the server accepts.")
+    parser.add_argument('--ramp', type=float, default=1.0, help="Seconds over which the sessions connect.")
+    parser.add_argument('--rate-method', choices=ESTIMATOR_RATE_METHODS, default='fft')
+    parser.add_argument('--noise', type=float, default=0.2)
+    parser.add_argument('--policy', choices=QUEUE_POLICIES, default=BLOCK, help="Queue policy of the in-process server.")
+    parser.add_argument('--max-session-mb', type=float, default=8.0)
+    parser.add_argument('--workers', type=int, default=None, help="Signal threads of the in-process server.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    report = asyncio.run(load_test(args))
+    latency = report['latency_ms']
+    print(f"{report['sessions']} sessions ({report['failed_sessions']} failed) in {report['elapsed_s']:.1f} s: "
+          f"{report['samples_per_s']:.0f} samples/s, {report['dropped']} messages dropped")
+    if latency:
+        print(f"Result latency: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, p99 {latency['p99']:.1f} ms")
+    hr_mae, rr_mae = report['hr_mae_bpm'], report['rr_mae_bpm']
+    print(f"Final estimate MAE: HR {hr_mae if hr_mae is None else round(hr_mae, 2)} BPM, "
+          f"RR {rr_mae if rr_mae is None else round(rr_mae, 2)} BPM")
+    for name, stats in report.get('server_stages', {}).items():
+        print(f"  server {name:<12} p50 {stats['p50_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f} ms  "
+              f"p99 {stats['p99_ms']:6.2f} ms")
+    if 'first_failure' in report:
+        print(f"First failure: {report['first_failure']}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+# benchmarks/check_model_cache.py
+
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from utils.download_model import MODEL_ASSETS, MODELS_DIR, ModelCache, _sha256
+
+# Gangguan yang dapat disuntikkan per file pada mirror lokal
+DROP = 'drop'                  # Content-Length penuh, koneksi ditutup setelah separuh isi
+SHORT = 'short'                # file di server terpotong (respons sendiri konsisten)
+CORRUPT = 'corrupt'            # ukuran benar, satu byte di tengah dibalik
+IGNORE_RANGE = 'ignore_range'  # header Range diabaikan, selalu 200 dengan isi penuh
+
+
+def _file_name(name):
+    return MODEL_ASSETS[name]['url'].split('/')[-1]
+
+
+class MirrorHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler of the local mirror with HTTP Range support and the faults above.
+    Every GET is logged in `server.log` as (file name, Range header or None).
+    """
+    def do_GET(self):
+        name = os.path.basename(self.path)
+        path = os.path.join(self.directory, name)
+        self.server.log.append((name, self.headers.get('Range')))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as file:
+            data = file.read()
+        fault = self.server.faults.get(name)
+        if fault == SHORT:
+            data = data[:len(data) // 2]
+        elif fault == CORRUPT:
+            data = bytearray(data)
+            data[len(data) // 2] ^= 0xFF
+            data = bytes(data)
+
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if match and fault != IGNORE_RANGE:
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+            body = data[start:]
+        else:
+            self.send_response(200)
+            body = data
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if fault == DROP:
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Mirror:
+    """
+    Local `http.server` mirror of the model files, used as the `base_url` of a `ModelCache`.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), partial(MirrorHandler, directory=directory))
+        self.server.log = []
+        self.server.faults = {}
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def log(self):
+        return self.server.log
+
+    def set_fault(self, name, fault=None):
+        self.server.faults[_file_name(name)] = fault
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _expect_error(error_type, func, *args):
+    try:
+        func(*args)
+    except error_type as e:
+        return e
+    raise AssertionError(f"Expected {error_type.__name__}, but {func.__name__} succeeded.")
+
+
+def check_offline_fail_fast(cache_dir, mirror):
+    """
+    Offline mode fails immediately on a missing or corrupted model and never contacts the mirror.
+    """
+    cache = ModelCache(cache_dir, base_url=mirror.url, offline=True)
+    _expect_error(FileNotFoundError, cache.fetch, 'face_detector')
+    path = cache.path('face_detector')
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(b'\0' * MODEL_ASSETS['face_detector']['size'])
+    _expect_error(FileNotFoundError, cache.fetch, 'face_detector')
+    assert not mirror.log, f"Offline cache made requests: {mirror.log}"
+    assert os.path.getsize(path) == MODEL_ASSETS['face_detector']['size'], "Offline cache touched the file."
+
+
+def check_resume_with_range(cache_dir, mirror):
+    """
+    An interrupted `.part` is resumed with a Range request and the result is verified.
+    """
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.path('face_detector')
+    offset = 100000
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(mirror.directory, _file_name('face_detector')), 'rb') as source, \
+            open(path + '.part', 'wb') as part:
+        part.write(source.read(offset))
+    cache.fetch('face_detector')
+    assert mirror.log == [(_file_name('face_detector'), f'bytes={offset}-')], f"Requests: {mirror.log}"
+    assert _sha256(path) == MODEL_ASSETS['face_detector']['sha256'], "Resumed file has the wrong checksum."
+    assert not os.path.exists(path + '.part'), ".part left behind."
+
+
+def check_resume_ignored_range(cache_dir, mirror):
+    """
+    A mirror that ignores Range (200 instead of 206) restarts the download instead of appending to `.part`.
+    """
+    mirror.set_fault('face_detector', IGNORE_RANGE)
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.path('face_detector')
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path + '.part', 'wb') as part:
+        part.write(b'x' * 1000)
+    cache.fetch('face_detector')
+    assert _sha256(path) == MODEL_ASSETS['face_detector']['sha256'], "File appended to a stale .part."
+
+
+def check_dropped_connection(cache_dir, mirror):
+    """
+    A connection closed mid-transfer raises, keeps the partial `.part` and no final file,
+    and the next fetch resumes it with a Range request.
+    """
+    mirror.set_fault('face_detector', DROP)
+    # Potongan terakhir yang belum lengkap hilang bersama koneksinya; dengan blok 1 MiB itu seluruh file ini
+    cache = ModelCache(cache_dir, base_url=mirror.url, chunk_size=16384)
+    path = cache.path('face_detector')
+    _expect_error(IOError, cache.fetch, 'face_detector')
+    assert not os.path.exists(path), "Truncated download was renamed into place."
+    partial_size = os.path.getsize(path + '.part')
+    assert 0 < partial_size < MODEL_ASSETS['face_detector']['size'], f".part has {partial_size} bytes."
+
+    mirror.set_fault('face_detector')
+    cache.fetch('face_detector')
+    assert mirror.log[-1] == (_file_name('face_detector'), f'bytes={partial_size}-'), f"Requests: {mirror.log}"
+    assert _sha256(path) == MODEL_ASSETS['face_detector']['sha256'], "Resumed file has the wrong checksum."
+
+
+def check_truncated_file(cache_dir, mirror):
+    """
+    A complete response of a truncated file fails on the pinned size and is never renamed into place.
+    """
+    mirror.set_fault('face_detector', SHORT)
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    error = _expect_error(IOError, cache.fetch, 'face_detector')
+    assert 'incomplete' in str(error), f"Unexpected error: {error}"
+    assert not os.path.exists(cache.path('face_detector')), "Truncated file was renamed into place."
+
+
+def check_corrupted_download(cache_dir, mirror):
+    """
+    A download of the right size with the wrong SHA-256 is rejected and its `.part` removed.
+    """
+    mirror.set_fault('face_detector', CORRUPT)
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.path('face_detector')
+    error = _expect_error(IOError, cache.fetch, 'face_detector')
+    assert 'Checksum mismatch' in str(error), f"Unexpected error: {error}"
+    assert not os.path.exists(path) and not os.path.exists(path + '.part'), "Corrupted download was kept."
+
+
+def check_corrupted_cache(cache_dir, mirror):
+    """
+    A cached file corrupted on disk (same size) fails verification: offline it raises,
+    online it is downloaded again.
+    """
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.fetch('face_detector')
+    with open(path, 'r+b') as file:
+        file.seek(1000)
+        byte = file.read(1)
+        file.seek(1000)
+        file.write(bytes([byte[0] ^ 0xFF]))
+    stat = os.stat(path)
+    # Pastikan mtime berubah meskipun resolusi waktu filesystem kasar
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert not cache.verify('face_detector'), "Corrupted cache passed verification."
+    _expect_error(FileNotFoundError, ModelCache(cache_dir, base_url=mirror.url, offline=True).fetch, 'face_detector')
+    requests_before = len(mirror.log)
+    cache.fetch('face_detector')
+    assert len(mirror.log) == requests_before + 1, "Corrupted cache was not downloaded again."
+    assert _sha256(path) == MODEL_ASSETS['face_detector']['sha256'], "Re-downloaded file has the wrong checksum."
+
+
+def check_recorded_checksum(cache_dir, mirror):
+    """
+    For a model without a pinned checksum, the SHA-256 of the first download is recorded and a
+    later download with different content is rejected against it.
+    """
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.fetch('pose_landmarker')
+    recorded = _sha256(path)
+    assert cache.verify('pose_landmarker'), "First download did not verify."
+    os.remove(path)
+    mirror.set_fault('pose_landmarker', CORRUPT)
+    error = _expect_error(IOError, cache.fetch, 'pose_landmarker')
+    assert recorded in str(error), f"Unexpected error: {error}"
+    assert not os.path.exists(path), "Mismatching download was kept."
+
+
+def check_untrusted_unpinned_file(cache_dir, mirror):
+    """
+    A truncated file of a model without a pinned checksum and without a manifest entry (e.g. left
+    by an older downloader) is not trusted: offline it raises, online it is replaced by a download.
+    """
+    cache = ModelCache(cache_dir, base_url=mirror.url)
+    path = cache.path('pose_landmarker')
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(mirror.directory, _file_name('pose_landmarker')), 'rb') as source:
+        served = source.read()
+    with open(path, 'wb') as file:
+        file.write(served[:1024])
+
+    assert not cache.verify('pose_landmarker'), "Unrecorded unpinned file passed verification."
+    _expect_error(FileNotFoundError, ModelCache(cache_dir, base_url=mirror.url, offline=True).fetch,
+                  'pose_landmarker')
+    assert not mirror.log, f"Offline cache made requests: {mirror.log}"
+    cache.fetch('pose_landmarker')
+    assert mirror.log == [(_file_name('pose_landmarker'), None)], f"Requests: {mirror.log}"
+    assert _sha256(path) == hashlib.sha256(served).hexdigest(), "Truncated file was not replaced."
+    assert cache.verify('pose_landmarker'), "Downloaded file did not verify."
+
+
+CHECKS = (check_offline_fail_fast, check_resume_with_range, check_resume_ignored_range, check_dropped_connection,
+          check_truncated_file, check_corrupted_download, check_corrupted_cache, check_recorded_checksum,
+          check_untrusted_unpinned_file)
+
+
+def run_checks(face_model_path, verbose=False, seed=0):
+    """
+    Runs every check against a fresh cache directory and a fresh local mirror serving the face
+    detector model and a random stand-in for the (unpinned) pose landmarker model.
+
+    Returns:
+        list[tuple]: (check name, error message or None) per check.
+    """
+    if _sha256(face_model_path) != MODEL_ASSETS['face_detector']['sha256']:
+        raise ValueError(f"'{face_model_path}' does not match the pinned face detector checksum.")
+    rng = np.random.default_rng(seed)
+    results = []
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as root:
+            mirror_dir = os.path.join(root, 'mirror')
+            os.makedirs(mirror_dir)
+            shutil.copy(face_model_path, os.path.join(mirror_dir, _file_name('face_detector')))
+            with open(os.path.join(mirror_dir, _file_name('pose_landmarker')), 'wb') as file:
+                file.write(rng.integers(0, 256, size=300000, dtype=np.uint8).tobytes())
+
+            mirror = Mirror(mirror_dir)
+            output = io.StringIO()
+            try:
+                with contextlib.ExitStack() as stack:
+                    if not verbose:
+                        # Pesan unduhan dan progress bar tqdm dari ModelCache
+                        stack.enter_context(contextlib.redirect_stdout(output))
+                        stack.enter_context(contextlib.redirect_stderr(output))
+                    check(os.path.join(root, 'models'), mirror)
+                results.append((check.__name__, None))
+            except Exception as e:
+                results.append((check.__name__, f"{type(e).__name__}: {e}"))
+            finally:
+                mirror.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the model cache against a local HTTP mirror with "
+                                                 "interrupted, truncated and corrupted downloads.")
+    parser.add_argument('--face-model', default=os.path.join(MODELS_DIR, _file_name('face_detector')),
+                        help="Verified copy of the face detector model to serve from the mirror.")
+    parser.add_argument('--verbose', action='store_true', help="Show the download output of the cache.")
+    args = parser.parse_args()
+
+    results = run_checks(args.face_model, verbose=args.verbose)
+    for name, error in results:
+        print(f"{'FAIL' if error else 'ok  '} {name}" + (f": {error}" if error else ""))
+    failed = sum(error is not None for _, error in results)
+    print(f"{len(results) - failed} of {len(results)} checks passed.")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
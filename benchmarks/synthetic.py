@@ -0,0 +1,211 @@
+# benchmarks/synthetic.py
+
+import argparse
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import numpy as np
+import cv2
+
+from utils.frame_processor import LEFT_SHOULDER, RIGHT_SHOULDER
+
+# Warna kulit dasar (B, G, R) dan kekuatan pulsa per kanal, mengikuti profil PPG (hijau terkuat)
+SKIN_BGR = np.array([95.0, 120.0, 160.0])
+PULSE_GAIN_BGR = np.array([0.25, 0.8, 0.35])
+SHIRT_BGR = (120, 90, 60)
+
+
+@dataclass
+class SceneTruth:
+    """
+    Ground truth of one synthetic frame.
+
+    Attributes:
+        face_box (tuple): Face box as (x, y, width, height) in pixels.
+        shoulder_y (float): Shoulder line in pixels.
+        shoulder_x (tuple): (left_x, right_x) of the shoulders in pixels.
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+    """
+    face_box: tuple
+    shoulder_y: float
+    shoulder_x: tuple
+    width: int
+    height: int
+
+
+def synthetic_traces(n_samples, fps, hr_bpm, rr_bpm, noise=0.2, motion=0.0, rng=None):
+    """
+    Creates a mean-RGB forehead trace and a shoulder position trace with known rates.
+
+    Args:
+        n_samples (int): Number of samples.
+        fps (float): Sampling rate (Hz).
+        hr_bpm (float): Heart rate in beats per minute.
+        rr_bpm (float): Respiration rate in breaths per minute.
+        noise (float): Standard deviation of the white sensor noise (8-bit levels / pixels).
+        motion (float): Strength of the motion and illumination artifacts, 0 = none.
+        rng (np.random.Generator, optional): Random generator.
+
+    Returns:
+        tuple: (rgb, resp) with shapes (3, N) (R, G, B order) and (N,).
+    """
+    rng = rng or np.random.default_rng()
+    t = np.arange(n_samples) / fps
+    pulse = np.sin(2 * np.pi * hr_bpm / 60.0 * t + rng.uniform(0, 2 * np.pi))
+    breath = np.sin(2 * np.pi * rr_bpm / 60.0 * t + rng.uniform(0, 2 * np.pi))
+
+    # Artefak: drift iluminasi (random walk) mengenai semua kanal, goyangan kepala/badan
+    illumination = 1 + motion * 0.01 * np.cumsum(rng.normal(0, 0.05, n_samples))
+    sway = motion * 3.0 * np.sin(2 * np.pi * 0.07 * t + rng.uniform(0, 2 * np.pi))
+
+    rgb = (SKIN_BGR[::-1, None] + PULSE_GAIN_BGR[::-1, None] * pulse) * illumination
+    rgb = rgb + rng.normal(0, noise, size=rgb.shape)
+    resp = 400.0 + 6.0 * breath + sway + rng.normal(0, noise, n_samples)
+    return rgb, resp
+
+
+class SyntheticScene:
+    """
+    Renders frames of a synthetic subject: a skin patch whose color pulses at the heart rate
+    above a shirt whose top edge moves with the breathing, on a textured background.
+    """
+    def __init__(self, width=1280, height=720, fps=30.0, hr_bpm=72.0, rr_bpm=15.0, noise=2.0, motion=0.0, seed=0):
+        """
+        Args:
+            width (int): Frame width in pixels.
+            height (int): Frame height in pixels.
+            fps (float): Frame rate (Hz).
+            hr_bpm (float): Heart rate in beats per minute.
+            rr_bpm (float): Respiration rate in breaths per minute.
+            noise (float): Standard deviation of the per-pixel sensor noise (8-bit levels).
+            motion (float): Strength of head sway and illumination drift, 0 = static.
+            seed (int): Seed of the random generator.
+        """
+        self.width, self.height, self.fps = width, height, fps
+        self.hr_bpm, self.rr_bpm = hr_bpm, rr_bpm
+        self.noise, self.motion = noise, motion
+        self.rng = np.random.default_rng(seed)
+        self.background = self.rng.integers(40, 80, size=(height, width, 3), dtype=np.uint8)
+        self.background = cv2.GaussianBlur(self.background, (0, 0), 3)
+        self.face_size = height // 4
+        self._phase = self.rng.uniform(0, 2 * np.pi, size=3)
+        self._illumination = 1.0
+
+    def frame(self, index):
+        """
+        Renders frame `index`.
+
+        Returns:
+            tuple: (frame in BGR format, SceneTruth).
+        """
+        t = index / self.fps
+        pulse = np.sin(2 * np.pi * self.hr_bpm / 60.0 * t + self._phase[0])
+        breath = np.sin(2 * np.pi * self.rr_bpm / 60.0 * t + self._phase[1])
+        self._illumination *= 1 + self.motion * 0.0005 * self.rng.normal()
+        sway_x = self.motion * 0.02 * self.width * np.sin(2 * np.pi * 0.07 * t + self._phase[2])
+        sway_y = self.motion * 0.01 * self.height * np.sin(2 * np.pi * 0.05 * t)
+
+        size = self.face_size
+        face_x = int(round(self.width / 2 - size / 2 + sway_x))
+        face_y = int(round(self.height * 0.15 + sway_y))
+        shoulder_y = face_y + 1.5 * size + 0.03 * size * breath
+        shoulder_x = (face_x - 0.6 * size, face_x + 1.6 * size)
+
+        frame = self.background.copy()
+        # Tepi atas baju dirender dengan cakupan area (seperti sensor kamera), sehingga gerakan
+        # napas di bawah satu piksel tetap terlihat pada baris tepi
+        top = int(np.floor(shoulder_y))
+        x0_shirt, x1_shirt = int(shoulder_x[0]), int(shoulder_x[1])
+        cv2.rectangle(frame, (x0_shirt, top + 1), (x1_shirt, self.height), SHIRT_BGR, -1)
+        if 0 <= top < self.height:
+            coverage = top + 1 - shoulder_y
+            edge = frame[top, x0_shirt:x1_shirt + 1].astype(float)
+            frame[top, x0_shirt:x1_shirt + 1] = np.round((1 - coverage) * edge + coverage * np.array(SHIRT_BGR))
+        # Noise ditambahkan sebelum pembulatan (dither), sehingga pulsa < 1 level tetap terukur dari rata-rata ROI
+        skin = (SKIN_BGR + PULSE_GAIN_BGR * pulse) * self._illumination
+        patch = skin + self.rng.normal(0, self.noise, size=(size, size, 3))
+        y0, y1 = max(0, face_y), min(self.height, face_y + size)
+        x0, x1 = max(0, face_x), min(self.width, face_x + size)
+        frame[y0:y1, x0:x1] = np.clip(patch[y0 - face_y:y1 - face_y, x0 - face_x:x1 - face_x], 0, 255).astype(np.uint8)
+
+        truth = SceneTruth((face_x, face_y, size, size), shoulder_y, shoulder_x, self.width, self.height)
+        return frame, truth
+
+    def frames(self, seconds):
+        """
+        Yields (frame, SceneTruth) for `seconds` of video.
+        """
+        for index in range(int(round(seconds * self.fps))):
+            yield self.frame(index)
+
+
+class OracleFaceDetector:
+    """
+    Stand-in for the MediaPipe Face Detector that returns the ground-truth face box of the
+    current `SceneTruth`, so the signal path can be benchmarked on synthetic faces.
+    """
+    def __init__(self, jitter_px=0.0, rng=None):
+        self.truth = None
+        self.jitter_px = jitter_px
+        self.rng = rng or np.random.default_rng()
+
+    def detect(self, mp_image):
+        scale = mp_image.width / self.truth.width
+        x, y, w, h = (np.asarray(self.truth.face_box, dtype=float) + self.rng.normal(0, self.jitter_px, 4)) * scale
+        box = SimpleNamespace(origin_x=int(x), origin_y=int(y), width=int(w), height=int(h))
+        return SimpleNamespace(detections=[SimpleNamespace(bounding_box=box)])
+
+
+class OraclePoseLandmarker:
+    """
+    Stand-in for the MediaPipe Pose Landmarker returning the ground-truth shoulders
+    (plus optional landmark noise) in normalized coordinates, for the image and video modes.
+    """
+    def __init__(self, jitter_px=0.0, rng=None):
+        self.truth = None
+        self.jitter_px = jitter_px
+        self.rng = rng or np.random.default_rng()
+
+    def detect(self, mp_image):
+        truth = self.truth
+        y = (truth.shoulder_y + self.rng.normal(0, self.jitter_px)) / truth.height
+        landmarks = [SimpleNamespace(x=0.5, y=0.5)] * 33
+        landmarks[LEFT_SHOULDER] = SimpleNamespace(x=truth.shoulder_x[1] / truth.width, y=y)
+        landmarks[RIGHT_SHOULDER] = SimpleNamespace(x=truth.shoulder_x[0] / truth.width, y=y)
+        return SimpleNamespace(pose_landmarks=[landmarks])
+
+    def detect_for_video(self, mp_image, timestamp_ms):
+        return self.detect(mp_image)
+
+
+def write_video(path, scene, seconds):
+    """
+    Writes `seconds` of a synthetic scene to a video file (e.g. as input for utils/batch_processor.py).
+    Use a lossless codec to keep the sub-level pulse; lossy codecs flatten it.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'FFV1'), scene.fps, (scene.width, scene.height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open a video writer for '{path}'.")
+    for frame, _ in scene.frames(seconds):
+        writer.write(frame)
+    writer.release()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a synthetic video with known heart and respiration rates.")
+    parser.add_argument('output', help="Output video file, e.g. synthetic.mkv (FFV1, lossless).")
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--hr', type=float, default=72.0, help="Heart rate in BPM.")
+    parser.add_argument('--rr', type=float, default=15.0, help="Respiration rate in breaths per minute.")
+    parser.add_argument('--noise', type=float, default=2.0, help="Per-pixel noise in 8-bit levels.")
+    parser.add_argument('--motion', type=float, default=0.0, help="Motion and illumination artifact strength.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_video(args.output, SyntheticScene(args.width, args.height, args.fps, args.hr, args.rr,
+                                            args.noise, args.motion, args.seed), args.seconds)
+    print(f"Wrote '{args.output}' (HR {args.hr} BPM, RR {args.rr} BPM).")
@@ -1,43 +1,125 @@
 # main.py
 
+import time
+PROCESS_START = time.perf_counter()
+
 import sys
-import numpy as np
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import cv2
-import mediapipe as mp
-# HAPUS BARIS INI: import mediapipe.solutions.pose as mp_pose
+import numpy as np
 
 from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QGridLayout
 from PyQt5.QtCore import QTimer, Qt
 from PyQt5.QtGui import QImage, QPixmap
 import pyqtgraph as pg
-from scipy.signal import find_peaks
-
-# Import modul dari folder utils
-from utils.download_model import download_model_face_detection, download_model_pose_detection
-from utils.check_gpu import check_gpu
-# Import fungsi-fungsi pemrosesan sinyal dari utils/heart_rate.py
-from utils.heart_rate import cpu_POS, bandpass_filter_signal, moving_average_filter, get_initial_roi
 
-# Pastikan import ini ada dan benar
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
+# Import modul dari folder utils (mediapipe baru dimuat saat detektor dibuat)
+from utils.detectors import (create_face_detector, create_pose_landmarker, select_delegate,
+                             POSE_MODES, POSE_MODE_VIDEO, POSE_MODE_LIVE_STREAM)
+from utils.frame_processor import FrameProcessor, AsyncPoseResults
+from utils.pipeline import RealtimePipeline, PipelineOutput, QUEUE_POLICIES, DROP_OLDEST, BLOCK
+# Estimasi HR/RR dari sampel per frame (memakai fungsi-fungsi di utils/heart_rate.py)
+from utils.vitals import VitalSignsEstimator, ESTIMATOR_RATE_METHODS, FILTER_MODES, FILTER_BLOCK
+from utils.subjects import MultiSubjectEstimator, check_multi_subject_options
+from utils.instrumentation import Instrumentation, JsonLinesExporter, StartupProfile
+from utils.scheduler import AdaptiveScheduler
+from utils.session import SessionRecorder
+from utils.trend_archive import TrendArchive
+from utils.download_model import OFFLINE_ENV, BASE_URL_ENV
 
 class HeartRateMonitor(QWidget):
     """
     Main Class untuk menampilkan GUI dan menghitung detak jantung dan pernapasan secara real-time.
     Kelas ini akan menyimpan nilai sinyal rppg dan nilai sinyal pernafasan dari pose detection.
     """
-    def __init__(self):
+    def __init__(self, threaded=False, queue_size=2, capture_policy=DROP_OLDEST, detection_policy=BLOCK,
+                 window_seconds=10.0, hop_seconds=0.5, filter_mode=FILTER_BLOCK, rate_method='peaks',
+                 face_detect_interval=1, pose_mode=POSE_MODE_VIDEO, inference_scale=1.0, max_subjects=1,
+                 parallel_inference=False, metrics=False, metrics_port=None, metrics_jsonl=None,
+                 metrics_overlay=False, record_path=None, archive_dir=None, display_fps=30.0,
+                 startup=None, pose_detect_interval=1, frame_budget_ms=None, pose_crop=False, multi_roi=False):
         """
         Konstruktor kelas HeartRateMonitor.
         Menginisialisasi GUI, kamera, detektor MediaPipe, dan properti sinyal/plot.
+
+        Args:
+            threaded (bool): Jika True, capture, deteksi, dan pemrosesan sinyal berjalan di thread
+                terpisah (lihat utils/pipeline.py) dan thread GUI hanya menggambar hasil terbaru.
+            queue_size (int): Kapasitas antrian antar tahap pada mode threaded.
+            capture_policy (str): Kebijakan antrian capture -> deteksi ('drop_oldest' atau 'block').
+            detection_policy (str): Kebijakan antrian deteksi -> sinyal ('drop_oldest' atau 'block').
+            window_seconds (float): Panjang jendela analisis HR/RR dalam detik.
+            hop_seconds (float): Selang waktu antar pembaruan HR/RR dalam detik.
+            filter_mode (str): 'block' (filter zero-phase per jendela) atau 'stream'
+                (filter respirasi kausal per sampel dengan state yang disimpan).
+            rate_method (str): 'peaks' (interval puncak), 'fft' / 'welch' (frekuensi dominan
+                spektrum, beserta nilai SNR sebagai tingkat keyakinan), atau 'sdft' (sliding DFT
+                inkremental, HR/RR diperbarui setiap frame).
+            face_detect_interval (int): Face detector dijalankan setiap N frame; di antaranya ROI wajah
+                dilacak dengan template matching. 1 berarti deteksi di setiap frame.
+            pose_mode (str): Running mode Pose Landmarker: 'image' (detect per frame tanpa tracking),
+                'video' (detect_for_video dengan timestamp, memakai tracking temporal MediaPipe), atau
+                'live_stream' (detect_async; landmark bahu tiba lewat callback dan tidak memblokir GUI).
+            inference_scale (float): Skala salinan frame untuk detektor (0-1]. Sampel RGB dahi tetap
+                diambil dari piksel resolusi penuh.
+            max_subjects (int): Jumlah orang yang dipantau. Jika lebih dari 1, setiap wajah mendapat ID
+                tetap, sinyal setiap orang disimpan terpisah dan diproses bersama dalam satu batch.
+                Label dan plot menampilkan orang dengan ID terkecil; HR/RR lainnya ditulis di video.
+            parallel_inference (bool): Jika True, Pose Landmarker berjalan di thread worker bersamaan
+                dengan Face Detector pada frame yang sama (tanpa salinan), sehingga latensi per frame
+                mendekati model yang paling lambat saja.
+            metrics (bool): Aktifkan instrumentasi latensi per tahap (capture, preprocess, face_detect,
+                pose_detect, signal, display). Otomatis aktif jika salah satu opsi di bawah dipakai.
+            metrics_port (int, optional): Port HTTP untuk endpoint Prometheus /metrics.
+            metrics_jsonl (str, optional): File JSON-lines yang ditambah snapshot statistik setiap 5 detik.
+            metrics_overlay (bool): Tampilkan FPS dan p50/p95/p99 setiap tahap di atas video.
+            record_path (str, optional): Rekam hasil per frame (timestamp, ROI, RGB, landmark bahu,
+                confidence) ke file sesi biner untuk diputar ulang dengan `python -m utils.session`.
+            archive_dir (str, optional): Direktori arsip tren HR/RR (memory-mapped, dengan level ringkasan)
+                untuk sesi panjang. Jika diisi, plot tren seluruh sesi ditampilkan di bawah plot sinyal.
+            display_fps (float): Laju penggambaran GUI (video, label, plot), terpisah dari laju pemrosesan
+                frame dan dibatasi FPS kamera. Frame yang diproses di antara dua penggambaran tidak digambar.
+            startup (StartupProfile, optional): Pencatat waktu startup; rinciannya dicetak saat frame
+                pertama ditampilkan.
+            pose_detect_interval (int): Pose Landmarker dijalankan setiap N frame; di antaranya gerak
+                vertikal bahu diukur dengan optical flow (sub-piksel) di ROI bahu. 1 berarti setiap frame.
+            frame_budget_ms (float, optional): Anggaran waktu pemrosesan per frame. Jika diisi, scheduler
+                adaptif memutuskan per frame apakah Face Detector, Pose Landmarker, keduanya atau tidak
+                satupun dijalankan (ROI dilacak dari cache), dan menurunkan/menaikkan `inference_scale`
+                sesuai biaya yang terukur. Keputusan dan laju yang tercapai ditampilkan di video dan
+                dicetak ke konsol setiap 5 detik.
+            pose_crop (bool): Jika True, Pose Landmarker hanya dijalankan pada crop tubuh bagian atas yang
+                diturunkan dari kotak wajah (dan ROI bahu sebelumnya); landmark dipetakan kembali ke
+                koordinat frame. Jika bahu tidak ditemukan di dalam crop, deteksi diulang pada frame penuh.
+            multi_roi (bool): Jika True, sampel rPPG diambil dari dahi dan kedua pipi (diletakkan dengan
+                keypoint wajah) dan HR dihitung dari gabungan ketiganya yang diberi bobot sesuai SNR.
+
+        Raises:
+            ValueError: Jika `max_subjects` > 1 dipakai bersama `filter_mode` 'stream' atau `rate_method`
+                'sdft', yang tidak didukung oleh estimasi batch multi-subjek, atau jika `display_fps`
+                tidak positif.
         """
+        # Dicek sebelum GUI, kamera dan model dibuka
+        if max_subjects > 1:
+            check_multi_subject_options(filter_mode, rate_method)
+        if not display_fps > 0:
+            raise ValueError(f"display_fps must be positive, got {display_fps}.")
         super().__init__()
-        self.initUI()
+        self.startup = startup or StartupProfile()
+        self.first_frame_pending = True
+        with self.startup.step('gui'):
+            self.initUI()
+
+        # Model MediaPipe dimuat di thread lain selama kamera dibuka; kedua detektor dibuat bersamaan
+        self.pose_results = AsyncPoseResults() if pose_mode == POSE_MODE_LIVE_STREAM else None
+        loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix='startup')
+        detectors = loader.submit(self.load_detectors, loader, pose_mode, max_subjects)
 
         # Platform Specific Camera Backend
-        video_backend = cv2.CAP_DSHOW if sys.platform == 'win32' else cv2.CAP_AVFOUNDATION
-        self.cap = cv2.VideoCapture(0, video_backend)
+        with self.startup.step('camera'):
+            video_backend = cv2.CAP_DSHOW if sys.platform == 'win32' else cv2.CAP_AVFOUNDATION
+            self.cap = cv2.VideoCapture(0, video_backend)
         if not self.cap.isOpened():
             print("Error: Could not open video stream. Please check webcam.")
             sys.exit(1)
@@ -47,16 +129,50 @@ class HeartRateMonitor(QWidget):
             print("Warning: FPS is 0, setting to default 30.")
             self.fps = 30
 
-        # Properties for Storing values
-        self.r_signal, self.g_signal, self.b_signal = [], [], []
-        self.resp_signal = []
+        # Instrumentasi latensi; saat mati, setiap tahap hanya memakai context manager kosong
+        metrics = metrics or metrics_port is not None or metrics_jsonl is not None or metrics_overlay
+        self.instrumentation = Instrumentation(enabled=metrics, nominal_fps=self.fps)
+        self.metrics_overlay = metrics_overlay
+        self.metrics_exporter = JsonLinesExporter(self.instrumentation, metrics_jsonl) if metrics_jsonl else None
+        self.metrics_server = self.instrumentation.start_http_server(metrics_port) if metrics_port else None
+        self.scheduler = None
+        self.scheduler_reported = time.monotonic()
+        if frame_budget_ms:
+            self.scheduler = AdaptiveScheduler(frame_budget_ms, max_scale=inference_scale)
+            self.instrumentation.add_status('scheduler', self.scheduler.status)
+
+        self.recorder = SessionRecorder(record_path, self.fps) if record_path else None
+        self.trend_archive = TrendArchive(archive_dir) if archive_dir else None
+        self.trend_refreshed = 0.0
+        self.plot_widget_trend.setVisible(self.trend_archive is not None)
 
-        # Initialize MediaPipe detectors
-        self.face_detector = self.initialize_face_detector()
-        self.pose_landmarker = self.initialize_pose_landmarker()
+        # Properties for Storing values
+        if max_subjects > 1:
+            self.estimator = MultiSubjectEstimator(self.fps, window_seconds=window_seconds,
+                                                   hop_seconds=hop_seconds, rate_method=rate_method,
+                                                   filter_mode=filter_mode)
+        else:
+            self.estimator = VitalSignsEstimator(self.fps, window_seconds=window_seconds, hop_seconds=hop_seconds,
+                                                 filter_mode=filter_mode, rate_method=rate_method)
+        self.hr_version_shown = 0
+        self.resp_version_shown = 0
+
+        # Tunggu detektor MediaPipe dari thread startup
+        with self.startup.step('wait_detectors'):
+            self.face_detector, self.pose_landmarker = detectors.result()
+        loader.shutdown()
+        self.frame_processor = FrameProcessor(self.face_detector, self.pose_landmarker,
+                                              face_detect_interval=face_detect_interval,
+                                              pose_mode=pose_mode, pose_results=self.pose_results,
+                                              inference_scale=inference_scale, max_subjects=max_subjects,
+                                              parallel_inference=parallel_inference,
+                                              instrumentation=self.instrumentation,
+                                              pose_detect_interval=pose_detect_interval,
+                                              scheduler=self.scheduler,
+                                              pose_crop=pose_crop,
+                                              multi_roi=multi_roi)
 
         # Inisialisasi properti untuk ROI pernapasan berbasis landmark
-        self.resp_roi_center_y_history = []
         self.last_pose_landmarks = None
 
         self.left_x_resp = None
@@ -64,10 +180,32 @@ class HeartRateMonitor(QWidget):
         self.right_x_resp = None
         self.bottom_y_resp = None
         
-        # Setup QTimer for frame updates
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(1000 // int(self.fps))
+        # Mode threaded: tahap capture/deteksi/sinyal berjalan di luar thread GUI
+        self.pipeline = None
+        if threaded:
+            self.pipeline = RealtimePipeline(self.cap, self.frame_processor, self.estimator,
+                                             queue_size=queue_size,
+                                             capture_policy=capture_policy,
+                                             detection_policy=detection_policy,
+                                             instrumentation=self.instrumentation,
+                                             recorder=self.recorder,
+                                             trend_archive=self.trend_archive)
+            self.pipeline.start()
+
+        # Setup QTimer for frame updates; penggambaran memakai timer sendiri dengan laju display_fps
+        self.latest_output = None
+        self.output_shown = None
+        self.display_buffer = None
+        self.display_image = None
+        self.timer = None
+        if not threaded:
+            self.timer = QTimer()
+            self.timer.timeout.connect(self.update_frame)
+            # Timer hanya memicu pembacaan; jarak antar sampel diambil dari timestamp, bukan dari interval ini
+            self.timer.start(max(1, int(1000 / self.fps)))
+        self.display_timer = QTimer()
+        self.display_timer.timeout.connect(self.paint_latest)
+        self.display_timer.start(int(1000 / min(display_fps, self.fps)))
 
     def initUI(self):
         """
@@ -87,6 +225,8 @@ class HeartRateMonitor(QWidget):
         # Heart Rate Plot
         self.plot_widget_hr = pg.PlotWidget()
         self.plot_widget_hr.setYRange(-3, 3)
+        self.plot_widget_hr.setClipToView(True)
+        self.plot_widget_hr.setDownsampling(auto=True, mode='peak')
         self.plot_widget_hr.setTitle("Heart Rate Signal (rPPG)")
         self.plot_widget_hr.setLabel('left', 'Amplitude')
         self.plot_widget_hr.setLabel('bottom', 'Samples')
@@ -95,17 +235,30 @@ class HeartRateMonitor(QWidget):
         # Respiration Rate Plot
         self.plot_widget_resp = pg.PlotWidget()
         self.plot_widget_resp.setYRange(-3, 3)
+        self.plot_widget_resp.setClipToView(True)
+        self.plot_widget_resp.setDownsampling(auto=True, mode='peak')
         self.plot_widget_resp.setTitle("Respiration Signal")
         self.plot_widget_resp.setLabel('left', 'Amplitude')
         self.plot_widget_resp.setLabel('bottom', 'Samples')
         self.plot_curve_resp = self.plot_widget_resp.plot(pen='b')
 
+        # Trend Plot (seluruh sesi, dari arsip; hanya tampil dengan --archive)
+        self.plot_widget_trend = pg.PlotWidget()
+        self.plot_widget_trend.setClipToView(True)
+        self.plot_widget_trend.setDownsampling(auto=True, mode='peak')
+        self.plot_widget_trend.setTitle("HR / RR Trend")
+        self.plot_widget_trend.setLabel('left', 'BPM')
+        self.plot_widget_trend.setLabel('bottom', 'Minutes')
+        self.plot_curve_trend_hr = self.plot_widget_trend.plot(pen='r')
+        self.plot_curve_trend_resp = self.plot_widget_trend.plot(pen='b')
+
         # Making Layout instance and insert the plot into the layout
         left_layout = QVBoxLayout()
         left_layout.addWidget(self.hr_label)
         left_layout.addWidget(self.plot_widget_hr)
         left_layout.addWidget(self.resp_label)
         left_layout.addWidget(self.plot_widget_resp)
+        left_layout.addWidget(self.plot_widget_trend)
 
         right_layout = QVBoxLayout()
         right_layout.addWidget(self.video_label)
@@ -118,64 +271,62 @@ class HeartRateMonitor(QWidget):
 
         self.setLayout(main_layout)
 
-    def initialize_face_detector(self):
+    def load_detectors(self, executor, pose_mode=POSE_MODE_VIDEO, num_poses=1):
+        """
+        Memeriksa delegate (GPU/CPU) sekali, lalu membuat Face Detector dan Pose Landmarker secara
+        bersamaan: Pose Landmarker di thread lain dari `executor`, Face Detector di thread ini.
+        MediaPipe melepas GIL selama memuat model, sehingga keduanya benar-benar berjalan paralel.
+
+        Args:
+            executor (ThreadPoolExecutor): Executor startup dengan setidaknya satu worker kosong.
+            pose_mode (str): Running mode landmarker ('image', 'video', atau 'live_stream').
+            num_poses (int): Jumlah maksimum orang yang dideteksi per frame.
+
+        Returns:
+            tuple: (FaceDetector, PoseLandmarker).
+        """
+        # Termasuk impor mediapipe yang pertama
+        with self.startup.step('delegate'):
+            delegate = select_delegate()
+
+        def pose_task():
+            with self.startup.step('pose_landmarker'):
+                return self.initialize_pose_landmarker(pose_mode, num_poses, delegate)
+
+        pose_landmarker = executor.submit(pose_task)
+        with self.startup.step('face_detector'):
+            face_detector = self.initialize_face_detector(delegate)
+        return face_detector, pose_landmarker.result()
+
+    def initialize_face_detector(self, delegate=None):
         """
         Menginisialisasi objek Face Detector dari MediaPipe untuk proses rPPG.
         Model akan diunduh jika belum ada.
 
+        Args:
+            delegate (mediapipe.tasks.BaseOptions.Delegate, optional): Delegate hasil `select_delegate`.
+
         Returns:
             mediapipe.tasks.vision.FaceDetector: Objek FaceDetector yang sudah terinisialisasi.
         """
-        model_path = download_model_face_detection()
-        BaseOptions = mp.tasks.BaseOptions
-        gpu_checked = check_gpu()
-        
-        if sys.platform == 'win32':
-            delegate = python.BaseOptions.Delegate.CPU
-        else:
-            delegate = python.BaseOptions.Delegate.GPU if gpu_checked == "NVIDIA" else python.BaseOptions.Delegate.CPU
-        
-        options = vision.FaceDetectorOptions(
-            base_options=BaseOptions(
-                model_asset_path=model_path,
-                delegate=delegate
-            )
-        )
-        return vision.FaceDetector.create_from_options(options)
-
-    def initialize_pose_landmarker(self):
+        return create_face_detector(delegate)
+
+    def initialize_pose_landmarker(self, pose_mode=POSE_MODE_VIDEO, num_poses=1, delegate=None):
         """
         Menginisialisasi objek Pose Landmarker dari MediaPipe untuk proses ekstraksi
         sinyal respirasi. Model akan diunduh jika belum ada.
 
+        Args:
+            pose_mode (str): Running mode landmarker ('image', 'video', atau 'live_stream').
+            num_poses (int): Jumlah maksimum orang yang dideteksi per frame.
+            delegate (mediapipe.tasks.BaseOptions.Delegate, optional): Delegate hasil `select_delegate`.
+
         Returns:
             mediapipe.tasks.vision.PoseLandmarker: Objek PoseLandmarker yang sudah terinisialisasi.
         """
-        model_path = download_model_pose_detection()
-        BaseOptions = mp.tasks.BaseOptions
-        PoseLandmarkerOptions = mp.tasks.vision.PoseLandmarkerOptions
-        VisionRunningMode = mp.tasks.vision.RunningMode
-        gpu_checked = check_gpu()
-
-        if sys.platform == 'win32':
-            delegate = BaseOptions.Delegate.CPU
-        else:
-            delegate = BaseOptions.Delegate.GPU if gpu_checked == "NVIDIA" else BaseOptions.Delegate.CPU
-            
-        options_image = PoseLandmarkerOptions(
-            base_options=BaseOptions(
-                model_asset_path=model_path,
-                delegate = delegate
-            ),
-            running_mode=VisionRunningMode.IMAGE,
-            num_poses=1,
-            min_pose_detection_confidence=0.5,
-            min_pose_presence_confidence=0.5,
-            min_tracking_confidence=0.5,
-            output_segmentation_masks=False
-        )
-        
-        return mp.tasks.vision.PoseLandmarker.create_from_options(options_image)
+        callback = self.pose_results.callback if self.pose_results is not None else None
+        return create_pose_landmarker(delegate, running_mode=pose_mode, result_callback=callback,
+                                      num_poses=num_poses)
 
     def update_frame(self):
         """
@@ -186,151 +337,177 @@ class HeartRateMonitor(QWidget):
         3. Deteksi pose dan ekstraksi sinyal respirasi berbasis landmark.
         4. Pemrosesan sinyal (filtering, normalisasi, smoothing).
         5. Perhitungan detak jantung dan laju pernapasan.
-        6. Pembaruan tampilan GUI (video feed, plot sinyal, label hasil).
+        6. Menyimpan hasil terbaru untuk digambar oleh paint_latest (video feed, plot sinyal, label hasil).
         """
-        ret, frame = self.cap.read()
+        with self.instrumentation.stage('capture'):
+            ret, frame = self.cap.read()
+        # Waktu tangkap sebenarnya; estimator me-resample sampel ke grid seragam berdasarkan waktu ini
+        timestamp = time.monotonic()
         if not ret:
             print("Failed to grab frame.")
             self.timer.stop()
+            self.display_timer.stop()
             return
 
-        h, w, _ = frame.shape
-
-        # --- rPPG Signal Extraction (Forehead ROI) ---
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-        detection_result_face = self.face_detector.detect(mp_image)
-
-        if detection_result_face.detections:
-            detection = detection_result_face.detections[0]
-            bbox = detection.bounding_box
-            
-            # --- PENYESUAIAN KOTAK HIJAU UNTUK RPPG: KIRA-KIRA SEBESAR MUKA ---
-            # Menggunakan lebar penuh wajah dan bagian atas wajah untuk ROI dahi/rPPG
-            forehead_x = int(bbox.origin_x)
-            forehead_y = int(bbox.origin_y)
-            forehead_width = int(bbox.width)
-            forehead_height = int(bbox.height * 0.4)
-
-            forehead_x = max(0, forehead_x)
-            forehead_y = max(0, forehead_y)
-            forehead_width = min(forehead_width, w - forehead_x)
-            forehead_height = min(forehead_height, h - forehead_y)
-
-            if forehead_width > 0 and forehead_height > 0:
-                roi_forehead = frame[forehead_y : forehead_y + forehead_height,
-                                     forehead_x : forehead_x + forehead_width]
-                
-                if roi_forehead.size > 0:
-                    self.r_signal.append(np.mean(roi_forehead[:, :, 2])) 
-                    self.g_signal.append(np.mean(roi_forehead[:, :, 1]))
-                    self.b_signal.append(np.mean(roi_forehead[:, :, 0]))
-
-                    cv2.rectangle(frame, (forehead_x, forehead_y),
-                                  (forehead_x + forehead_width, forehead_y + forehead_height),
-                                  (0, 255, 0), 2) # Green rectangle for forehead
-
-        # --- Respiration Signal Extraction (Landmark-based) ---
-        detection_result_pose = self.pose_landmarker.detect(mp_image)
-
-        if detection_result_pose.pose_landmarks:
-            current_pose_landmarks = detection_result_pose.pose_landmarks[0]
-            
-            # Menggunakan indeks numerik standar untuk landmark bahu
-            # LEFT_SHOULDER: 11, RIGHT_SHOULDER: 12
-            left_shoulder = current_pose_landmarks[11]
-            right_shoulder = current_pose_landmarks[12]
-            
-            # Konversi koordinat normalized (0-1) ke piksel
-            shoulder_y_avg_px = int(((left_shoulder.y + right_shoulder.y) / 2) * h)
-            
-            # --- PENYESUAIAN SINYAL RESPIRASI: FOKUS PADA BAHU ---
-            self.resp_signal.append(shoulder_y_avg_px) # Sinyal pernapasan hanya dari posisi Y bahu
-            
-            # --- Gambar Kotak Merah (ROI Pernapasan) yang Mengikuti ---
-            # Lebar kotak berdasarkan jarak bahu
-            shoulder_x_min_px = int(min(left_shoulder.x, right_shoulder.x) * w)
-            shoulder_x_max_px = int(max(left_shoulder.x, right_shoulder.x) * w)
-            
-            box_height_resp = 20 # Tinggi kotak, dibuat lebih tipis untuk efek "garis"
-            
-            # Posisi Y kotak merah, berpusat pada rata-rata Y bahu
-            self.top_y_resp = int(shoulder_y_avg_px - (box_height_resp / 2))
-            self.bottom_y_resp = self.top_y_resp + box_height_resp
-
-            # Lebar kotak, sedikit dilebihkan dari lebar bahu
-            padding_x_resp = int((shoulder_x_max_px - shoulder_x_min_px) * 0.1) # 10% padding
-            self.left_x_resp = max(0, shoulder_x_min_px - padding_x_resp)
-            self.right_x_resp = min(w, shoulder_x_max_px + padding_x_resp)
-
-            # Pastikan koordinat tetap dalam batas frame
-            self.top_y_resp = max(0, self.top_y_resp)
-            self.left_x_resp = max(0, self.left_x_resp)
-            self.bottom_y_resp = min(h, self.bottom_y_resp)
-            self.right_x_resp = min(w, self.right_x_resp)
-            
-            # Gambar kotak merah
-            if all(v is not None for v in [self.left_x_resp, self.top_y_resp, self.right_x_resp, self.bottom_y_resp]):
-                 cv2.rectangle(frame, (self.left_x_resp, self.top_y_resp), (self.right_x_resp, self.bottom_y_resp), (0, 0, 255), 2) # Merah
-
-
-        # --- Signal Processing and Rate Calculation ---
-        # rPPG processing
-        if len(self.g_signal) >= self.fps * 10:
-            rgb_signals = np.array([self.r_signal, self.g_signal, self.b_signal])
-            rgb_signals_reshaped = rgb_signals.reshape(1, 3, -1) 
-            
-            rppg_signal_raw = cpu_POS(rgb_signals_reshaped, fps=self.fps)
-            rppg_signal = rppg_signal_raw.reshape(-1)
-
-            filtered_signal = bandpass_filter_signal(rppg_signal, 0.75, 3.0, self.fps, order=5)
-            if filtered_signal.size > 0:
-                normalized_signal = (filtered_signal - np.mean(filtered_signal)) / (np.std(filtered_signal) + 1e-6)
-                smoothed_signal = moving_average_filter(normalized_signal, window_size=int(self.fps/2))
-
-                if smoothed_signal.size > 0:
-                    peaks_hr, _ = find_peaks(smoothed_signal, distance=self.fps / 3.0)
-                    peak_intervals_hr = np.diff(peaks_hr) / self.fps
-                    heart_rate = 60.0 / np.mean(peak_intervals_hr) if len(peak_intervals_hr) > 0 else 0
-                else:
-                    heart_rate = 0.0
-
-                self.hr_label.setText(f'Heart Rate: {heart_rate:.2f} BPM (Beat Per Minute)')
-                self.plot_curve_hr.setData(smoothed_signal)
-            else:
-                self.hr_label.setText(f'Heart Rate: -- BPM (Beat Per Minute)')
-                self.plot_curve_hr.setData([])
-            
-            self.r_signal, self.g_signal, self.b_signal = [], [], []
-
-        # Respiration processing
-        if len(self.resp_signal) >= self.fps * 10:
-            resp_signal_raw = np.array(self.resp_signal)
-            
-            filtered_resp_signal = bandpass_filter_signal(resp_signal_raw, 0.1, 0.5, self.fps, order=5)
-            if filtered_resp_signal.size > 0:
-                normalized_resp_signal = (filtered_resp_signal - np.mean(filtered_resp_signal)) / (np.std(filtered_resp_signal) + 1e-6)
-                smoothed_resp_signal = moving_average_filter(normalized_resp_signal, window_size=int(self.fps/2))
-
-                if smoothed_resp_signal.size > 0:
-                    resp_peaks, _ = find_peaks(smoothed_resp_signal, distance=self.fps / 0.5)
-                    resp_intervals = np.diff(resp_peaks) / self.fps
-                    respiration_rate = 60.0 / np.mean(resp_intervals) if len(resp_intervals) > 0 else 0
-                else:
-                    respiration_rate = 0.0
-
-                self.resp_label.setText(f'Respiration Rate: {respiration_rate:.2f} BPM (Breath Per Minute)')
-                self.plot_curve_resp.setData(smoothed_resp_signal)
-            else:
-                self.resp_label.setText(f'Respiration Rate: -- BPM (Breath Per Minute)')
-                self.plot_curve_resp.setData([])
-
-            self.resp_signal = []
-
-        # Convert frame to RGB for displaying in video_label
-        frame_rgb_display = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image = QImage(frame_rgb_display.data, frame_rgb_display.shape[1], frame_rgb_display.shape[0], QImage.Format_RGB888)
-        self.video_label.setPixmap(QPixmap.fromImage(image.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)))
+        result = self.frame_processor.process(frame, int(timestamp * 1000))
+        if self.recorder is not None:
+            self.recorder.add(result)
+        with self.instrumentation.stage('signal'):
+            updated = self.estimator.add(result)
+        if updated and self.trend_archive is not None:
+            self.trend_archive.append_vitals(time.time(), self.estimator.vitals)
+        self.instrumentation.tick_frame()
+        self.latest_output = PipelineOutput(frame, result, self.estimator.vitals, timestamp)
+
+    def paint_latest(self):
+        """
+        Dipanggil oleh QTimer penggambaran (laju display_fps). Hanya menggambar hasil terbaru, dari
+        pipeline pada mode threaded atau dari update_frame, dan tidak menggambar ulang hasil yang sama.
+        Pada mode threaded thread GUI tidak pernah menunggu kamera maupun inferensi.
+        """
+        output = self.pipeline.latest() if self.pipeline is not None else self.latest_output
+        if output is not None and output is not self.output_shown:
+            self.output_shown = output
+            self.render(output.frame, output.result, output.vitals)
+            if self.first_frame_pending:
+                self.first_frame_pending = False
+                self.startup.mark('first_frame')
+                print(self.startup.report())
+        if self.pipeline is not None and self.pipeline.finished and not self.pipeline.result_queue:
+            self.display_timer.stop()
+
+    def render(self, frame, result, vitals):
+        """
+        Memperbarui tampilan GUI: kotak ROI, label HR/RR, plot sinyal, dan video feed.
+
+        Args:
+            frame (np.ndarray): Frame BGR yang akan ditampilkan.
+            result (FrameResult): Hasil ekstraksi sampel untuk frame tersebut.
+            vitals (VitalSigns): Estimasi HR/RR terbaru.
+        """
+        # Gambar di salinan RGB dari FrameProcessor agar tidak perlu konversi warna kedua
+        if result.frame_rgb is not None:
+            frame_rgb_display = result.frame_rgb
+        else:
+            frame_rgb_display = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        if result.region_boxes is not None:
+            # Mode multi-ROI: dahi dan kedua pipi
+            for x, y, width, height in result.region_boxes.tolist():
+                if width > 0 and height > 0:
+                    cv2.rectangle(frame_rgb_display, (x, y), (x + width, y + height), (0, 255, 0), 2)
+        elif result.forehead_box is not None:
+            forehead_x, forehead_y, forehead_width, forehead_height = result.forehead_box
+            cv2.rectangle(frame_rgb_display, (forehead_x, forehead_y),
+                          (forehead_x + forehead_width, forehead_y + forehead_height),
+                          (0, 255, 0), 2) # Green rectangle for forehead
+
+        if result.resp_box is not None:
+            # Gambar kotak merah (ROI pernapasan) yang mengikuti bahu
+            self.left_x_resp, self.top_y_resp, self.right_x_resp, self.bottom_y_resp = result.resp_box
+            cv2.rectangle(frame_rgb_display, (self.left_x_resp, self.top_y_resp), (self.right_x_resp, self.bottom_y_resp), (255, 0, 0), 2) # Merah (RGB)
+
+        # Mode multi-subjek: kotak dan HR/RR setiap orang lain ditulis langsung di video
+        subject_vitals = getattr(self.estimator, 'subject_vitals', {})
+        for subject in result.subjects[1:]:
+            if subject.forehead_box is not None:
+                x, y, width, height = subject.forehead_box
+                cv2.rectangle(frame_rgb_display, (x, y), (x + width, y + height), (0, 255, 0), 2)
+            if subject.resp_box is not None:
+                cv2.rectangle(frame_rgb_display, subject.resp_box[:2], subject.resp_box[2:], (255, 0, 0), 2)
+        for subject in result.subjects:
+            subject_text = f'#{subject.subject_id}'
+            subject_vital = subject_vitals.get(subject.subject_id)
+            if subject_vital is not None and subject_vital.heart_rate is not None:
+                subject_text += f' HR {subject_vital.heart_rate:.0f}'
+            if subject_vital is not None and subject_vital.respiration_rate is not None:
+                subject_text += f' RR {subject_vital.respiration_rate:.0f}'
+            x, y, _, _ = subject.face_box
+            cv2.putText(frame_rgb_display, subject_text, (x, max(15, y - 8)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+
+        # Label diperbarui jika teksnya berubah, plot hanya ketika ada sinyal baru
+        if vitals.heart_rate is not None:
+            hr_text = f'Heart Rate: {vitals.heart_rate:.2f} BPM (Beat Per Minute)' + snr_text(vitals.hr_snr_db)
+        else:
+            hr_text = 'Heart Rate: -- BPM (Beat Per Minute)'
+        if hr_text != self.hr_label.text():
+            self.hr_label.setText(hr_text)
+        if vitals.hr_version != self.hr_version_shown:
+            self.hr_version_shown = vitals.hr_version
+            self.plot_curve_hr.setData(vitals.hr_signal if vitals.heart_rate is not None else [])
+
+        if vitals.respiration_rate is not None:
+            resp_text = (f'Respiration Rate: {vitals.respiration_rate:.2f} BPM (Breath Per Minute)'
+                         + snr_text(vitals.resp_snr_db))
+        else:
+            resp_text = 'Respiration Rate: -- BPM (Breath Per Minute)'
+        if resp_text != self.resp_label.text():
+            self.resp_label.setText(resp_text)
+        if vitals.resp_version != self.resp_version_shown:
+            self.resp_version_shown = vitals.resp_version
+            self.plot_curve_resp.setData(vitals.resp_signal if vitals.respiration_rate is not None else [])
+
+        if self.metrics_overlay:
+            for i, line in enumerate(self.instrumentation.overlay_lines()):
+                cv2.putText(frame_rgb_display, line, (10, 20 + 18 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.45, (255, 255, 0), 1)
+        if self.scheduler is not None:
+            self.report_scheduler(frame_rgb_display)
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.maybe_export()
+        if self.trend_archive is not None:
+            self.update_trend_plot()
+
+        with self.instrumentation.stage('display'):
+            self._show_frame(frame_rgb_display)
+
+    def report_scheduler(self, frame_rgb_display, interval=5.0):
+        """
+        Menulis status scheduler adaptif di bagian bawah video (overlay metrik sudah memuatnya)
+        dan mencetaknya ke konsol setiap `interval` detik.
+        """
+        if not self.metrics_overlay:
+            cv2.putText(frame_rgb_display, self.scheduler.status_line(), (10, frame_rgb_display.shape[0] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
+        now = time.monotonic()
+        if now - self.scheduler_reported >= interval:
+            self.scheduler_reported = now
+            print(self.scheduler.status_line())
+
+    def update_trend_plot(self, interval=5.0):
+        """
+        Menggambar ulang plot tren dari arsip setiap `interval` detik. Arsip memilih level ringkasan
+        yang cukup kasar, sehingga jumlah titik yang dibaca tetap kecil berapa pun panjang sesinya.
+        """
+        now = time.monotonic()
+        if now - self.trend_refreshed < interval:
+            return
+        self.trend_refreshed = now
+        max_points = max(100, self.plot_widget_trend.width())
+        for field, curve in (('heart_rate', self.plot_curve_trend_hr),
+                             ('respiration_rate', self.plot_curve_trend_resp)):
+            times, mean, _, _, _ = self.trend_archive.read(field, max_points=max_points)
+            if len(times):
+                curve.setData((times - times[0]) / 60.0, mean, connect='finite')
+
+    def _show_frame(self, frame_rgb_display):
+        """
+        Menskalakan frame RGB ke ukuran video_label dan menampilkannya. Skala dilakukan dengan
+        cv2.resize langsung ke buffer prealokasi yang dibungkus QImage tetap; buffer hanya dibuat
+        ulang jika ukuran label berubah.
+        """
+        height, width = frame_rgb_display.shape[:2]
+        label_size = self.video_label.size()
+        scale = min(label_size.width() / width, label_size.height() / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        if self.display_buffer is None or self.display_buffer.shape[1::-1] != size:
+            self.display_buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self.display_image = QImage(self.display_buffer.data, size[0], size[1], size[0] * 3,
+                                        QImage.Format_RGB888)
+        interpolation = cv2.INTER_AREA if scale < 0.5 else cv2.INTER_LINEAR
+        cv2.resize(frame_rgb_display, size, dst=self.display_buffer, interpolation=interpolation)
+        self.video_label.setPixmap(QPixmap.fromImage(self.display_image))
 
     def closeEvent(self, event):
         """
@@ -340,17 +517,130 @@ class HeartRateMonitor(QWidget):
         Args:
             event (QCloseEvent): Objek event penutupan jendela.
         """
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        self.frame_processor.close()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.trend_archive is not None:
+            self.trend_archive.close()
         self.cap.release()
         cv2.destroyAllWindows()
         print("Application closed, camera released.")
         event.accept()
 
+def snr_text(snr_db):
+    """
+    Teks SNR untuk label hasil, kosong jika metode estimasi tidak menghasilkan SNR.
+    """
+    return f' | SNR {snr_db:.1f} dB' if snr_db is not None else ''
+
 if __name__ == '__main__':
+    startup = StartupProfile(PROCESS_START)
+    startup.mark('imports')
     import os
     if not os.path.exists("models"):
         os.makedirs("models")
 
-    app = QApplication(sys.argv)
-    ex = HeartRateMonitor()
+    parser = argparse.ArgumentParser(description="Real-Time Heart Rate and Respiration Monitor")
+    parser.add_argument('--threaded', action='store_true',
+                        help="Run capture, detection and signal processing in separate threads.")
+    parser.add_argument('--queue-size', type=int, default=2, help="Capacity of each queue between stages.")
+    parser.add_argument('--capture-policy', choices=QUEUE_POLICIES, default=DROP_OLDEST,
+                        help="What to do when the detection stage falls behind the camera.")
+    parser.add_argument('--detection-policy', choices=QUEUE_POLICIES, default=BLOCK,
+                        help="What to do when the signal stage falls behind the detection stage.")
+    parser.add_argument('--window', type=float, default=10.0, help="HR/RR analysis window in seconds.")
+    parser.add_argument('--hop', type=float, default=0.5, help="Seconds between two HR/RR updates.")
+    parser.add_argument('--filter-mode', choices=FILTER_MODES, default=FILTER_BLOCK,
+                        help="Zero-phase block filtering per window, or stateful streaming filtering.")
+    parser.add_argument('--rate-method', choices=ESTIMATOR_RATE_METHODS, default='peaks',
+                        help="Peak intervals, dominant spectral frequency (fft / welch) with SNR, "
+                             "or a per-frame sliding-DFT tracker (sdft).")
+    parser.add_argument('--face-detect-interval', type=int, default=1,
+                        help="Run the face detector every N frames and track the face in between.")
+    parser.add_argument('--pose-detect-interval', type=int, default=1,
+                        help="Run the pose landmarker every N frames and track the shoulders with optical flow in between.")
+    parser.add_argument('--pose-crop', action='store_true',
+                        help="Run the pose landmarker on an upper-body crop derived from the face box, "
+                             "with a full-frame pass when the crop misses the shoulders.")
+    parser.add_argument('--multi-roi', action='store_true',
+                        help="Sample the forehead and both cheeks and fuse their pulse signals by SNR.")
+    parser.add_argument('--pose-mode', choices=tuple(POSE_MODES), default=POSE_MODE_VIDEO,
+                        help="Pose landmarker running mode: per-frame detect (image), timestamped "
+                             "tracking (video) or asynchronous results via callback (live_stream).")
+    parser.add_argument('--inference-scale', type=float, default=1.0,
+                        help="Downscale factor (0-1] of the frame copy fed to the detectors, e.g. 0.5 at 1080p.")
+    parser.add_argument('--frame-budget-ms', type=float, default=None,
+                        help="Per-frame processing budget; an adaptive scheduler then decides per frame which "
+                             "detectors run and lowers the inference scale (from --inference-scale) when needed.")
+    parser.add_argument('--max-subjects', type=int, default=1,
+                        help="Number of people to monitor at once, each with a stable ID and own signals "
+                             "(block filtering and the peaks / fft / welch rate methods only).")
+    parser.add_argument('--parallel-inference', action='store_true',
+                        help="Run the face detector and the pose landmarker concurrently on each frame.")
+    parser.add_argument('--metrics', action='store_true', help="Collect per-stage latency statistics.")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve the statistics in Prometheus format at http://127.0.0.1:PORT/metrics.")
+    parser.add_argument('--metrics-jsonl', default=None,
+                        help="Append a JSON snapshot of the statistics to this file every 5 seconds.")
+    parser.add_argument('--metrics-overlay', action='store_true',
+                        help="Draw FPS and per-stage p50/p95/p99 latencies on the video.")
+    parser.add_argument('--record', default=None,
+                        help="Record the per-frame results to a session file for offline replay.")
+    parser.add_argument('--archive', default=None,
+                        help="Directory of the on-disk HR/RR trend archive for long sessions (reopened and extended).")
+    parser.add_argument('--display-fps', type=float, default=30.0,
+                        help="Rate at which the video, labels and plots are redrawn, independent of processing.")
+    parser.add_argument('--offline', action='store_true',
+                        help="Never download models; fail immediately if a cached model is missing or corrupted.")
+    parser.add_argument('--model-base-url', default=None,
+                        help="Mirror to download the model files from instead of the MediaPipe storage.")
+    args, qt_args = parser.parse_known_args()
+    if args.max_subjects > 1:
+        try:
+            check_multi_subject_options(args.filter_mode, args.rate_method)
+        except ValueError as e:
+            parser.error(f"--max-subjects {args.max_subjects}: {e}")
+    if not args.display_fps > 0:
+        parser.error(f"--display-fps must be positive, got {args.display_fps}.")
+
+    # Lewat environment agar juga berlaku di thread startup yang mengunduh model
+    if args.offline:
+        os.environ[OFFLINE_ENV] = '1'
+    if args.model_base_url:
+        os.environ[BASE_URL_ENV] = args.model_base_url
+
+    with startup.step('qt_app'):
+        app = QApplication(sys.argv[:1] + qt_args)
+    ex = HeartRateMonitor(threaded=args.threaded,
+                          queue_size=args.queue_size,
+                          capture_policy=args.capture_policy,
+                          detection_policy=args.detection_policy,
+                          window_seconds=args.window,
+                          hop_seconds=args.hop,
+                          filter_mode=args.filter_mode,
+                          rate_method=args.rate_method,
+                          face_detect_interval=args.face_detect_interval,
+                          pose_mode=args.pose_mode,
+                          inference_scale=args.inference_scale,
+                          max_subjects=args.max_subjects,
+                          parallel_inference=args.parallel_inference,
+                          metrics=args.metrics,
+                          metrics_port=args.metrics_port,
+                          metrics_jsonl=args.metrics_jsonl,
+                          metrics_overlay=args.metrics_overlay,
+                          record_path=args.record,
+                          archive_dir=args.archive,
+                          display_fps=args.display_fps,
+                          startup=startup,
+                          pose_detect_interval=args.pose_detect_interval,
+                          frame_budget_ms=args.frame_budget_ms,
+                          pose_crop=args.pose_crop,
+                          multi_roi=args.multi_roi)
     ex.show()
     sys.exit(app.exec_())
\ No newline at end of file
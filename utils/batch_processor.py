@@ -0,0 +1,247 @@
+# utils/batch_processor.py
+
+import argparse
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import cv2
+
+from utils.detectors import (POSE_MODE_IMAGE, POSE_MODE_VIDEO, create_face_detector, create_pose_landmarker,
+                             select_delegate)
+from utils.download_model import prefetch_models
+from utils.frame_processor import FrameProcessor
+from utils.heart_rate import RATE_METHODS, estimate_heart_rate, estimate_respiration_rate, resample_uniform
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+RESULT_FIELDS = ['file', 'window', 'start_s', 'end_s', 'heart_rate_bpm', 'respiration_rate_bpm',
+                 'heart_rate_snr_db', 'respiration_rate_snr_db']
+
+# Satu pasang detektor MediaPipe per proses worker, dibuat oleh _init_worker
+_worker_processor = None
+_worker_config = None
+
+
+def find_videos(inputs):
+    """
+    Expands a list of video files and/or directories into a sorted list of video files.
+
+    Args:
+        inputs (list[str]): Video file paths or directories containing videos.
+
+    Returns:
+        list[str]: Paths of all video files found.
+    """
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"Warning: '{path}' does not exist. Skipping.")
+    return videos
+
+
+BATCH_POSE_MODES = (POSE_MODE_IMAGE, POSE_MODE_VIDEO)
+
+
+def _init_worker(delegate, face_detect_interval=1, pose_mode=POSE_MODE_VIDEO, inference_scale=1.0):
+    """
+    Process pool initializer. Creates the detector pair once per worker process.
+    """
+    global _worker_processor, _worker_config
+    _worker_config = (delegate, pose_mode)
+    _worker_processor = FrameProcessor(create_face_detector(delegate),
+                                       create_pose_landmarker(delegate, running_mode=pose_mode),
+                                       face_detect_interval=face_detect_interval, pose_mode=pose_mode,
+                                       inference_scale=inference_scale)
+
+
+def process_video(path, window_seconds=10.0, min_coverage=0.8, processor=None, rate_method='peaks'):
+    """
+    Extracts per-window heart rate and respiration rate from a recorded video.
+
+    Args:
+        path (str): Path to the video file.
+        window_seconds (float): Length of each analysis window in seconds.
+        min_coverage (float): Minimum fraction of frames in a window that must contain
+            a face (or pose) before a rate is computed for it.
+        processor (FrameProcessor, optional): Processor to use. Defaults to the worker's processor.
+            Its per-stream state is reset first, so nothing carries over from the previous video.
+        rate_method (str): 'peaks', 'fft' or 'welch', see `estimate_heart_rate`.
+
+    Returns:
+        list[dict]: One row per window with the fields in `RESULT_FIELDS`.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"Error: Could not open video '{path}'. Skipping.")
+        return []
+
+    # Tracker, hint ROI dan state tracking landmarker mode VIDEO tidak boleh terbawa dari video sebelumnya
+    if processor is not None:
+        processor.reset()
+    else:
+        processor = _worker_processor
+        delegate, pose_mode = _worker_config
+        used = processor.last_timestamp_ms >= 0
+        processor.reset(create_pose_landmarker(delegate, running_mode=pose_mode)
+                        if used and pose_mode == POSE_MODE_VIDEO else None)
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps == 0:
+        print(f"Warning: FPS of '{path}' is 0, setting to default 30.")
+        fps = 30
+    window_frames = max(1, int(round(fps * window_seconds)))
+
+    # Timestamp video harus terus naik untuk landmarker yang dipakai ulang antar video,
+    # jadi setiap video dimulai sedikit setelah timestamp terakhir prosesor
+    base_ms = processor.last_timestamp_ms + 1000
+    rows = []
+    rgb_samples, resp_samples = [], []
+    frame_index = 0
+    frame_ms = -1.0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        # Timestamp presentasi dari container (video VFR, frame hilang); tanpa itu dari indeks frame
+        position_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+        fallback_ms = frame_index * 1000 / fps
+        # Selalu naik: np.interp pada resampling diam-diam salah untuk waktu yang mundur
+        frame_ms = max(position_ms if position_ms > frame_ms else fallback_ms, frame_ms + 1)
+        result = processor.process(frame, base_ms + int(frame_ms))
+        if result.rgb is not None:
+            rgb_samples.append((frame_ms / 1000, result.rgb))
+        resp_samples.extend(((timestamp_ms - base_ms) / 1000, value) for timestamp_ms, value in result.resp_samples)
+        frame_index += 1
+
+        if frame_index % window_frames == 0:
+            rows.append(_window_row(path, len(rows), frame_index, window_frames, fps,
+                                    rgb_samples, resp_samples, min_coverage, rate_method))
+            rgb_samples, resp_samples = [], []
+    cap.release()
+    return rows
+
+
+def _window_row(path, window, end_frame, window_frames, fps, rgb_samples, resp_samples, min_coverage, rate_method):
+    """
+    Computes the result row of one analysis window from its (timestamp_s, value) samples,
+    resampled onto a uniform `fps` grid.
+    """
+    min_samples = window_frames * min_coverage
+    heart_rate = respiration_rate = hr_snr_db = resp_snr_db = None
+    if len(rgb_samples) >= min_samples:
+        times, rgb = zip(*rgb_samples)
+        rgb = resample_uniform(times, np.array(rgb).T, fps)
+        heart_rate, _, hr_snr_db = estimate_heart_rate(rgb, fps, method=rate_method)
+    if len(resp_samples) >= min_samples:
+        times, resp = zip(*resp_samples)
+        resp = resample_uniform(times, resp, fps)
+        respiration_rate, _, resp_snr_db = estimate_respiration_rate(resp, fps, method=rate_method)
+    return {
+        'file': path,
+        'window': window,
+        'start_s': (end_frame - window_frames) / fps,
+        'end_s': end_frame / fps,
+        'heart_rate_bpm': heart_rate,
+        'respiration_rate_bpm': respiration_rate,
+        'heart_rate_snr_db': hr_snr_db,
+        'respiration_rate_snr_db': resp_snr_db,
+    }
+
+
+def write_results(rows, output_path):
+    """
+    Writes result rows to CSV, or to Parquet if the output path ends with `.parquet`.
+
+    Args:
+        rows (list[dict]): Result rows with the fields in `RESULT_FIELDS`.
+        output_path (str): Destination file.
+    """
+    if output_path.endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError as e:
+            raise ImportError("Writing Parquet requires pandas and pyarrow (pip install pandas pyarrow).") from e
+        pd.DataFrame(rows, columns=RESULT_FIELDS).to_parquet(output_path, index=False)
+        return
+
+    with open(output_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_batch(inputs, output_path, workers=None, window_seconds=10.0, rate_method='peaks', face_detect_interval=1,
+              pose_mode=POSE_MODE_VIDEO, inference_scale=1.0):
+    """
+    Processes many recorded videos in parallel over a process pool and writes the results.
+
+    Args:
+        inputs (list[str]): Video files and/or directories.
+        output_path (str): CSV or Parquet file for the results.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        window_seconds (float): Length of each analysis window in seconds.
+        rate_method (str): 'peaks', 'fft' or 'welch', see `estimate_heart_rate`.
+        face_detect_interval (int): Run the face detector every N frames and track in between.
+        pose_mode (str): Pose landmarker running mode, `POSE_MODE_IMAGE` or `POSE_MODE_VIDEO`.
+        inference_scale (float): Downscale factor of the frame copy fed to the detectors.
+
+    Returns:
+        list[dict]: All result rows, ordered by file and window.
+    """
+    videos = find_videos(inputs)
+    if not videos:
+        print("No videos found.")
+        return []
+
+    # Unduh model dan cek GPU sekali di proses utama, bukan di setiap worker
+    prefetch_models()
+    delegate = select_delegate()
+
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(delegate, face_detect_interval, pose_mode, inference_scale)) as executor:
+        futures = {executor.submit(process_video, path, window_seconds, rate_method=rate_method): path for path in videos}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                video_rows = future.result()
+            except Exception as e:
+                print(f"Error processing '{path}': {e}")
+                continue
+            print(f"Processed '{path}': {len(video_rows)} windows.")
+            rows.extend(video_rows)
+
+    rows.sort(key=lambda row: (row['file'], row['window']))
+    write_results(rows, output_path)
+    print(f"Results written to '{output_path}'.")
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline HR/RR extraction for recorded videos.")
+    parser.add_argument('inputs', nargs='+', help="Video files or directories containing videos.")
+    parser.add_argument('-o', '--output', default='results.csv', help="Output .csv or .parquet file.")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of worker processes.")
+    parser.add_argument('--window', type=float, default=10.0, help="Analysis window length in seconds.")
+    parser.add_argument('--rate-method', choices=RATE_METHODS, default='peaks',
+                        help="Peak intervals or dominant spectral frequency (fft / welch).")
+    parser.add_argument('--face-detect-interval', type=int, default=1,
+                        help="Run the face detector every N frames and track the face in between.")
+    parser.add_argument('--pose-mode', choices=BATCH_POSE_MODES, default=POSE_MODE_VIDEO,
+                        help="Per-frame pose detection (image) or timestamped pose tracking (video).")
+    parser.add_argument('--inference-scale', type=float, default=1.0,
+                        help="Downscale factor (0-1] of the frame copy fed to the detectors.")
+    args = parser.parse_args()
+
+    run_batch(args.inputs, args.output, workers=args.workers, window_seconds=args.window,
+              rate_method=args.rate_method, face_detect_interval=args.face_detect_interval, pose_mode=args.pose_mode,
+              inference_scale=args.inference_scale)
@@ -1,10 +1,13 @@
 # utils/check_gpu.py
 import subprocess
 import os
+from functools import lru_cache
 
+@lru_cache(maxsize=None)
 def check_gpu():
     """
     Checks for the presence of an NVIDIA GPU using nvidia-smi.
+    The result is cached, so nvidia-smi is spawned at most once per process.
 
     Returns:
         str: "NVIDIA" if an NVIDIA GPU is detected, otherwise "CPU".
@@ -12,12 +15,12 @@ def check_gpu():
     try:
         # Try to run nvidia-smi command
         # Capture stdout and stderr
-        result = subprocess.run(['nvidia-smi'], capture_output=True, text=True, check=True)
+        result = subprocess.run(['nvidia-smi'], capture_output=True, text=True, check=True, timeout=5)
         # If the command runs without error, it means nvidia-smi is available and thus an NVIDIA GPU is likely present
         if "NVIDIA-SMI" in result.stdout:
             print("NVIDIA GPU detected.")
             return "NVIDIA"
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
         # If nvidia-smi command fails or is not found, assume no NVIDIA GPU
         print("No NVIDIA GPU detected or nvidia-smi not found. Using CPU.")
     return "CPU"
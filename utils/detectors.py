@@ -0,0 +1,117 @@
+# utils/detectors.py
+
+import sys
+
+from utils.download_model import download_model_face_detection, download_model_pose_detection
+from utils.check_gpu import check_gpu
+
+POSE_MODE_IMAGE = 'image'
+POSE_MODE_VIDEO = 'video'
+POSE_MODE_LIVE_STREAM = 'live_stream'
+# Nama anggota vision.RunningMode; enum-nya baru diambil saat landmarker dibuat
+POSE_MODES = {
+    POSE_MODE_IMAGE: 'IMAGE',
+    POSE_MODE_VIDEO: 'VIDEO',
+    POSE_MODE_LIVE_STREAM: 'LIVE_STREAM',
+}
+
+
+def _tasks():
+    """
+    Imports the MediaPipe Tasks API on first use. Importing mediapipe takes about half a second,
+    so modules that only need the constants above (or never create a detector) stay fast to import.
+
+    Returns:
+        tuple: The `mediapipe.tasks.python` and `mediapipe.tasks.python.vision` modules.
+    """
+    from mediapipe.tasks import python
+    from mediapipe.tasks.python import vision
+    return python, vision
+
+
+def select_delegate():
+    """
+    Chooses the MediaPipe delegate for the current machine.
+
+    GPU delegates are not supported by MediaPipe on Windows, so the CPU delegate
+    is always used there. Elsewhere the GPU delegate is used when an NVIDIA GPU is found
+    (`check_gpu` is cached, so only the first call probes the hardware).
+
+    Returns:
+        mediapipe.tasks.BaseOptions.Delegate: The delegate to use for inference.
+    """
+    python, _ = _tasks()
+    if sys.platform == 'win32':
+        return python.BaseOptions.Delegate.CPU
+    gpu_checked = check_gpu()
+    return python.BaseOptions.Delegate.GPU if gpu_checked == "NVIDIA" else python.BaseOptions.Delegate.CPU
+
+
+def create_face_detector(delegate=None):
+    """
+    Creates a MediaPipe Face Detector for the rPPG forehead ROI.
+    The model is downloaded if it does not exist yet.
+
+    Args:
+        delegate (mediapipe.tasks.BaseOptions.Delegate, optional): Delegate to use.
+            Probed with `select_delegate` when not given.
+
+    Returns:
+        mediapipe.tasks.vision.FaceDetector: The initialized FaceDetector.
+    """
+    python, vision = _tasks()
+    model_path = download_model_face_detection()
+    if delegate is None:
+        delegate = select_delegate()
+
+    options = vision.FaceDetectorOptions(
+        base_options=python.BaseOptions(
+            model_asset_path=model_path,
+            delegate=delegate
+        )
+    )
+    return vision.FaceDetector.create_from_options(options)
+
+
+def create_pose_landmarker(delegate=None, running_mode=POSE_MODE_IMAGE, result_callback=None, num_poses=1):
+    """
+    Creates a MediaPipe Pose Landmarker for the shoulder-based respiration signal.
+    The model is downloaded if it does not exist yet.
+
+    Args:
+        delegate (mediapipe.tasks.BaseOptions.Delegate, optional): Delegate to use.
+            Probed with `select_delegate` when not given.
+        running_mode (str): `POSE_MODE_IMAGE` (blocking `detect`), `POSE_MODE_VIDEO`
+            (`detect_for_video` with timestamps, keeps temporal tracking) or
+            `POSE_MODE_LIVE_STREAM` (`detect_async`, results go to `result_callback`).
+        result_callback (callable, optional): Required for `POSE_MODE_LIVE_STREAM`.
+            Called as `result_callback(result, output_image, timestamp_ms)`.
+        num_poses (int): Maximum number of people to landmark per frame.
+
+    Returns:
+        mediapipe.tasks.vision.PoseLandmarker: The initialized PoseLandmarker.
+    """
+    if running_mode not in POSE_MODES:
+        raise ValueError(f"Unknown pose running mode '{running_mode}'. Expected one of {tuple(POSE_MODES)}.")
+    if running_mode == POSE_MODE_LIVE_STREAM and result_callback is None:
+        raise ValueError("The live stream running mode requires a result_callback.")
+
+    python, vision = _tasks()
+    model_path = download_model_pose_detection()
+    if delegate is None:
+        delegate = select_delegate()
+
+    options = vision.PoseLandmarkerOptions(
+        base_options=python.BaseOptions(
+            model_asset_path=model_path,
+            delegate=delegate
+        ),
+        running_mode=vision.RunningMode[POSE_MODES[running_mode]],
+        num_poses=num_poses,
+        min_pose_detection_confidence=0.5,
+        min_pose_presence_confidence=0.5,
+        min_tracking_confidence=0.5,
+        output_segmentation_masks=False,
+        result_callback=result_callback
+    )
+    return vision.PoseLandmarker.create_from_options(options)
@@ -1,6 +1,12 @@
 # utils/download_model.py
 
+import argparse
+import hashlib
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from tqdm import tqdm
 
@@ -9,79 +15,277 @@ FACE_DETECTOR_MODEL_URL = "https://storage.googleapis.com/mediapipe-models/face_
 # PERBAIKAN DI SINI: URL POSE LANDMARKER DIUBAH
 POSE_LANDMARKER_MODEL_URL = "https://storage.googleapis.com/mediapipe-assets/pose_landmarker.task"
 
+# Model yang dipakai aplikasi, dengan ukuran (byte) dan SHA-256 yang diharapkan jika sudah diketahui.
+# Tanpa nilai yang dipatok, checksum unduhan pertama dicatat di manifest dan dipakai seterusnya.
+MODEL_ASSETS = {
+    'face_detector': {
+        'url': FACE_DETECTOR_MODEL_URL,
+        'size': 229746,
+        'sha256': 'b4578f35940bf5a1a655214a1cce5cab13eba73c1297cd78e1a04c2380b0152f',
+    },
+    'pose_landmarker': {
+        'url': POSE_LANDMARKER_MODEL_URL,
+        'size': None,
+        'sha256': None,
+    },
+}
+MANIFEST_NAME = 'manifest.json'
+CHUNK_SIZE = 1 << 20  # 1 MiB
+# Konfigurasi lewat environment agar ikut berlaku di proses worker (mis. utils/batch_processor.py)
+OFFLINE_ENV = 'RPPG_MODELS_OFFLINE'
+BASE_URL_ENV = 'RPPG_MODEL_BASE_URL'
+
+# Dibagi semua instance ModelCache di proses ini: satu unduhan per model, satu penulis manifest
+_FETCH_LOCKS = {name: threading.Lock() for name in MODEL_ASSETS}
+_MANIFEST_LOCK = threading.Lock()
+
+
+def _sha256(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    Local cache of the model files, checked against a manifest of sizes and SHA-256 checksums.
+
+    A cached file is only used when it matches its expected size and checksum (pinned in
+    `MODEL_ASSETS`, or recorded in `manifest.json` on the first verified download). The full
+    checksum is only recomputed when the file's size or modification time changed since the last
+    verification. Downloads stream in large chunks to `<name>.part`, resume an interrupted
+    `.part` with an HTTP Range request, and are renamed into place only after verification,
+    so a truncated or corrupted file is never picked up by MediaPipe.
+    """
+    def __init__(self, directory=MODELS_DIR, base_url=None, offline=None, chunk_size=CHUNK_SIZE, timeout=30.0):
+        """
+        Args:
+            directory (str): Cache directory.
+            base_url (str, optional): Mirror to download from instead of the original URLs; the file
+                name is appended to it. Defaults to the `RPPG_MODEL_BASE_URL` environment variable.
+            offline (bool, optional): Never touch the network and fail immediately if a model is
+                missing or invalid. Defaults to `RPPG_MODELS_OFFLINE=1` in the environment.
+            chunk_size (int): Bytes per read from the network and from disk while hashing.
+            timeout (float): Connect / read timeout of the HTTP requests in seconds.
+        """
+        self.directory = directory
+        self.base_url = base_url if base_url is not None else os.environ.get(BASE_URL_ENV) or None
+        self.offline = offline if offline is not None else os.environ.get(OFFLINE_ENV) == '1'
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._manifest_path = os.path.join(directory, MANIFEST_NAME)
+
+    def url(self, name):
+        """
+        Returns:
+            str: Download URL of model `name`, on the mirror if `base_url` is set.
+        """
+        url = MODEL_ASSETS[name]['url']
+        if self.base_url:
+            return self.base_url.rstrip('/') + '/' + url.split('/')[-1]
+        return url
+
+    def path(self, name):
+        """
+        Returns:
+            str: Local path of model `name` (whether or not it exists).
+        """
+        if name not in MODEL_ASSETS:
+            raise ValueError(f"Unknown model '{name}'. Expected one of {tuple(MODEL_ASSETS)}.")
+        return os.path.join(self.directory, MODEL_ASSETS[name]['url'].split('/')[-1])
+
+    def verify(self, name):
+        """
+        Checks a cached model against the pinned values and the manifest.
+
+        A model without a pinned checksum is only trusted once a verified download recorded it
+        in the manifest; a file of unknown origin (e.g. a partial file of an older downloader)
+        fails, so it is downloaded again online and refused offline.
+
+        Returns:
+            bool: True if the file exists and matches its expected size and checksum.
+        """
+        path = self.path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        expected = self._expected(name)
+        if expected['sha256'] is None:
+            return False
+        if expected['size'] is not None and stat.st_size != expected['size']:
+            return False
+
+        entry = self._read_manifest().get(name)
+        if (entry is not None and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+                and entry.get('sha256') == expected['sha256']):
+            return True
+        # File berubah (atau belum pernah diverifikasi): hitung ulang checksum penuh
+        sha256 = _sha256(path, self.chunk_size)
+        if sha256 != expected['sha256']:
+            return False
+        self._record(name, stat.st_size, stat.st_mtime_ns, sha256)
+        return True
+
+    def fetch(self, name):
+        """
+        Returns the path of a verified model, downloading it if needed.
+
+        Raises:
+            FileNotFoundError: In offline mode, if the model is missing or fails verification.
+            IOError: If the download does not match the expected size or checksum.
+        """
+        path = self.path(name)
+        with _FETCH_LOCKS[name]:
+            if self.verify(name):
+                return path
+            if self.offline:
+                raise FileNotFoundError(f"Model '{name}' is missing or corrupted at '{path}' and offline mode is on. "
+                                        f"Run `python -m utils.download_model` with network access first.")
+            if os.path.exists(path):
+                print(f"Model '{path}' does not match the manifest. Downloading it again.")
+            self._download(name)
+        return path
+
+    def prefetch(self, names=None, max_workers=4):
+        """
+        Fetches several models concurrently.
+
+        Args:
+            names (iterable[str], optional): Models to fetch. Defaults to all of `MODEL_ASSETS`.
+            max_workers (int): Maximum number of parallel downloads.
+
+        Returns:
+            dict: Model name -> local path.
+        """
+        names = list(MODEL_ASSETS) if names is None else list(names)
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names))),
+                                thread_name_prefix='model-fetch') as executor:
+            futures = {name: executor.submit(self.fetch, name) for name in names}
+            return {name: future.result() for name, future in futures.items()}
+
+    def _expected(self, name):
+        asset = MODEL_ASSETS[name]
+        if asset['sha256'] is not None:
+            return {'size': asset['size'], 'sha256': asset['sha256']}
+        # Tidak dipatok: pakai nilai yang tercatat saat unduhan pertama
+        entry = self._read_manifest().get(name, {})
+        return {'size': entry.get('size'), 'sha256': entry.get('sha256')}
+
+    def _download(self, name):
+        path = self.path(name)
+        part_path = path + '.part'
+        url = self.url(name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        print(f"Downloading {os.path.basename(path)} from {url}" + (f" (resuming at {offset} bytes)..." if offset else "..."))
+        with requests.get(url, stream=True, headers=headers, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # .part sudah lengkap (atau lebih panjang dari file di server); mulai ulang saja
+                offset = 0
+                os.remove(part_path)
+                return self._download(name)
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                offset = 0  # Server mengabaikan Range: unduh ulang dari awal
+            total = int(response.headers.get('content-length', 0)) + offset
+            with open(part_path, 'ab' if offset else 'wb') as file, \
+                    tqdm(total=total or None, initial=offset, unit='iB', unit_scale=True) as progress_bar:
+                for chunk in response.iter_content(self.chunk_size):
+                    file.write(chunk)
+                    progress_bar.update(len(chunk))
+
+        size = os.path.getsize(part_path)
+        expected = self._expected(name)
+        if (total and size != total) or (expected['size'] is not None and size != expected['size']):
+            # Dibiarkan sebagai .part agar pemanggilan berikutnya dapat melanjutkan
+            raise IOError(f"Download of '{name}' incomplete: {size} of {expected['size'] or total} bytes.")
+        sha256 = _sha256(part_path, self.chunk_size)
+        if expected['sha256'] is not None and sha256 != expected['sha256']:
+            os.remove(part_path)
+            raise IOError(f"Checksum mismatch for '{name}': expected {expected['sha256']}, got {sha256}.")
+
+        os.replace(part_path, path)
+        stat = os.stat(path)
+        self._record(name, stat.st_size, stat.st_mtime_ns, sha256)
+        print(f"Successfully downloaded '{name}' to '{path}'.")
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path) as file:
+                return json.load(file).get('models', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _record(self, name, size, mtime_ns, sha256):
+        with _MANIFEST_LOCK:
+            models = self._read_manifest()
+            models[name] = {'url': MODEL_ASSETS[name]['url'], 'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f'{self._manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w') as file:
+                json.dump({'models': models}, file, indent=2)
+            os.replace(temp_path, self._manifest_path)
+
+
 def download_file(url, dest_folder):
     """
-    Downloads a file from a given URL to a specified destination folder.
+    Downloads a known model to a specified destination folder through a `ModelCache`.
 
     Args:
-        url (str): The URL of the file to download.
+        url (str): The URL of one of the models in `MODEL_ASSETS`.
         dest_folder (str): The path to the destination folder.
 
     Returns:
-        str: The full path to the downloaded file.
+        str: The full path to the verified file.
     """
-    if not os.path.exists(dest_folder):
-        os.makedirs(dest_folder)
-
-    file_name = url.split('/')[-1]
-    file_path = os.path.join(dest_folder, file_name)
-
-    if os.path.exists(file_path):
-        print(f"Model '{file_name}' already exists at '{file_path}'. Skipping download.")
-        return file_path
-
-    print(f"Downloading {file_name} from {url}...")
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status() # Raise an exception for HTTP errors
-
-        total_size_in_bytes = int(response.headers.get('content-length', 0))
-        block_size = 1024 # 1 Kibibyte
-        progress_bar = tqdm(total=total_size_in_bytes, unit='iB', unit_scale=True)
-
-        with open(file_path, 'wb') as file:
-            for data in response.iter_content(block_size):
-                progress_bar.update(len(data))
-                file.write(data)
-        progress_bar.close()
-
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            print("ERROR, something went wrong during download.")
-            raise IOError("Download incomplete.")
-
-        print(f"Successfully downloaded '{file_name}' to '{file_path}'.")
-        return file_path
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading {file_name}: {e}")
-        # Clean up partially downloaded file if an error occurs
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise
+    for name, asset in MODEL_ASSETS.items():
+        if asset['url'] == url:
+            return ModelCache(dest_folder).fetch(name)
+    raise ValueError(f"Unknown model URL '{url}'. Expected one of the MODEL_ASSETS URLs.")
 
 def download_model_face_detection():
     """
-    Downloads the MediaPipe Face Detector model if it doesn't already exist.
+    Downloads the MediaPipe Face Detector model if it isn't cached and verified yet.
 
     Returns:
         str: The path to the downloaded (or existing) face detector model.
     """
-    return download_file(FACE_DETECTOR_MODEL_URL, MODELS_DIR)
+    return ModelCache().fetch('face_detector')
 
 def download_model_pose_detection():
     """
-    Downloads the MediaPipe Pose Landmarker model if it doesn't already exist.
+    Downloads the MediaPipe Pose Landmarker model if it isn't cached and verified yet.
 
     Returns:
         str: The path to the downloaded (or existing) pose landmarker model.
     """
-    return download_file(POSE_LANDMARKER_MODEL_URL, MODELS_DIR)
+    return ModelCache().fetch('pose_landmarker')
+
+def prefetch_models():
+    """
+    Fetches all models concurrently.
+
+    Returns:
+        dict: Model name -> local path.
+    """
+    return ModelCache().prefetch()
 
 if __name__ == '__main__':
-    # Example usage:
+    parser = argparse.ArgumentParser(description="Download and verify the MediaPipe models.")
+    parser.add_argument('--dir', default=MODELS_DIR, help="Model cache directory.")
+    parser.add_argument('--base-url', default=None, help="Mirror to download the model files from.")
+    parser.add_argument('--offline', action='store_true', help="Only verify the cache, never download.")
+    args = parser.parse_args()
+
+    cache = ModelCache(args.dir, base_url=args.base_url, offline=args.offline or None)
     try:
-        face_model = download_model_face_detection()
-        print(f"Face Detector Model: {face_model}")
-        pose_model = download_model_pose_detection()
-        print(f"Pose Landmarker Model: {pose_model}")
+        for name, path in cache.prefetch().items():
+            print(f"{name}: {path}")
     except Exception as e:
-        print(f"Failed to download models: {e}")
\ No newline at end of file
+        print(f"Failed to download models: {e}")
+        raise SystemExit(1)
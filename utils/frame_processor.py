@@ -0,0 +1,678 @@
+# utils/frame_processor.py
+
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+import cv2
+
+from utils.detectors import POSE_MODE_IMAGE, POSE_MODE_LIVE_STREAM, POSE_MODE_VIDEO
+from utils.instrumentation import DISABLED
+from utils.roi_tracker import FaceROITracker, ShoulderFlowTracker
+from utils.skin_roi import region_means, skin_regions
+from utils.subjects import SubjectSample, SubjectTracker, assign_poses
+
+# Indeks landmark bahu pada model pose MediaPipe
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+
+
+@dataclass
+class FrameResult:
+    """
+    Per-frame output of `FrameProcessor.process`.
+
+    Attributes:
+        rgb (tuple | None): Mean (R, G, B) of the forehead ROI, or None if no face was found.
+        face_box (tuple | None): Face box as (x, y, width, height) in pixels.
+        forehead_box (tuple | None): Forehead ROI as (x, y, width, height) in pixels.
+        resp_value (float | None): Latest average shoulder Y position in pixels, or None if no pose was found.
+            Sub-pixel when the shoulders are tracked with optical flow between landmarker runs.
+        resp_box (tuple | None): Shoulder ROI as (left_x, top_y, right_x, bottom_y) in pixels.
+        resp_samples (list): All respiration samples that became available with this frame, as
+            (timestamp_ms, shoulder_y_px). One at most in the synchronous pose modes; in the
+            live stream mode these are the asynchronous results that arrived since the last frame.
+        timestamp_ms (int | None): Timestamp of the frame in milliseconds.
+        frame_rgb (np.ndarray | None): Full-resolution RGB copy of the frame, reused for display.
+        subjects (list[SubjectSample]): Per-person samples ordered by subject ID, only filled in
+            when the processor follows more than one subject. The fields above then describe
+            the subject with the lowest ID.
+        face_score (float | None): Face detection confidence, or the template-matching
+            confidence on frames where the face was tracked.
+        shoulders (tuple | None): Normalized ((x, y) left, (x, y) right) shoulder landmarks
+            of the latest pose.
+        pose_score (float | None): Mean visibility of the two shoulder landmarks.
+        region_rgb (np.ndarray | None): Mean (R, G, B) of every skin region in
+            `utils.skin_roi.REGION_NAMES` order, shape (3, 3), in the multi-ROI mode. `rgb` is then
+            their pixel-weighted mean and `forehead_box` the forehead region.
+        region_boxes (np.ndarray | None): The skin regions as (x, y, width, height) in pixels, shape (3, 4).
+    """
+    rgb: Optional[Tuple[float, float, float]] = None
+    face_box: Optional[Tuple[int, int, int, int]] = None
+    forehead_box: Optional[Tuple[int, int, int, int]] = None
+    resp_value: Optional[float] = None
+    resp_box: Optional[Tuple[int, int, int, int]] = None
+    resp_samples: List[Tuple[int, int]] = field(default_factory=list)
+    timestamp_ms: Optional[int] = None
+    frame_rgb: Optional[np.ndarray] = field(default=None, repr=False)
+    subjects: List[SubjectSample] = field(default_factory=list)
+    face_score: Optional[float] = None
+    shoulders: Optional[Tuple[Tuple[float, float], Tuple[float, float]]] = None
+    pose_score: Optional[float] = None
+    region_rgb: Optional[np.ndarray] = field(default=None, repr=False)
+    region_boxes: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class AsyncPoseResults:
+    """
+    Thread-safe inbox for the results of a Pose Landmarker in live stream mode.
+    Pass `callback` as the landmarker's `result_callback`; `FrameProcessor` drains it every frame.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = []
+
+    def callback(self, result, output_image, timestamp_ms):
+        """
+        Result callback invoked by MediaPipe on its own thread.
+        """
+        with self._lock:
+            self._results.append((timestamp_ms, result.pose_landmarks))
+
+    def drain(self):
+        """
+        Returns:
+            list: (timestamp_ms, landmarks of every detected person) of every result since the last call.
+        """
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+
+class FrameProcessor:
+    """
+    Qt-free extraction of the raw rPPG and respiration samples from a single BGR frame.
+    Used by the GUI in `main.py` as well as by the offline batch engine.
+    """
+    def __init__(self, face_detector, pose_landmarker, face_detect_interval=1,
+                 pose_mode=POSE_MODE_IMAGE, pose_results=None, inference_scale=1.0, max_subjects=1,
+                 parallel_inference=False, instrumentation=None, pose_detect_interval=1, scheduler=None,
+                 pose_crop=False, multi_roi=False):
+        """
+        Args:
+            face_detector (mediapipe.tasks.vision.FaceDetector): Detector for the forehead ROI.
+            pose_landmarker (mediapipe.tasks.vision.PoseLandmarker): Landmarker for the shoulders,
+                created with the running mode given in `pose_mode`.
+            face_detect_interval (int): Run the face detector every this many frames and track the
+                face with a `FaceROITracker` in between. 1 runs the detector on every frame.
+            pose_mode (str): Running mode of `pose_landmarker`, see `create_pose_landmarker`.
+            pose_results (AsyncPoseResults, optional): Inbox wired to the landmarker's
+                result callback. Required for `POSE_MODE_LIVE_STREAM`.
+            inference_scale (float): Scale of the copy of the frame given to the detectors, in (0, 1].
+                ROI boxes are mapped back, so the RGB samples still use full-resolution pixels.
+            max_subjects (int): Number of people to follow. Above 1, every face gets a stable ID
+                from a `SubjectTracker`, poses are assigned to the face above their shoulders and
+                `FrameResult.subjects` is filled in. The pose landmarker should be created with
+                `num_poses=max_subjects`.
+            parallel_inference (bool): Run the pose landmarker on a worker thread while the face
+                detector runs on the calling thread. Both read the same `mp.Image` buffer, no copy
+                is made, and MediaPipe releases the GIL during inference, so the frame latency
+                approaches that of the slower model. Call `close` to stop the worker.
+            instrumentation (Instrumentation, optional): Receives the latencies of the
+                'preprocess', 'face_detect', 'pose_detect' and 'resp_flow' stages.
+            pose_detect_interval (int): Run the pose landmarker every this many frames and measure
+                the shoulder motion in between with a `ShoulderFlowTracker` (sub-pixel vertical
+                optical flow in the shoulder ROI). 1 runs the landmarker on every frame.
+            scheduler (AdaptiveScheduler, optional): Decides per frame which detectors run and at which
+                inference scale, within its latency budget. Both ROI trackers are enabled, the detectors
+                run when a tracker loses its target, when the scheduler forces a refresh, or when the
+                budget allows, and `inference_scale` follows `scheduler.scale`.
+            pose_crop (bool): Run the pose landmarker on an upper-body crop around the latest face box
+                (and the previous shoulders, see `upper_body_region`) instead of the whole frame, and
+                map the landmarks back to frame coordinates. Falls back to a full-frame pass when
+                there is no face yet or the shoulders are not inside the crop.
+            multi_roi (bool): Sample the forehead and both cheeks (`utils.skin_roi.skin_regions`,
+                placed with the face detector keypoints) instead of the top 40% of the face box,
+                and fill `FrameResult.region_rgb` for the SNR-weighted fusion in the estimator.
+                The keypoints are kept relative to the face box, so tracked frames reuse them.
+        """
+        if pose_mode == POSE_MODE_LIVE_STREAM and pose_results is None:
+            raise ValueError("The live stream pose mode requires an AsyncPoseResults inbox.")
+        if not 0 < inference_scale <= 1:
+            raise ValueError(f"inference_scale must be in (0, 1], got {inference_scale}.")
+        if max_subjects > 1 and face_detect_interval > 1:
+            raise ValueError("Face tracking between detections (face_detect_interval > 1) "
+                             "only supports a single subject.")
+        if pose_detect_interval > 1 and (max_subjects > 1 or pose_mode == POSE_MODE_LIVE_STREAM):
+            raise ValueError("Shoulder tracking between landmarker runs (pose_detect_interval > 1) "
+                             "only supports a single subject in the image or video pose mode.")
+        if scheduler is not None and (max_subjects > 1 or pose_mode == POSE_MODE_LIVE_STREAM):
+            raise ValueError("The adaptive scheduler only supports a single subject in the image or video pose mode.")
+        if pose_crop and (max_subjects > 1 or pose_mode == POSE_MODE_LIVE_STREAM):
+            raise ValueError("Upper-body pose crops only support a single subject in the image or video pose mode.")
+        if multi_roi and max_subjects > 1:
+            raise ValueError("Multi-region skin sampling only supports a single subject.")
+        self.face_detector = face_detector
+        self.pose_landmarker = pose_landmarker
+        self.face_tracker = FaceROITracker(face_detect_interval) if face_detect_interval > 1 else None
+        self.subject_tracker = SubjectTracker(max_subjects) if max_subjects > 1 else None
+        self.shoulder_tracker = ShoulderFlowTracker(pose_detect_interval) if pose_detect_interval > 1 else None
+        self.pose_mode = pose_mode
+        self.pose_results = pose_results
+        self.inference_scale = inference_scale
+        self.scheduler = scheduler
+        if scheduler is not None:
+            # Jadwal deteksi diatur scheduler; tracker hanya melaporkan kapan deteksi wajib
+            self.face_tracker = self.face_tracker or FaceROITracker(scheduler.max_stale_frames)
+            self.shoulder_tracker = self.shoulder_tracker or ShoulderFlowTracker(scheduler.max_stale_frames)
+            self.inference_scale = scheduler.scale
+        self.instrumentation = instrumentation or DISABLED
+        self.last_timestamp_ms = -1
+        self._face_score = None
+        # Keypoint wajah relatif terhadap kotak wajah (0-1), dari deteksi terakhir
+        self.multi_roi = multi_roi
+        self._face_keypoints = None
+        # Petunjuk untuk crop pose, dalam koordinat ternormalisasi sehingga tidak bergantung pada skala
+        self.pose_crop = pose_crop
+        self.pose_crops = 0
+        self.pose_crop_fallbacks = 0
+        self._pose_region = None
+        self._face_hint = None
+        self._shoulder_hint = None
+        # mediapipe baru dimuat di sini, sehingga impor modul ini (mis. oleh utils.session) tetap ringan
+        import mediapipe as mp
+        self._mp_image = mp.Image
+        self._srgb = mp.ImageFormat.SRGB
+        # detect_async sudah tidak memblokir, jadi worker hanya dipakai untuk mode image/video
+        self._pose_executor = None
+        if parallel_inference and pose_mode != POSE_MODE_LIVE_STREAM:
+            self._pose_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pose-inference')
+
+    def close(self):
+        """
+        Stops the pose worker thread of the parallel inference mode.
+        """
+        if self._pose_executor is not None:
+            self._pose_executor.shutdown(wait=True)
+            self._pose_executor = None
+
+    def reset(self, pose_landmarker=None):
+        """
+        Forgets the per-stream state (ROI trackers, subject IDs, face keypoints and pose crop hints)
+        before processing an unrelated video. Timestamps keep increasing across the reset.
+
+        Args:
+            pose_landmarker (PoseLandmarker, optional): Replaces (and closes) the current landmarker.
+                MediaPipe keeps its own tracking state in the video and live stream modes, and a
+                new landmarker is the only way to clear it.
+        """
+        for tracker in (self.face_tracker, self.shoulder_tracker, self.subject_tracker):
+            if tracker is not None:
+                tracker.reset()
+        if self.pose_results is not None:
+            self.pose_results.drain()
+        if pose_landmarker is not None:
+            self.pose_landmarker.close()
+            self.pose_landmarker = pose_landmarker
+        self._face_score = None
+        self._face_keypoints = None
+        self._pose_region = None
+        self._face_hint = None
+        self._shoulder_hint = None
+
+    def process(self, frame, timestamp_ms=None):
+        """
+        Runs face detection and pose landmarking on a frame and extracts the samples.
+
+        Args:
+            frame (np.ndarray): Frame in BGR format.
+            timestamp_ms (int, optional): Capture time of the frame in milliseconds. Defaults to
+                the current monotonic clock. Video and live stream modes require increasing values.
+
+        Returns:
+            FrameResult: The extracted samples and ROI boxes.
+        """
+        if self.scheduler is None:
+            return self._process(frame, timestamp_ms)
+        start = time.perf_counter()
+        result = self._process(frame, timestamp_ms)
+        self.scheduler.end_frame(time.perf_counter() - start)
+        return result
+
+    def _process(self, frame, timestamp_ms):
+        h, w, _ = frame.shape
+        if timestamp_ms is None:
+            timestamp_ms = int(time.monotonic() * 1000)
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        run_face, run_pose = self._plan()
+
+        with self.instrumentation.stage('preprocess'):
+            # Satu konversi warna per frame; hasilnya dipakai untuk sampling ROI dan tampilan GUI
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+            # Detektor menerima salinan yang diperkecil
+            if self.inference_scale < 1:
+                inference_rgb = cv2.resize(frame_rgb, None, fx=self.inference_scale, fy=self.inference_scale,
+                                           interpolation=cv2.INTER_AREA)
+            else:
+                inference_rgb = frame_rgb
+            # mp.Image hanya dibuat jika ada detektor yang dijalankan pada frame ini
+            needs_image = run_face or (run_pose and not self.pose_crop)
+            mp_image = self._mp_image(image_format=self._srgb, data=inference_rgb) if needs_image else None
+        result = FrameResult(timestamp_ms=timestamp_ms, frame_rgb=frame_rgb)
+
+        # Mode paralel: pose berjalan di worker, wajah di thread ini; hasil digabung per frame
+        if self._pose_executor is not None and run_pose:
+            # Region crop dipilih di thread ini (dari wajah frame sebelumnya); worker hanya menerimanya
+            pose_future = self._pose_executor.submit(self._pose_results, inference_rgb, mp_image, timestamp_ms,
+                                                     self._pose_crop_region(timestamp_ms))
+        else:
+            pose_future = None
+
+        if self.subject_tracker is not None:
+            self._process_subjects(result, frame_rgb, mp_image, timestamp_ms, pose_future)
+            return result
+
+        # --- rPPG Signal Extraction (Forehead ROI) ---
+        with self.instrumentation.stage('face_detect'):
+            face_box = self._face_box(inference_rgb, mp_image, run_face)
+        if face_box is not None:
+            # Kembalikan koordinat ke resolusi penuh
+            result.face_box = self._to_full_resolution(face_box)
+            result.face_score = self._face_score
+            if self.multi_roi:
+                self._sample_regions(result, frame_rgb)
+            else:
+                result.rgb, result.forehead_box = forehead_sample(frame_rgb, result.face_box)
+        if self.pose_crop:
+            self._face_hint = None if face_box is None else (result.face_box[0] / w, result.face_box[1] / h,
+                                                             result.face_box[2] / w, result.face_box[3] / h)
+
+        # --- Respiration Signal Extraction (Landmark-based) ---
+        if self.shoulder_tracker is not None:
+            if run_pose:
+                pose_results = (pose_future.result() if pose_future is not None
+                                else self._pose_results(inference_rgb, mp_image, timestamp_ms,
+                                                        self._pose_crop_region(timestamp_ms)))
+            else:
+                pose_results = None
+            self._track_shoulders(result, frame_rgb, pose_results)
+            return result
+
+        pose_results = (pose_future.result() if pose_future is not None
+                        else self._pose_results(inference_rgb, mp_image, timestamp_ms,
+                                                self._pose_crop_region(timestamp_ms)))
+        for pose_timestamp_ms, poses in pose_results:
+            if poses:
+                # Landmark ternormalisasi, jadi dipetakan langsung ke resolusi penuh
+                result.resp_value, result.resp_box = shoulder_signal(poses[0], w, h)
+                result.resp_samples.append((pose_timestamp_ms, result.resp_value))
+                result.shoulders, result.pose_score = shoulder_landmarks(poses[0])
+
+        return result
+
+    def _sample_regions(self, result, frame_rgb):
+        """
+        Fills the RGB fields from the forehead and cheek regions of `result.face_box`.
+        Regions that fall outside the frame take the pooled mean of the others.
+        """
+        x, y, width, height = result.face_box
+        keypoints = None
+        if self._face_keypoints is not None:
+            keypoints = self._face_keypoints * (width, height) + (x, y)
+        means, boxes, counts = region_means(frame_rgb, skin_regions(result.face_box, keypoints))
+        if counts.sum() == 0:
+            return
+        pooled = counts @ np.nan_to_num(means) / counts.sum()
+        means[counts == 0] = pooled
+        result.rgb = tuple(float(v) for v in pooled)
+        result.region_rgb = means
+        result.region_boxes = boxes
+        result.forehead_box = tuple(int(v) for v in boxes[0]) if counts[0] > 0 else None
+
+    def _plan(self):
+        """
+        Returns:
+            tuple: (run_face, run_pose) for the next frame, from the trackers or from the scheduler.
+        """
+        if self.scheduler is None:
+            # Dengan tracking, detektor hanya dijalankan saat ROI perlu ditempatkan ulang
+            return (self.face_tracker is None or self.face_tracker.needs_detection(),
+                    self.shoulder_tracker is None or self.shoulder_tracker.needs_anchor())
+        if self.scheduler.scale != self.inference_scale:
+            # Kotak wajah yang dilacak berada dalam koordinat skala lama
+            self.inference_scale = self.scheduler.scale
+            self.face_tracker.reset()
+        plan = self.scheduler.plan(face_required=self.face_tracker.needs_detection(),
+                                   pose_required=self.shoulder_tracker.needs_anchor())
+        return plan.run_face, plan.run_pose
+
+    def _track_shoulders(self, result, frame_rgb, pose_results):
+        """
+        Fills the respiration fields from the shoulder flow tracker, re-anchored with the
+        landmarks when `pose_results` is given.
+        """
+        h, w, _ = frame_rgb.shape
+        with self.instrumentation.stage('resp_flow'):
+            if pose_results is not None:
+                poses = pose_results[-1][1] if pose_results else []
+                if not poses:
+                    self.shoulder_tracker.reset()
+                    return
+                shoulder_y, box = shoulder_signal(poses[0], w, h)
+                result.shoulders, result.pose_score = shoulder_landmarks(poses[0])
+                tracked = self.shoulder_tracker.on_anchor(frame_rgb, box, shoulder_y)
+            else:
+                tracked = self.shoulder_tracker.track(frame_rgb)
+        if tracked is not None:
+            result.resp_value, result.resp_box = tracked
+            result.resp_samples.append((result.timestamp_ms, result.resp_value))
+
+    def _process_subjects(self, result, frame_rgb, mp_image, timestamp_ms, pose_future=None):
+        """
+        Multi-subject variant of `process`: fills `result.subjects`, and the single-subject
+        fields with the subject that has the lowest ID.
+        """
+        h, w, _ = frame_rgb.shape
+        with self.instrumentation.stage('face_detect'):
+            detection_result_face = self.face_detector.detect(mp_image)
+        face_boxes = [self._to_full_resolution((d.bounding_box.origin_x, d.bounding_box.origin_y,
+                                                d.bounding_box.width, d.bounding_box.height))
+                      for d in detection_result_face.detections]
+
+        subjects = []
+        for face_box, subject_id in zip(face_boxes, self.subject_tracker.update(face_boxes)):
+            if subject_id is None:
+                continue
+            rgb, forehead_box = forehead_sample(frame_rgb, face_box)
+            subjects.append(SubjectSample(subject_id, rgb, face_box, forehead_box))
+
+        subject_faces = [subject.face_box for subject in subjects]
+        pose_results = pose_future.result() if pose_future is not None else self._poses(mp_image, timestamp_ms)
+        for pose_timestamp_ms, poses in pose_results:
+            signals = [shoulder_signal(landmarks, w, h) for landmarks in poses]
+            shoulder_points = [((box[0] + box[2]) / 2, value) for value, box in signals]
+            for (value, box), face in zip(signals, assign_poses(subject_faces, shoulder_points)):
+                if face is not None:
+                    subjects[face].resp_box = box
+                    subjects[face].resp_samples.append((pose_timestamp_ms, value))
+
+        result.subjects = sorted(subjects, key=lambda subject: subject.subject_id)
+        if result.subjects:
+            primary = result.subjects[0]
+            result.rgb, result.face_box, result.forehead_box = primary.rgb, primary.face_box, primary.forehead_box
+            result.resp_box, result.resp_samples = primary.resp_box, list(primary.resp_samples)
+            if primary.resp_samples:
+                result.resp_value = primary.resp_samples[-1][1]
+
+    def _pose_crop_region(self, timestamp_ms):
+        """
+        Picks the pose crop region on the calling thread, so the pose worker of the parallel mode
+        never reads the face hint while the face detector updates it. In the video mode it also
+        reserves `timestamp_ms + 1` for a full-frame fallback pass.
+
+        Returns:
+            tuple | None: Normalized region, or None to run on the full frame.
+        """
+        if not self.pose_crop:
+            return None
+        region = self._upper_body_region()
+        if region is not None and self.pose_mode == POSE_MODE_VIDEO:
+            self.last_timestamp_ms = max(self.last_timestamp_ms, timestamp_ms + 1)
+        return region
+
+    def _pose_results(self, inference_rgb, mp_image, timestamp_ms, region=None):
+        """
+        `_poses` on the inference image, or on the upper-body crop `region` of it (see
+        `_pose_crop_region`). The full-frame `mp_image` is created here if the caller skipped it.
+        """
+        if not self.pose_crop:
+            return self._poses(mp_image, timestamp_ms)
+        if region is not None:
+            poses = self._cropped_poses(inference_rgb, region, timestamp_ms)
+            self.pose_crops += 1
+            if poses is not None:
+                self._shoulder_hint = shoulder_landmarks(poses[0])[0]
+                return [(timestamp_ms, poses)]
+            # Bahu tidak ada di dalam crop: ulangi pada frame penuh dan tentukan crop baru
+            self.pose_crop_fallbacks += 1
+            self._pose_region = None
+        if mp_image is None:
+            mp_image = self._mp_image(image_format=self._srgb, data=inference_rgb)
+        # detect_for_video butuh timestamp yang terus naik; +1 sudah dipesan oleh _pose_crop_region
+        pose_timestamp_ms = timestamp_ms + 1 if region is not None and self.pose_mode == POSE_MODE_VIDEO else timestamp_ms
+        poses = self._poses(mp_image, pose_timestamp_ms)[0][1]
+        self._shoulder_hint = shoulder_landmarks(poses[0])[0] if poses else None
+        return [(timestamp_ms, poses)]
+
+    def _upper_body_region(self):
+        """
+        Returns:
+            tuple | None: Normalized crop region for the pose landmarker, kept while it still holds
+            the face and the shoulders, or None to run on the full frame.
+        """
+        if self._face_hint is None:
+            return None
+        region = self._pose_region
+        if region is None or not region_contains(region, self._face_hint, self._shoulder_hint):
+            region = upper_body_region(self._face_hint, self._shoulder_hint)
+            self._pose_region = region
+        return region
+
+    def _cropped_poses(self, inference_rgb, region, timestamp_ms):
+        """
+        Runs the pose landmarker on `region` of the inference image.
+
+        Returns:
+            list | None: Landmarks of the first pose in normalized frame coordinates, or None if no
+            pose was found or a shoulder landmark lies outside the crop.
+        """
+        h, w, _ = inference_rgb.shape
+        left, top = int(region[0] * w), int(region[1] * h)
+        right, bottom = int(np.ceil(region[2] * w)), int(np.ceil(region[3] * h))
+        # mp.Image butuh buffer kontigu; salinan crop jauh lebih kecil dari frame
+        crop = np.ascontiguousarray(inference_rgb[top:bottom, left:right])
+        poses = self._poses(self._mp_image(image_format=self._srgb, data=crop), timestamp_ms)[0][1]
+        if not poses:
+            return None
+        landmarks = poses[0]
+        if not all(0 <= landmarks[i].x <= 1 and 0 <= landmarks[i].y <= 1 for i in (LEFT_SHOULDER, RIGHT_SHOULDER)):
+            return None
+        scale_x, scale_y = (right - left) / w, (bottom - top) / h
+        mapped = []
+        for landmark in landmarks:
+            landmark = copy.copy(landmark)
+            landmark.x = left / w + landmark.x * scale_x
+            landmark.y = top / h + landmark.y * scale_y
+            mapped.append(landmark)
+        return [mapped]
+
+    def _poses(self, mp_image, timestamp_ms):
+        """
+        Runs the pose landmarker according to its running mode.
+
+        Returns:
+            list: (timestamp_ms, landmarks of every detected person) for each available result.
+        """
+        with self.instrumentation.stage('pose_detect'):
+            if self.pose_mode == POSE_MODE_LIVE_STREAM:
+                # Inferensi berjalan asinkron; sampel dibangun dari hasil callback yang sudah tiba
+                self.pose_landmarker.detect_async(mp_image, timestamp_ms)
+                return self.pose_results.drain()
+            start = time.perf_counter()
+            if self.pose_mode == POSE_MODE_VIDEO:
+                detection_result_pose = self.pose_landmarker.detect_for_video(mp_image, timestamp_ms)
+            else:
+                detection_result_pose = self.pose_landmarker.detect(mp_image)
+            if self.scheduler is not None:
+                self.scheduler.record('pose', time.perf_counter() - start)
+            return [(timestamp_ms, detection_result_pose.pose_landmarks)]
+
+    def _to_full_resolution(self, box):
+        return tuple(int(round(v / self.inference_scale)) for v in box)
+
+    def _face_box(self, inference_rgb, mp_image, run_face):
+        """
+        Returns the face box (x, y, w, h) in inference-image pixels, from the detector or from the tracker.
+        """
+        if self.face_tracker is None:
+            return self._detect_face(mp_image)
+
+        gray = cv2.cvtColor(inference_rgb, cv2.COLOR_RGB2GRAY)
+        if not run_face:
+            box = self.face_tracker.track(gray)
+            if box is not None:
+                self._face_score = self.face_tracker.confidence
+                return box
+            if mp_image is None:
+                mp_image = self._mp_image(image_format=self._srgb, data=inference_rgb)
+        # Deteksi ulang: sesuai jadwal, atau karena tracking kehilangan wajah
+        return self.face_tracker.on_detection(gray, self._detect_face(mp_image))
+
+    def _detect_face(self, mp_image):
+        start = time.perf_counter()
+        detection_result_face = self.face_detector.detect(mp_image)
+        if self.scheduler is not None:
+            self.scheduler.record('face', time.perf_counter() - start)
+        if not detection_result_face.detections:
+            self._face_score = None
+            return None
+        detection = detection_result_face.detections[0]
+        categories = getattr(detection, 'categories', None)
+        self._face_score = categories[0].score if categories else None
+        bbox = detection.bounding_box
+        box = (int(bbox.origin_x), int(bbox.origin_y), int(bbox.width), int(bbox.height))
+        if self.multi_roi:
+            keypoints = getattr(detection, 'keypoints', None)
+            if keypoints and box[2] > 0 and box[3] > 0:
+                # Keypoint ternormalisasi terhadap gambar inferensi -> relatif terhadap kotak wajah
+                points = np.array([(k.x * mp_image.width, k.y * mp_image.height) for k in keypoints])
+                self._face_keypoints = (points - box[:2]) / box[2:]
+            else:
+                self._face_keypoints = None
+        return box
+
+
+def forehead_sample(frame_rgb, face_box):
+    """
+    Computes the mean RGB of the forehead ROI, the upper 40% of the face box.
+
+    Args:
+        frame_rgb (np.ndarray): Full-resolution frame in RGB format.
+        face_box (tuple): Face box as (x, y, width, height) in pixels.
+
+    Returns:
+        tuple: ((R, G, B), forehead_box), or (None, None) if the ROI is empty.
+    """
+    h, w, _ = frame_rgb.shape
+    face_x, face_y, face_width, face_height = face_box
+
+    # Menggunakan lebar penuh wajah dan bagian atas wajah untuk ROI dahi/rPPG
+    forehead_x = max(0, face_x)
+    forehead_y = max(0, face_y)
+    forehead_width = min(face_width, w - forehead_x)
+    forehead_height = min(int(face_height * 0.4), h - forehead_y)
+
+    if forehead_width > 0 and forehead_height > 0:
+        roi_forehead = frame_rgb[forehead_y : forehead_y + forehead_height,
+                                 forehead_x : forehead_x + forehead_width]
+
+        if roi_forehead.size > 0:
+            # cv2.mean: rata-rata semua kanal dalam satu lintasan
+            return cv2.mean(roi_forehead)[:3], (forehead_x, forehead_y, forehead_width, forehead_height)
+    return None, None
+
+
+def upper_body_region(face_box, shoulders=None, width_factor=2.0, top_factor=0.5, bottom_factor=3.0,
+                      margin=0.25, max_area=0.8):
+    """
+    Region of the frame in which the pose landmarker looks for the shoulders: the face with
+    `width_factor` face widths on either side of its center, from `top_factor` face heights above
+    to `bottom_factor` face heights below its top edge, extended to the previous shoulders plus
+    `margin` times their span. The face stays inside, since the landmarker's person detector
+    locates people by their face.
+
+    Args:
+        face_box (tuple): Face box as normalized (x, y, width, height).
+        shoulders (tuple, optional): Normalized ((x, y), (x, y)) shoulder landmarks of the previous pose.
+        max_area (float): Regions covering more than this fraction of the frame are not worth cropping.
+
+    Returns:
+        tuple | None: (left, top, right, bottom) in normalized coordinates, or None for the full frame.
+    """
+    face_x, face_y, face_width, face_height = face_box
+    center_x = face_x + face_width / 2
+    left, right = center_x - width_factor * face_width, center_x + width_factor * face_width
+    top, bottom = face_y - top_factor * face_height, face_y + bottom_factor * face_height
+    if shoulders is not None:
+        (left_x, left_y), (right_x, right_y) = shoulders
+        pad = margin * max(abs(left_x - right_x), face_width)
+        left, right = min(left, left_x - pad, right_x - pad), max(right, left_x + pad, right_x + pad)
+        bottom = max(bottom, left_y + pad, right_y + pad)
+    left, top, right, bottom = max(0.0, left), max(0.0, top), min(1.0, right), min(1.0, bottom)
+    if right <= left or bottom <= top or (right - left) * (bottom - top) > max_area:
+        return None
+    return left, top, right, bottom
+
+
+def region_contains(region, face_box, shoulders=None):
+    """
+    Returns:
+        bool: True if the normalized `region` holds the face box and both shoulder points.
+    """
+    left, top, right, bottom = region
+    face_x, face_y, face_width, face_height = face_box
+    points = [(face_x, face_y), (face_x + face_width, face_y + face_height)]
+    if shoulders is not None:
+        points += list(shoulders)
+    return all(left <= x <= right and top <= y <= bottom for x, y in points)
+
+
+def shoulder_landmarks(landmarks):
+    """
+    Returns:
+        tuple: (((left_x, left_y), (right_x, right_y)) normalized, mean visibility or None).
+    """
+    left_shoulder = landmarks[LEFT_SHOULDER]
+    right_shoulder = landmarks[RIGHT_SHOULDER]
+    visibility = [getattr(landmark, 'visibility', None) for landmark in (left_shoulder, right_shoulder)]
+    score = None if None in visibility else float(np.mean(visibility))
+    return ((left_shoulder.x, left_shoulder.y), (right_shoulder.x, right_shoulder.y)), score
+
+
+def shoulder_signal(landmarks, w, h, box_height=20):
+    """
+    Computes the respiration sample and the thin shoulder ROI from pose landmarks.
+
+    Args:
+        landmarks (list): Normalized pose landmarks of one person.
+        w (int): Frame width in pixels.
+        h (int): Frame height in pixels.
+        box_height (int): Height of the drawn shoulder ROI in pixels.
+
+    Returns:
+        tuple: (shoulder_y_avg_px, (left_x, top_y, right_x, bottom_y)).
+    """
+    left_shoulder = landmarks[LEFT_SHOULDER]
+    right_shoulder = landmarks[RIGHT_SHOULDER]
+
+    # Konversi koordinat normalized (0-1) ke piksel
+    shoulder_y_avg_px = int(((left_shoulder.y + right_shoulder.y) / 2) * h)
+
+    # Lebar kotak berdasarkan jarak bahu, sedikit dilebihkan (10% padding)
+    shoulder_x_min_px = int(min(left_shoulder.x, right_shoulder.x) * w)
+    shoulder_x_max_px = int(max(left_shoulder.x, right_shoulder.x) * w)
+    padding_x = int((shoulder_x_max_px - shoulder_x_min_px) * 0.1)
+
+    # Posisi Y kotak, berpusat pada rata-rata Y bahu
+    top_y = max(0, int(shoulder_y_avg_px - (box_height / 2)))
+    bottom_y = min(h, int(shoulder_y_avg_px - (box_height / 2)) + box_height)
+    left_x = max(0, shoulder_x_min_px - padding_x)
+    right_x = min(w, shoulder_x_max_px + padding_x)
+
+    return shoulder_y_avg_px, (left_x, top_y, right_x, bottom_y)
@@ -1,59 +1,258 @@
 # utils/heart_rate.py
 
+from functools import lru_cache
+
 import numpy as np
-from scipy.signal import butter, filtfilt
-import cv2
-import mediapipe as mp # Diperlukan untuk get_initial_roi
+from scipy.fft import next_fast_len, rfft, rfftfreq
+from scipy.signal import butter, find_peaks, get_window, sosfilt, sosfilt_zi, sosfiltfilt, welch
+from utils.ring_buffer import RingBuffer
+
+# Pita frekuensi (Hz) detak jantung dan pernapasan
+HR_BAND = (0.75, 3.0)
+RR_BAND = (0.1, 0.5)
+RATE_METHODS = ('peaks', 'fft', 'welch')
+# Celah antar sampel yang lebih panjang dari ini tidak diinterpolasi, melainkan disambung
+MAX_GAP_SECONDS = 1.0
+
+def resample_uniform(timestamps, values, fs, max_gap=MAX_GAP_SECONDS):
+    """
+    Resamples irregularly timestamped samples onto a uniform grid of `fs` Hz.
+
+    Dropped or jittered frames are filled in by linear interpolation (`np.interp` per channel).
+    Gaps longer than `max_gap` seconds are not bridged with a straight line; the samples after
+    the gap are moved back so the gap shrinks to one sample period, as if it never happened.
+
+    Args:
+        timestamps (np.ndarray): (N,) capture times in seconds, increasing.
+        values (np.ndarray): (N,) or (C, N) samples.
+        fs (float): Target sampling rate (Hz).
+        max_gap (float): Longest gap in seconds that is interpolated.
+
+    Returns:
+        np.ndarray: Resampled values, shape (M,) or (C, M), starting at the first sample.
+    """
+    t = np.asarray(timestamps, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if len(t) < 2:
+        return values.copy()
+    period = 1.0 / fs
+    gaps = np.diff(t)
+    excess = np.where(gaps > max_gap, gaps - period, 0.0)
+    t = t - np.concatenate(([0.0], np.cumsum(excess)))
+    grid = t[0] + period * np.arange(int(np.floor((t[-1] - t[0]) / period + 1e-9)) + 1)
+    if values.ndim == 1:
+        return np.interp(grid, t, values)
+    return np.stack([np.interp(grid, t, channel) for channel in values])
+
+class UniformResampler:
+    """
+    Streaming counterpart of `resample_uniform` for samples arriving one at a time.
 
-def cpu_POS(input_video, fps):
+    Every call returns the grid points passed since the previous sample, linearly interpolated
+    between the two samples in one vectorized step: usually one point, none for a frame that
+    arrived early, several after dropped frames. Downstream filters and windows can therefore
+    keep assuming exactly `fs` samples per second.
+    """
+    def __init__(self, fs, channels=1, max_gap=MAX_GAP_SECONDS):
+        """
+        Args:
+            fs (float): Target sampling rate (Hz).
+            channels (int): Values per sample.
+            max_gap (float): Longest gap in seconds that is interpolated; after a longer gap the
+                grid restarts at the new sample.
+        """
+        self.period = 1.0 / fs
+        self.channels = channels
+        self.max_gap = max_gap
+        self._empty = np.empty((channels, 0))
+        self.reset()
+
+    def process(self, timestamp, value):
+        """
+        Adds one sample.
+
+        Args:
+            timestamp (float): Capture time in seconds.
+            value (float | sequence): One value per channel.
+
+        Returns:
+            np.ndarray: (channels, k) values on the uniform grid, k >= 0.
+        """
+        value = np.asarray(value, dtype=float).reshape(self.channels, 1)
+        if self._last_t is None or timestamp - self._last_t > self.max_gap:
+            # Awal aliran atau celah panjang: grid dimulai ulang di sampel ini
+            self._origin, self._index = timestamp, 1
+            self._last_t, self._last_value = timestamp, value
+            return value
+        if timestamp <= self._last_t:
+            return self._empty
+        first = self._index
+        self._index = int(np.floor((timestamp - self._origin) / self.period + 1e-9)) + 1
+        grid = self._origin + self.period * np.arange(first, self._index)
+        weight = (grid - self._last_t) / (timestamp - self._last_t)
+        out = self._last_value + (value - self._last_value) * weight
+        self._last_t, self._last_value = timestamp, value
+        return out
+
+    def reset(self):
+        """
+        Forgets the stream; the next sample starts a new grid.
+        """
+        self._last_t = None
+        self._last_value = None
+        self._origin = 0.0
+        self._index = 0
+
+def cpu_POS(input_video, fps, window_seconds=1.6):
     """
     Estimates the rPPG signal using the Plane Orthogonal to Skin (POS) algorithm.
 
+    Follows the published method: the RGB traces are temporally normalized and projected
+    over short sliding windows (~1.6 s), and the per-window pulse signals are overlap-added.
+    All B traces are processed at once, and the windowed means, variances and the
+    overlap-add are computed with cumulative sums, so the cost is O(B * N) regardless of
+    the window length and there is no Python loop over samples or windows.
+
     Args:
-        input_video (np.ndarray): A 3D numpy array of shape (1, 3, N) representing
+        input_video (np.ndarray): A 3D numpy array of shape (B, 3, N) representing
                                   the raw r, g, b signals over time.
-                                  (1, 3, N) means 1 sample, 3 channels (R, G, B), N frames/data points.
-        fps (int): Frames per second of the video.
+                                  (B, 3, N) means B traces (subjects, ROIs or files),
+                                  3 channels (R, G, B), N frames/data points.
+        fps (float): Frames per second of the video.
+        window_seconds (float): Length of the POS sliding window in seconds.
 
     Returns:
-        np.ndarray: The extracted rPPG signal.
+        np.ndarray: The extracted rPPG signals, shape (B, N).
     """
-    # Reshape input_video to (3, N)
-    C = input_video[0] # Assuming input_video is (1, 3, N), take the first (and only) sample
+    C = np.asarray(input_video, dtype=np.float64)
+    if C.ndim == 2:
+        C = C[np.newaxis]
+    n_samples = C.shape[-1]
+    if n_samples == 0:
+        return np.zeros(C.shape[:1] + (0,))
+
+    # Panjang window POS; jika sinyal lebih pendek, seluruh sinyal dipakai sebagai satu window
+    l = min(max(2, int(np.ceil(window_seconds * fps))), n_samples)
+
+    # Mean dan (ko)variansi per window dari data yang sudah dikurangi rata-rata global,
+    # agar penjumlahan kumulatif tetap stabil secara numerik
+    offset = C.mean(axis=-1, keepdims=True)
+    X = C - offset
+    mean = _windowed_sum(X, l) / l                                    # (B, 3, W)
+    mu = mean + offset + 1e-6                                         # rata-rata per window
+    second = _windowed_sum(X[:, [0, 1, 2, 0, 0, 1]] * X[:, [0, 1, 2, 1, 2, 2]], l) / l
+    cov = second - mean[:, [0, 1, 2, 0, 0, 1]] * mean[:, [0, 1, 2, 1, 2, 2]]
+    var_r, var_g, var_b, cov_rg, cov_rb, cov_gb = (cov[:, k] for k in range(6))
+    mu_r, mu_g, mu_b = mu[:, 0], mu[:, 1], mu[:, 2]
+
+    # Proyeksi pada bidang ortogonal kulit: S1 = G - B, S2 = -2R + G + B (pada Cn ternormalisasi).
+    # Keduanya sudah bermean nol di setiap window, sehingga std dapat dihitung langsung dari (ko)variansi.
+    var_s1 = var_g / mu_g**2 + var_b / mu_b**2 - 2 * cov_gb / (mu_g * mu_b)
+    var_s2 = (4 * var_r / mu_r**2 + var_g / mu_g**2 + var_b / mu_b**2
+              - 4 * cov_rg / (mu_r * mu_g) - 4 * cov_rb / (mu_r * mu_b) + 2 * cov_gb / (mu_g * mu_b))
+    alpha = np.sqrt(np.maximum(var_s1, 0)) / (np.sqrt(np.maximum(var_s2, 0)) + 1e-6)
+
+    # h_m(t) = S1 + alpha_m * S2 = R(t) * a_m + G(t) * b_m + B(t) * c_m - (a_m*mu_r + b_m*mu_g + c_m*mu_b),
+    # sehingga overlap-add sum_m h_m(t) cukup dengan jumlah koefisien window yang mencakup t
+    coef_r = -2 * alpha / mu_r
+    coef_g = (1 + alpha) / mu_g
+    coef_b = (alpha - 1) / mu_b
+    coef_const = -(coef_r * mu_r + coef_g * mu_g + coef_b * mu_b)
+    coefs = _overlap_add(np.stack([coef_r, coef_g, coef_b, coef_const], axis=1), l, n_samples)
+
+    H = coefs[:, 0] * C[:, 0] + coefs[:, 1] * C[:, 1] + coefs[:, 2] * C[:, 2] + coefs[:, 3]
+    return H
 
-    H = np.zeros(C.shape[1]) # Initialize output signal
 
-    # Normalize the RGB channels
-    # Menghindari pembagian oleh nol jika norm(C, axis=0) menghasilkan nol
-    norm_C = C / (np.linalg.norm(C, axis=0) + 1e-6) # Add small epsilon for stability
+def _windowed_sum(x, l):
+    """
+    Sums over every length-`l` sliding window along the last axis, shape (..., N - l + 1).
+    """
+    cs = np.cumsum(x, axis=-1)
+    out = cs[..., l - 1:].copy()
+    out[..., 1:] -= cs[..., :-l]
+    return out
 
-    # Calculate alpha and beta
-    alpha = np.std(norm_C[0]) / (np.std(norm_C[1]) + 1e-6)
-    beta = np.std(norm_C[0]) / (np.std(norm_C[2]) + 1e-6)
 
-    # Construct orthogonal projection plane
-    S = alpha * norm_C[0] + norm_C[1]
-    P = beta * norm_C[0] + norm_C[2]
+def _overlap_add(window_values, l, n_samples):
+    """
+    For every sample t, sums the per-window values of all length-`l` windows that contain t.
 
-    # Calculate rPPG signal (H)
-    for t in range(C.shape[1]):
-        H[t] = S[t] - P[t]
+    Args:
+        window_values (np.ndarray): Values per window, shape (..., W) with W = n_samples - l + 1.
 
-    return H
+    Returns:
+        np.ndarray: Overlap-added values per sample, shape (..., n_samples).
+    """
+    n_windows = window_values.shape[-1]
+    cs = np.concatenate([np.zeros(window_values.shape[:-1] + (1,)), np.cumsum(window_values, axis=-1)], axis=-1)
+    t = np.arange(n_samples)
+    first = np.maximum(0, t - l + 1)
+    last = np.minimum(t, n_windows - 1) + 1
+    return cs[..., last] - cs[..., first]
 
-def bandpass_filter_signal(signal, lowcut, highcut, fs, order=5):
+
+
+class StreamingPOS:
+    """
+    Sample-by-sample version of `cpu_POS` for one trace.
+
+    Each new RGB sample closes one POS window (the last `l` samples), whose pulse segment is
+    overlap-added into a small accumulator. The oldest accumulator sample then has received all
+    of its windows and is emitted, so the output lags the input by `l - 1` samples and every
+    sample costs O(l) regardless of the analysis window length.
+    """
+    def __init__(self, fps, window_seconds=1.6):
+        """
+        Args:
+            fps (float): Frames per second of the video.
+            window_seconds (float): Length of the POS sliding window in seconds.
+        """
+        self.l = max(2, int(np.ceil(window_seconds * fps)))
+        self._rgb = RingBuffer(self.l, channels=3)
+        self._accumulator = np.zeros(self.l)
+
+    def process(self, rgb):
+        """
+        Adds one (R, G, B) sample.
+
+        Args:
+            rgb (sequence): Mean R, G, B of the current frame.
+
+        Returns:
+            float | None: The next completed pulse sample, or None while the first window fills.
+        """
+        self._rgb.append(rgb)
+        if not self._rgb.full:
+            return None
+
+        C = self._rgb.view()
+        Cn = C / (C.mean(axis=1, keepdims=True) + 1e-6)
+        s1 = Cn[1] - Cn[2]
+        s2 = -2 * Cn[0] + Cn[1] + Cn[2]
+        h = s1 + (np.std(s1) / (np.std(s2) + 1e-6)) * s2
+        self._accumulator += h - h.mean()
+
+        completed = self._accumulator[0]
+        self._accumulator[:-1] = self._accumulator[1:]
+        self._accumulator[-1] = 0.0
+        return completed
+
+@lru_cache(maxsize=32)
+def butter_bandpass_sos(lowcut, highcut, fs, order=5):
     """
-    Applies a Butterworth bandpass filter to a signal.
+    Designs (and memoizes) a Butterworth bandpass filter in second-order sections.
+    The design only depends on the arguments, so repeated calls with the same
+    band and sampling rate reuse the cached coefficients.
 
     Args:
-        signal (np.ndarray): The input signal to filter.
         lowcut (float): The lower cutoff frequency of the filter (Hz).
         highcut (float): The upper cutoff frequency of the filter (Hz).
-        fs (int): The sampling rate of the signal (Hz).
+        fs (float): The sampling rate of the signal (Hz).
         order (int): The order of the filter.
 
     Returns:
-        np.ndarray: The filtered signal.
+        np.ndarray | None: SOS coefficients, or None if the band is invalid for `fs`.
     """
     nyquist = 0.5 * fs
     low = lowcut / nyquist
@@ -61,25 +260,95 @@ def bandpass_filter_signal(signal, lowcut, highcut, fs, order=5):
     # Check for valid cutoff frequencies
     if low >= high:
         # If lowcut >= highcut, it's not a valid bandpass filter.
-        # Return the original signal or handle as an error.
         print(f"Warning: Invalid bandpass filter parameters (lowcut={lowcut}, highcut={highcut}). Returning original signal.")
-        return signal
+        return None
     if not (0 < low < 1 and 0 < high < 1):
         print(f"Warning: Normalized frequencies out of range (0, 1). low={low}, high={high}. Clamping to (0.01, 0.99).")
         low = np.clip(low, 0.01, 0.99)
         high = np.clip(high, 0.01, 0.99)
         if low >= high: # Recheck after clamping
              print("Warning: Clamping resulted in invalid range. Returning original signal.")
-             return signal
+             return None
+    # Hasil dibagikan lewat cache, jadi array ini tidak boleh diubah oleh pemanggil
+    return butter(order, [low, high], btype='band', output='sos')
+
+
+def bandpass_filter_signal(signal, lowcut, highcut, fs, order=5):
+    """
+    Applies a zero-phase Butterworth bandpass filter to a whole block of signal.
+    Intended for offline use; see `StreamingBandpassFilter` for sample-by-sample filtering.
+
+    Args:
+        signal (np.ndarray): The input signal to filter. Filtered along the last axis,
+                             so a (B, N) array filters B signals at once.
+        lowcut (float): The lower cutoff frequency of the filter (Hz).
+        highcut (float): The upper cutoff frequency of the filter (Hz).
+        fs (int): The sampling rate of the signal (Hz).
+        order (int): The order of the filter.
+
+    Returns:
+        np.ndarray: The filtered signal.
+    """
+    sos = butter_bandpass_sos(lowcut, highcut, fs, order)
+    if sos is None:
+        return signal
     try:
-        b, a = butter(order, [low, high], btype='band')
-        y = filtfilt(b, a, signal)
-        return y
+        return sosfiltfilt(sos, signal, axis=-1)
     except ValueError as e:
         print(f"Error applying bandpass filter: {e}. Returning original signal.")
         return signal
 
 
+class StreamingBandpassFilter:
+    """
+    Causal Butterworth bandpass filter that keeps its state between calls.
+
+    New samples are filtered with `sosfilt` continuing from the previous filter state,
+    so each call costs O(chunk) instead of re-filtering the whole window, and there are
+    no edge transients when an analysis window moves on.
+    """
+    def __init__(self, lowcut, highcut, fs, order=5):
+        """
+        Args:
+            lowcut (float): The lower cutoff frequency of the filter (Hz).
+            highcut (float): The upper cutoff frequency of the filter (Hz).
+            fs (float): The sampling rate of the signal (Hz).
+            order (int): The order of the filter.
+        """
+        self.sos = butter_bandpass_sos(lowcut, highcut, fs, order)
+        self._zi = None
+
+    def process(self, chunk):
+        """
+        Filters the next chunk of samples.
+
+        Args:
+            chunk (float | np.ndarray): New samples, filtered along the last axis.
+                A scalar is treated as a single sample.
+
+        Returns:
+            np.ndarray: The filtered samples, same shape as `chunk`.
+        """
+        x = np.asarray(chunk, dtype=float)
+        if self.sos is None:
+            return x
+        scalar = x.ndim == 0
+        if scalar:
+            x = x.reshape(1)
+        if self._zi is None:
+            # Mulai dari kondisi steady-state untuk sampel pertama agar tidak ada lonjakan awal
+            zi = sosfilt_zi(self.sos).reshape((self.sos.shape[0],) + (1,) * (x.ndim - 1) + (2,))
+            self._zi = zi * x[..., :1][np.newaxis]
+        y, self._zi = sosfilt(self.sos, x, axis=-1, zi=self._zi)
+        return y[0] if scalar else y
+
+    def reset(self):
+        """
+        Clears the filter state; the next sample starts a new steady state.
+        """
+        self._zi = None
+
+
 def moving_average_filter(signal, window_size):
     """
     Applies a moving average filter to a signal.
@@ -97,6 +366,378 @@ def moving_average_filter(signal, window_size):
     return np.convolve(signal, np.ones(window_size)/window_size, mode='valid')
 
 
+@lru_cache(maxsize=16)
+def _hann_window(n):
+    """
+    Memoized Hann window of length `n`, reused by every spectral estimate of that length.
+    """
+    return get_window('hann', n)
+
+
+@lru_cache(maxsize=32)
+def _band_bins(nfft, fs, lowcut, highcut):
+    """
+    Memoized frequency axis of an `nfft`-point real FFT and the indices of the bins in [lowcut, highcut].
+    """
+    freqs = rfftfreq(nfft, 1.0 / fs)
+    return freqs, np.flatnonzero((freqs >= lowcut) & (freqs <= highcut))
+
+
+def estimate_dominant_frequency(signal, fs, band, method='fft', resolution_hz=0.01, segment_seconds=None):
+    """
+    Finds the dominant frequency of a signal inside a frequency band.
+
+    The spectrum is a Hann-windowed, zero-padded FFT (`method='fft'`) or a Welch average of
+    half-overlapping segments (`method='welch'`). The peak bin is refined with parabolic
+    interpolation on the log power. Windows, FFT lengths and band bins are cached, and all
+    leading axes of `signal` are processed at once.
+
+    Args:
+        signal (np.ndarray): Signal(s) of shape (..., N).
+        fs (float): The sampling rate of the signal (Hz).
+        band (tuple): (lowcut, highcut) search band in Hz.
+        method (str): 'fft' or 'welch'.
+        resolution_hz (float): Target bin spacing after zero padding.
+        segment_seconds (float, optional): Welch segment length. Defaults to half the signal.
+
+    Returns:
+        tuple: (frequency_hz, snr_db). `snr_db` is the power around the peak relative to the
+        rest of the band, usable as a confidence value. Both have shape `signal.shape[:-1]`.
+    """
+    x = np.asarray(signal, dtype=float)
+    n_samples = x.shape[-1]
+    if n_samples < 4:
+        return np.full(x.shape[:-1], np.nan)[()], np.full(x.shape[:-1], -np.inf)[()]
+
+    if method == 'welch':
+        nperseg = n_samples // 2 if segment_seconds is None else int(segment_seconds * fs)
+        nperseg = int(np.clip(nperseg, 4, n_samples))
+        nfft = next_fast_len(max(nperseg, int(np.ceil(fs / resolution_hz))))
+        _, power = welch(x, fs, window=_hann_window(nperseg), nperseg=nperseg, nfft=nfft, axis=-1)
+        n_effective = nperseg
+    elif method == 'fft':
+        nfft = next_fast_len(max(n_samples, int(np.ceil(fs / resolution_hz))))
+        x = (x - x.mean(axis=-1, keepdims=True)) * _hann_window(n_samples)
+        power = np.abs(rfft(x, n=nfft, axis=-1)) ** 2
+        n_effective = n_samples
+    else:
+        raise ValueError(f"Unknown spectral method '{method}'. Expected 'fft' or 'welch'.")
+
+    freqs, band_idx = _band_bins(nfft, float(fs), float(band[0]), float(band[1]))
+    if band_idx.size == 0:
+        return np.full(x.shape[:-1], np.nan)[()], np.full(x.shape[:-1], -np.inf)[()]
+    return _spectral_peak(power, freqs, band_idx, main_lobe_hz=2.0 * fs / n_effective)
+
+
+def _spectral_peak(power, freqs, band_idx, main_lobe_hz):
+    """
+    Locates the strongest bin among `band_idx`, refines it by parabolic interpolation on the
+    log power and computes the SNR of the peak against the rest of the band.
+
+    Args:
+        power (np.ndarray): Power spectra of shape (..., K) on the uniform grid `freqs`.
+        freqs (np.ndarray): Frequencies of the K bins (Hz), uniformly spaced.
+        band_idx (np.ndarray): Indices of the bins that form the search band.
+        main_lobe_hz (float): Half width around the peak that counts as signal power.
+
+    Returns:
+        tuple: (frequency_hz, snr_db), each of shape `power.shape[:-1]`.
+    """
+    bin_hz = freqs[1] - freqs[0]
+
+    # Puncak di dalam band, lalu interpolasi parabola dengan bin tetangganya
+    peak = band_idx[np.argmax(power[..., band_idx], axis=-1)]
+    log_power = np.log(power + 1e-20)
+    left = np.take_along_axis(log_power, np.maximum(peak - 1, 0)[..., np.newaxis], axis=-1)[..., 0]
+    center = np.take_along_axis(log_power, peak[..., np.newaxis], axis=-1)[..., 0]
+    right = np.take_along_axis(log_power, np.minimum(peak + 1, power.shape[-1] - 1)[..., np.newaxis], axis=-1)[..., 0]
+    denominator = left - 2 * center + right
+    offset = np.where(np.abs(denominator) > 1e-12, 0.5 * (left - right) / np.where(denominator == 0, 1, denominator), 0.0)
+    frequency = freqs[peak] + np.clip(offset, -0.5, 0.5) * bin_hz
+
+    # SNR: daya di sekitar puncak (lebar main lobe) dibanding sisa band
+    band_freqs = freqs[band_idx]
+    band_power = power[..., band_idx]
+    in_peak = np.abs(band_freqs - frequency[..., np.newaxis]) <= main_lobe_hz
+    signal_power = np.sum(band_power * in_peak, axis=-1)
+    noise_power = np.sum(band_power * ~in_peak, axis=-1)
+    snr_db = 10 * np.log10((signal_power + 1e-20) / (noise_power + 1e-20))
+    return frequency[()], snr_db[()]
+
+
+class SlidingDFT:
+    """
+    Incremental spectrum of the last `window_size` samples, restricted to one frequency band.
+
+    Each new sample updates only the DFT bins inside the band with the sliding-DFT recurrence
+
+        X(n) = e^{jw} * (X(n-1) - x(n-N)) + x(n) * e^{-jw(N-1)},
+
+    so an update costs O(bins) whatever the window length. The bins lie on a grid finer than
+    fs/N (like zero padding) and the Hann window is applied in the frequency domain, which needs
+    the bins one native bin (fs/N) away on each side. To stop floating point drift from
+    accumulating, the bins are recomputed exactly once per window, which is O(bins) amortized.
+    """
+    def __init__(self, fs, window_size, band, resolution_hz=0.02):
+        """
+        Args:
+            fs (float): The sampling rate of the signal (Hz).
+            window_size (int): Number of samples N in the analysis window.
+            band (tuple): (lowcut, highcut) band in Hz whose bins are tracked.
+            resolution_hz (float): Target spacing of the tracked bins.
+        """
+        self.fs = fs
+        self.window_size = int(window_size)
+        self._pad, bin_hz, first, last = self._grid(fs, self.window_size, band, resolution_hz)
+        self.freqs = np.arange(first, last + 1) * bin_hz
+        omega = 2 * np.pi * self.freqs / fs
+        self._rotate = np.exp(1j * omega)
+        self._tail = np.exp(-1j * omega * (self.window_size - 1))
+        self._basis = np.exp(-1j * np.outer(np.arange(self.window_size), omega)) # (N, K), untuk koreksi drift
+
+        self._core = slice(self._pad, len(self.freqs) - self._pad)
+        core_freqs = self.freqs[self._core]
+        self._band_idx = np.flatnonzero((core_freqs >= band[0]) & (core_freqs <= band[1]))
+
+        self._bins = np.zeros(len(self.freqs), dtype=complex)
+        self._history = RingBuffer(self.window_size)
+        self._since_recompute = 0
+
+    @staticmethod
+    def _grid(fs, window_size, band, resolution_hz):
+        """
+        Returns:
+            tuple: (pad, bin_hz, first, last) of the tracked bin grid.
+        """
+        native_hz = fs / window_size
+        pad = max(1, int(np.ceil(native_hz / resolution_hz)))
+        bin_hz = native_hz / pad
+        # Grid bin: pita yang dicari, ditambah satu bin native (pad) di kiri-kanan untuk jendela Hann
+        # dan satu bin lagi untuk interpolasi parabola di tepi pita
+        first = int(np.floor(band[0] / bin_hz)) - pad - 1
+        last = int(np.ceil(band[1] / bin_hz)) + pad + 1
+        return pad, bin_hz, first, last
+
+    @classmethod
+    def expected_bytes(cls, fs, window_size, band, resolution_hz=0.02):
+        """
+        Returns:
+            int: Bytes the tracker allocates, computed without allocating: the (N, bins) complex
+            basis plus the float64 sample history.
+        """
+        _, _, first, last = cls._grid(fs, int(window_size), band, resolution_hz)
+        bins = last - first + 1
+        return int(window_size) * bins * 16 + 2 * int(window_size) * 8
+
+    def update(self, x):
+        """
+        Adds one sample and slides the window by one.
+
+        Args:
+            x (float): The new sample.
+        """
+        oldest = self._history.view()[0, 0] if self._history.full else 0.0
+        self._history.append(x)
+        self._bins = self._rotate * (self._bins - oldest) + x * self._tail
+        self._since_recompute += 1
+        if self._since_recompute >= self.window_size:
+            self._bins = self._history.view()[0] @ self._basis
+            self._since_recompute = 0
+
+    @property
+    def ready(self):
+        """
+        bool: True once a full window of samples has been seen.
+        """
+        return self._history.full
+
+    def spectrum(self):
+        """
+        Returns:
+            tuple: (freqs, power) of the Hann-windowed spectrum on the tracked grid.
+        """
+        X = self._bins
+        p = self._pad
+        windowed = 0.5 * X[p:-p] - 0.25 * X[:-2 * p] - 0.25 * X[2 * p:]
+        return self.freqs[self._core], np.abs(windowed) ** 2
+
+    def dominant_frequency(self):
+        """
+        Returns:
+            tuple: (frequency_hz, snr_db) of the strongest component inside the band.
+        """
+        freqs, power = self.spectrum()
+        frequency, snr_db = _spectral_peak(power, freqs, self._band_idx, main_lobe_hz=2.0 * self.fs / self.window_size)
+        return float(frequency), float(snr_db)
+
+
+def estimate_heart_rate(rgb_signals, fps, method='peaks'):
+    """
+    Computes the heart rate from a window of mean R, G, B forehead samples.
+    Runs POS, bandpass filtering (0.75-3.0 Hz), normalization, smoothing and rate estimation.
+
+    Args:
+        rgb_signals (np.ndarray): Array of shape (3, N) with the R, G, B samples.
+        fps (float): Sampling rate of the samples (Hz).
+        method (str): 'peaks' (peak intervals), or 'fft' / 'welch' (dominant spectral frequency).
+
+    Returns:
+        tuple: (heart_rate, smoothed_signal, snr_db). `heart_rate` is None if the signal could not
+        be filtered. `snr_db` is the spectral confidence, or None for the 'peaks' method.
+    """
+    rppg_signal = cpu_POS(np.asarray(rgb_signals).reshape(1, 3, -1), fps=fps).reshape(-1)
+    return _estimate_rate(rppg_signal, HR_BAND, fps, peak_distance=fps / 3.0, method=method)
+
+
+def estimate_respiration_rate(resp_signal, fps, prefiltered=False, method='peaks'):
+    """
+    Computes the respiration rate from a window of shoulder Y positions.
+    Runs bandpass filtering (0.1-0.5 Hz), normalization, smoothing and rate estimation.
+
+    Args:
+        resp_signal (np.ndarray): 1D array of shoulder Y positions.
+        fps (float): Sampling rate of the samples (Hz).
+        prefiltered (bool): True if `resp_signal` was already bandpass filtered
+            (e.g. by a `StreamingBandpassFilter`), which skips the block filter.
+        method (str): 'peaks' (peak intervals), or 'fft' / 'welch' (dominant spectral frequency).
+
+    Returns:
+        tuple: (respiration_rate, smoothed_signal, snr_db). `respiration_rate` is None if the signal
+        could not be filtered. `snr_db` is the spectral confidence, or None for the 'peaks' method.
+    """
+    return _estimate_rate(np.asarray(resp_signal, dtype=float), RR_BAND, fps, peak_distance=fps / 0.5,
+                          prefiltered=prefiltered, method=method)
+
+
+def estimate_heart_rates(rgb_signals, fps, method='fft'):
+    """
+    Batched `estimate_heart_rate` for several subjects at once: one POS, filter and FFT pass
+    over all traces instead of a Python loop per subject.
+
+    Args:
+        rgb_signals (np.ndarray): Array of shape (B, 3, N) with the R, G, B samples of B subjects.
+        fps (float): Sampling rate of the samples (Hz).
+        method (str): 'peaks' (peak intervals, per trace), or 'fft' / 'welch' (batched).
+
+    Returns:
+        tuple: (heart_rates, smoothed_signals, snr_db) of shapes (B,), (B, M) and (B,).
+        `snr_db` is NaN for the 'peaks' method.
+    """
+    rppg_signals = cpu_POS(np.asarray(rgb_signals), fps=fps)
+    return _estimate_rates(rppg_signals, HR_BAND, fps, peak_distance=fps / 3.0, method=method)
+
+
+def estimate_fused_heart_rate(region_rgb, fps, method='peaks'):
+    """
+    Heart rate of one face from the RGB traces of several skin regions (see `utils.skin_roi`).
+
+    All regions go through one batched POS and bandpass pass. Every filtered pulse trace is
+    normalized to unit variance and weighted by its spectral SNR (linear power ratio), so
+    regions with a clean pulse dominate and regions hit by hair, shadows or motion fade out.
+    The rate is estimated on the weighted sum.
+
+    Args:
+        region_rgb (np.ndarray): Array of shape (R, 3, N) with the R, G, B samples of R regions.
+        fps (float): Sampling rate of the samples (Hz).
+        method (str): 'peaks' (peak intervals), or 'fft' / 'welch' (dominant spectral frequency).
+            The region weights always use the FFT SNR.
+
+    Returns:
+        tuple: (heart_rate, smoothed_signal, snr_db, weights). `weights` has shape (R,) and sums to 1.
+    """
+    pulses = bandpass_filter_signal(cpu_POS(np.asarray(region_rgb), fps=fps), *HR_BAND, fps, order=5)
+    _, region_snr_db = estimate_dominant_frequency(pulses, fps, HR_BAND, method='fft')
+    weights = np.nan_to_num(10 ** (np.atleast_1d(region_snr_db) / 10), nan=0.0, posinf=0.0)
+    # Tanpa SNR yang berarti (mis. jendela terlalu pendek), semua region berbobot sama
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(weights), 1.0 / len(weights))
+    normalized = pulses / (np.std(pulses, axis=-1, keepdims=True) + 1e-12)
+    fused = weights @ normalized
+    heart_rate, smoothed_signal, snr_db = _estimate_rate(fused, HR_BAND, fps, peak_distance=fps / 3.0,
+                                                         prefiltered=True, method=method)
+    return heart_rate, smoothed_signal, snr_db, weights
+
+
+def estimate_respiration_rates(resp_signals, fps, prefiltered=False, method='fft'):
+    """
+    Batched `estimate_respiration_rate` for several subjects at once.
+
+    Args:
+        resp_signals (np.ndarray): Array of shape (B, N) with the shoulder Y positions of B subjects.
+        fps (float): Sampling rate of the samples (Hz).
+        prefiltered (bool): True if the signals were already bandpass filtered.
+        method (str): 'peaks' (peak intervals, per trace), or 'fft' / 'welch' (batched).
+
+    Returns:
+        tuple: (respiration_rates, smoothed_signals, snr_db) of shapes (B,), (B, M) and (B,).
+    """
+    return _estimate_rates(np.asarray(resp_signals, dtype=float), RR_BAND, fps, peak_distance=fps / 0.5,
+                           prefiltered=prefiltered, method=method)
+
+
+def _estimate_rate(signal, band, fps, peak_distance, prefiltered=False, method='peaks'):
+    """
+    Shared filter -> normalize -> smooth -> rate pipeline for both rates.
+
+    Returns:
+        tuple: (rate per minute or None, smoothed signal, snr_db or None).
+    """
+    if method not in RATE_METHODS:
+        raise ValueError(f"Unknown rate method '{method}'. Expected one of {RATE_METHODS}.")
+    if signal.size == 0:
+        return None, signal, None
+
+    rates, smoothed_signals, snr_db = _estimate_rates(signal[np.newaxis], band, fps, peak_distance,
+                                                      prefiltered=prefiltered, method=method)
+    snr_db = None if np.isnan(snr_db[0]) else float(snr_db[0])
+    return float(rates[0]), smoothed_signals[0], snr_db
+
+
+def _estimate_rates(signals, band, fps, peak_distance, prefiltered=False, method='peaks'):
+    """
+    `_estimate_rate` over the last axis of a (B, N) array.
+
+    Returns:
+        tuple: (rates per minute, smoothed signals, snr_db). Rates that could not be determined
+        are 0.0; `snr_db` is NaN where there is no spectral confidence.
+    """
+    if method not in RATE_METHODS:
+        raise ValueError(f"Unknown rate method '{method}'. Expected one of {RATE_METHODS}.")
+    lowcut, highcut = band
+    filtered_signals = signals if prefiltered else bandpass_filter_signal(signals, lowcut, highcut, fps, order=5)
+
+    mean = np.mean(filtered_signals, axis=-1, keepdims=True)
+    std = np.std(filtered_signals, axis=-1, keepdims=True)
+    normalized_signals = (filtered_signals - mean) / (std + 1e-6)
+    smoothed_signals = _moving_average_rows(normalized_signals, window_size=int(fps / 2))
+
+    if method != 'peaks':
+        frequency, snr_db = estimate_dominant_frequency(filtered_signals, fps, band, method=method)
+        frequency, snr_db = np.atleast_1d(frequency), np.atleast_1d(snr_db).astype(float)
+        undetermined = np.isnan(frequency)
+        snr_db[undetermined] = np.nan
+        return np.where(undetermined, 0.0, 60.0 * frequency), smoothed_signals, snr_db
+
+    # find_peaks hanya menerima sinyal 1D, jadi metode puncak tetap per baris
+    rates = np.zeros(smoothed_signals.shape[0])
+    if smoothed_signals.shape[-1] > 0:
+        for i, smoothed_signal in enumerate(smoothed_signals):
+            peaks, _ = find_peaks(smoothed_signal, distance=peak_distance)
+            intervals = np.diff(peaks) / fps
+            rates[i] = 60.0 / np.mean(intervals) if len(intervals) > 0 else 0.0
+    return rates, smoothed_signals, np.full(smoothed_signals.shape[0], np.nan)
+
+
+def _moving_average_rows(signals, window_size):
+    """
+    `moving_average_filter` along the last axis of a (B, N) array, computed with one cumulative sum.
+    """
+    if window_size <= 0 or signals.shape[-1] < window_size:
+        return signals
+    cumsum = np.cumsum(signals, axis=-1)
+    cumsum = np.concatenate([np.zeros(signals.shape[:-1] + (1,)), cumsum], axis=-1)
+    return (cumsum[..., window_size:] - cumsum[..., :-window_size]) / window_size
+
+
 def get_initial_roi(image, landmarker, x_size=100, y_size=30, shift_x=0, shift_y=-30):
     """
     Mengambil ROI awal dari frame webcam untuk mendeteksi sinyal respirasi
@@ -116,6 +757,10 @@ def get_initial_roi(image, landmarker, x_size=100, y_size=30, shift_x=0, shift_y
     Raises:
         ValueError: Jika tidak ada pose yang terdeteksi atau dimensi ROI tidak valid.
     """
+    # Diimpor di sini agar modul pemrosesan sinyal tidak ikut memuat OpenCV dan MediaPipe
+    import cv2
+    import mediapipe as mp
+
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) # Mengubah warna BGR ke RGB
     height, width = image.shape[:2] # Mengambil dimensi frame webcam
 
@@ -0,0 +1,718 @@
+# utils/ingest_server.py
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+import numpy as np
+import cv2
+
+from utils.frame_processor import FrameResult
+from utils.instrumentation import DISABLED, Instrumentation
+from utils.pipeline import BLOCK, QUEUE_POLICIES
+from utils.vitals import FILTER_BLOCK, VitalSignsEstimator
+
+# Framing: setiap pesan = header 5 byte little-endian (tipe, panjang payload) lalu payload
+HEADER = struct.Struct('<BI')
+MSG_HELLO = 1    # client -> server: JSON konfigurasi sesi
+MSG_SAMPLES = 2  # client -> server: array SAMPLE_DTYPE
+MSG_FRAME = 3    # client -> server: timestamp int64 lalu gambar terenkode (JPEG/PNG)
+MSG_BYE = 4      # client -> server: akhir sesi, tanpa payload
+MSG_JSON = 16    # server -> client: JSON dengan field 'type' ('ready', 'vitals', 'error', 'bye')
+
+# Sampel yang sudah diekstrak client; nilai yang tidak ada dikirim sebagai NaN
+SAMPLE_DTYPE = np.dtype([
+    ('timestamp_ms', '<i8'),
+    ('rgb', '<f4', (3,)),
+    ('resp_value', '<f4'),
+])
+FRAME_HEADER = struct.Struct('<q')
+
+DEFAULT_PORT = 8765
+MAX_FPS = 240.0
+
+
+def pack_message(kind, payload=b''):
+    """
+    Frames one message.
+
+    Args:
+        kind (int): Message type, one of the `MSG_*` constants.
+        payload (bytes): Message body.
+
+    Returns:
+        bytes: Header and payload.
+    """
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def pack_json(message):
+    return pack_message(MSG_JSON, json.dumps(message).encode())
+
+
+def pack_samples(timestamps_ms, rgb=None, resp=None):
+    """
+    Frames a batch of extracted samples.
+
+    Args:
+        timestamps_ms (array-like): (N,) capture times in milliseconds.
+        rgb (np.ndarray, optional): (N, 3) mean forehead R, G, B; rows of NaN mark frames without a face.
+        resp (np.ndarray, optional): (N,) shoulder positions; NaN marks frames without a pose.
+
+    Returns:
+        bytes: A `MSG_SAMPLES` message.
+    """
+    samples = np.empty(len(timestamps_ms), dtype=SAMPLE_DTYPE)
+    samples['timestamp_ms'] = timestamps_ms
+    samples['rgb'] = rgb if rgb is not None else np.nan
+    samples['resp_value'] = resp if resp is not None else np.nan
+    return pack_message(MSG_SAMPLES, samples.tobytes())
+
+
+def pack_frame(timestamp_ms, encoded):
+    """
+    Frames one encoded camera frame (e.g. from `cv2.imencode('.jpg', frame)`).
+
+    Returns:
+        bytes: A `MSG_FRAME` message.
+    """
+    return pack_message(MSG_FRAME, FRAME_HEADER.pack(int(timestamp_ms)) + bytes(encoded))
+
+
+async def read_message(reader, max_size):
+    """
+    Reads one framed message.
+
+    Args:
+        reader (asyncio.StreamReader): Connection to read from.
+        max_size (int): Largest accepted payload in bytes, checked before the payload is read.
+
+    Returns:
+        tuple: (kind, payload).
+
+    Raises:
+        asyncio.IncompleteReadError: If the connection closed mid-message (or before it).
+        ValueError: If the payload is larger than `max_size`.
+    """
+    kind, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if size > max_size:
+        raise ValueError(f"Message of {size} bytes exceeds the limit of {max_size} bytes.")
+    return kind, await reader.readexactly(size)
+
+
+def _footprint(obj, depth=3):
+    """
+    Bytes held in numpy arrays by `obj` and the objects it references, up to `depth` levels.
+    """
+    total = 0
+    for value in vars(obj).values():
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+        elif depth and hasattr(value, '__dict__') and not isinstance(value, type):
+            total += _footprint(value, depth - 1)
+    return total
+
+
+class AsyncBoundedQueue:
+    """
+    asyncio counterpart of `pipeline.BoundedQueue`, bounded by the total size of the queued
+    payloads in bytes instead of the number of items.
+
+    With the 'block' policy a full queue suspends `put`, which stops the connection from being
+    read, so TCP flow control slows the client down. With 'drop_oldest' the oldest queued
+    messages are discarded to make room instead.
+    """
+    def __init__(self, max_bytes, policy=BLOCK):
+        """
+        Args:
+            max_bytes (int): Maximum total size of the queued items.
+            policy (str): `BLOCK` or `DROP_OLDEST`.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of {QUEUE_POLICIES}.")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.dropped = 0
+        self.queued_bytes = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = asyncio.Condition()
+
+    async def put(self, item, size):
+        """
+        Adds an item of `size` bytes. A single item larger than `max_bytes` is still accepted
+        into an empty queue.
+
+        Returns:
+            bool: False if the queue was closed and the item was not added.
+        """
+        async with self._cond:
+            if self.policy == BLOCK:
+                await self._cond.wait_for(lambda: self._closed or not self._items
+                                          or self.queued_bytes + size <= self.max_bytes)
+            else:
+                while self._items and self.queued_bytes + size > self.max_bytes:
+                    _, dropped_size = self._items.popleft()
+                    self.queued_bytes -= dropped_size
+                    self.dropped += 1
+            if self._closed:
+                return False
+            self._items.append((item, size))
+            self.queued_bytes += size
+            self._cond.notify_all()
+            return True
+
+    async def get(self):
+        """
+        Removes and returns the oldest item.
+
+        Returns:
+            object | None: The item, or None once the queue is closed and empty.
+        """
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                return None
+            item, size = self._items.popleft()
+            self.queued_bytes -= size
+            self._cond.notify_all()
+            return item
+
+    async def close(self):
+        """
+        Wakes up all waiting producers and consumers; queued items can still be taken.
+        """
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class IngestSession:
+    """
+    One remote monitoring session: a `VitalSignsEstimator` fed with the samples (or frames) of
+    one client, and the queue of its unprocessed messages.
+
+    Messages of a session are processed strictly one after the other, so the estimator is only
+    ever used by one executor thread at a time.
+    """
+    def __init__(self, session_id, config, max_bytes, policy=BLOCK, max_message_bytes=1 << 20):
+        """
+        Args:
+            session_id (int): Server-assigned ID.
+            config (dict): HELLO payload: 'fps' (required), and optionally 'window_seconds',
+                'hop_seconds', 'filter_mode', 'rate_method' (see `VitalSignsEstimator`) and 'name'.
+            max_bytes (int): Memory budget of the session: estimator buffers plus queued messages.
+            policy (str): Queue policy when the budget is exhausted, `BLOCK` or `DROP_OLDEST`.
+            max_message_bytes (int): Largest message the server accepts; at least one must fit
+                into the queue budget.
+
+        Raises:
+            ValueError: If the configuration is invalid or does not fit into `max_bytes`.
+        """
+        try:
+            fps = float(config['fps'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("HELLO must contain a numeric 'fps'.") from None
+        if not 0 < fps <= MAX_FPS:
+            raise ValueError(f"fps must be in (0, {MAX_FPS:.0f}], got {fps}.")
+        try:
+            window_seconds = float(config.get('window_seconds', 10.0))
+            hop_seconds = float(config.get('hop_seconds', 0.5))
+        except (TypeError, ValueError):
+            raise ValueError("'window_seconds' and 'hop_seconds' must be numeric.") from None
+        if not (math.isfinite(window_seconds) and window_seconds > 0
+                and math.isfinite(hop_seconds) and hop_seconds > 0):
+            raise ValueError(f"window_seconds and hop_seconds must be positive and finite, got {window_seconds} "
+                             f"and {hop_seconds}.")
+        rate_method = config.get('rate_method', 'fft')
+        # Tolak sebelum buffer dialokasikan: jendela besar (terutama basis sdft) bisa berukuran GB
+        expected_bytes = VitalSignsEstimator.expected_bytes(fps, window_seconds, rate_method)
+        if expected_bytes + max_message_bytes > max_bytes:
+            raise ValueError(f"Session needs at least {expected_bytes + max_message_bytes} bytes "
+                             f"(estimator {expected_bytes} + one message {max_message_bytes}), "
+                             f"the limit is {max_bytes} bytes. Use a shorter window or a lower fps.")
+        self.id = session_id
+        self.name = str(config.get('name', session_id))
+        self.fps = fps
+        self.estimator = VitalSignsEstimator(fps, window_seconds=window_seconds, hop_seconds=hop_seconds,
+                                             filter_mode=config.get('filter_mode', FILTER_BLOCK),
+                                             rate_method=rate_method)
+
+        # Buffer estimator dialokasikan di awal; sisa anggaran dipakai antrian pesan
+        self.estimator_bytes = _footprint(self.estimator)
+        queue_bytes = max_bytes - self.estimator_bytes
+        if queue_bytes < max_message_bytes:
+            raise ValueError(f"Session needs {self.estimator_bytes + max_message_bytes} bytes "
+                             f"(estimator {self.estimator_bytes} + one message {max_message_bytes}), "
+                             f"the limit is {max_bytes} bytes. Use a shorter window or a lower fps.")
+        self.queue = AsyncBoundedQueue(queue_bytes, policy)
+        self.samples = 0
+        self.frames = 0
+        self.started = time.monotonic()
+
+    def ingest_samples(self, payload):
+        """
+        Adds a `MSG_SAMPLES` payload to the estimator. Runs in an executor thread.
+
+        Returns:
+            dict | None: The latest vitals if they were updated by these samples.
+        """
+        if len(payload) % SAMPLE_DTYPE.itemsize:
+            raise ValueError(f"Samples payload of {len(payload)} bytes is not a multiple of "
+                             f"{SAMPLE_DTYPE.itemsize} bytes.")
+        samples = np.frombuffer(payload, dtype=SAMPLE_DTYPE)
+        # Kolom dikonversi sekaligus, seperti SessionReader.results
+        timestamps = samples['timestamp_ms'].tolist()
+        rgbs = samples['rgb'].astype(float).tolist()
+        resp_values = samples['resp_value'].astype(float).tolist()
+
+        updated = False
+        for i, timestamp_ms in enumerate(timestamps):
+            result = FrameResult(timestamp_ms=timestamp_ms)
+            if rgbs[i][0] == rgbs[i][0]:  # bukan NaN
+                result.rgb = tuple(rgbs[i])
+            if resp_values[i] == resp_values[i]:
+                result.resp_samples = [(timestamp_ms, resp_values[i])]
+            updated |= self.estimator.add(result)
+        self.samples += len(timestamps)
+        return self.vitals_message(timestamps[-1]) if updated else None
+
+    def ingest_result(self, timestamp_ms, result):
+        """
+        Adds the `FrameResult` of a remotely captured frame. Runs in an executor thread.
+
+        Returns:
+            dict | None: The latest vitals if they were updated by this frame.
+        """
+        self.frames += 1
+        if self.estimator.add(result):
+            return self.vitals_message(timestamp_ms)
+        return None
+
+    def vitals_message(self, timestamp_ms):
+        vitals = self.estimator.vitals
+        return {
+            'type': 'vitals',
+            'session': self.id,
+            'timestamp_ms': timestamp_ms,
+            'heart_rate': vitals.heart_rate,
+            'respiration_rate': vitals.respiration_rate,
+            'hr_snr_db': vitals.hr_snr_db,
+            'resp_snr_db': vitals.resp_snr_db,
+            'dropped': self.queue.dropped,
+        }
+
+
+class IngestServer:
+    """
+    asyncio TCP server hosting many independent remote monitoring sessions.
+
+    Thin clients connect, send a HELLO with their frame rate and estimator settings, then stream
+    either extracted samples (mean forehead RGB and shoulder Y, `MSG_SAMPLES`) or encoded frames
+    (`MSG_FRAME`). The signal processing (`cpu_POS`, `bandpass_filter_signal` and the rate
+    estimation in `VitalSignsEstimator`) runs in a thread pool, frame decoding and model inference
+    in a second pool with one `FrameProcessor` per thread, so the event loop only moves bytes.
+    After every message that updated the estimates, the latest vitals are sent back as JSON.
+
+    Every session has a memory budget (estimator buffers plus queued messages) and a maximum
+    message size. A session processes one message at a time; when its queue budget is full, the
+    server stops reading from that client (or drops its oldest messages), and a client that does
+    not read its results blocks only its own session until `write_timeout` closes it.
+    """
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, max_sessions=256, max_session_bytes=8 << 20,
+                 max_message_bytes=1 << 20, policy=BLOCK, workers=None, processor_factory=None,
+                 inference_workers=1, hello_timeout=10.0, read_timeout=60.0, write_timeout=10.0,
+                 instrumentation=None):
+        """
+        Args:
+            host (str): Interface to listen on.
+            port (int): TCP port; 0 picks a free port (see `port` after `start`).
+            max_sessions (int): Maximum number of concurrent sessions; further clients are refused.
+            max_session_bytes (int): Memory budget per session in bytes.
+            max_message_bytes (int): Largest accepted message payload in bytes.
+            policy (str): What to do when a session's queue budget is full: `BLOCK` (stop reading
+                from the client) or `DROP_OLDEST`.
+            workers (int, optional): Threads for the signal processing. Defaults to the CPU count (max 8).
+            processor_factory (callable, optional): Returns a new `FrameProcessor`; called once per
+                inference thread. Without it, `MSG_FRAME` messages are rejected. The processors are
+                shared by all sessions, so they must not keep per-stream state (use the image pose
+                mode and `face_detect_interval=1`).
+            inference_workers (int): Threads (and processors) for frame decoding and inference.
+            hello_timeout (float): Seconds a new connection has to send its HELLO.
+            read_timeout (float): Seconds without any message after which a session is closed.
+            write_timeout (float): Seconds a client may keep its results unread before it is closed.
+            instrumentation (Instrumentation, optional): Receives the 'samples', 'frame' and
+                'queue_wait' latencies.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of {QUEUE_POLICIES}.")
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes
+        self.max_message_bytes = max_message_bytes
+        self.policy = policy
+        self.hello_timeout = hello_timeout
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.instrumentation = instrumentation or DISABLED
+        if instrumentation is not None:
+            instrumentation.dropped_frames = lambda: self.stats()['dropped']
+        self.sessions = {}
+        self.dropped = 0
+        self.total_samples = 0
+        self.refused = 0
+
+        self.executor = ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1),
+                                           thread_name_prefix='ingest')
+        self._processor_factory = processor_factory
+        self._thread_state = threading.local()
+        if processor_factory is not None:
+            self.inference_executor = ThreadPoolExecutor(max_workers=max(1, inference_workers),
+                                                         thread_name_prefix='inference')
+        else:
+            self.inference_executor = None
+        self._ids = count(1)
+        self._server = None
+
+    async def start(self):
+        """
+        Starts listening. Returns once the socket is bound.
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, stats_interval=None):
+        """
+        Starts the server (if needed) and serves until cancelled.
+
+        Args:
+            stats_interval (float, optional): Print `stats` every this many seconds.
+        """
+        if self._server is None:
+            await self.start()
+        print(f"Ingest server listening on {self.host}:{self.port}")
+        async with self._server:
+            if not stats_interval:
+                await self._server.serve_forever()
+                return
+            serving = asyncio.ensure_future(self._server.serve_forever())
+            last_samples, last_time = 0, time.monotonic()
+            try:
+                while True:
+                    await asyncio.sleep(stats_interval)
+                    stats = self.stats()
+                    now = time.monotonic()
+                    rate = (stats['samples'] - last_samples) / (now - last_time)
+                    last_samples, last_time = stats['samples'], now
+                    print(f"sessions {stats['sessions']} | {rate:.0f} samples/s | "
+                          f"dropped {stats['dropped']} | refused {stats['refused']}")
+            finally:
+                serving.cancel()
+
+    async def close(self):
+        """
+        Stops accepting connections and shuts the executors down.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.inference_executor is not None:
+            self.inference_executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Open sessions, processed samples and frames, dropped messages and refused clients.
+        """
+        sessions = list(self.sessions.values())
+        return {
+            'sessions': len(sessions),
+            'samples': self.total_samples + sum(session.samples + session.frames for session in sessions),
+            'dropped': self.dropped + sum(session.queue.dropped for session in sessions),
+            'refused': self.refused,
+            'queued_bytes': sum(session.queue.queued_bytes for session in sessions),
+        }
+
+    async def _handle(self, reader, writer):
+        session = None
+        try:
+            try:
+                kind, payload = await asyncio.wait_for(read_message(reader, self.max_message_bytes),
+                                                       self.hello_timeout)
+                if kind != MSG_HELLO:
+                    raise ValueError(f"Expected a HELLO message, got type {kind}.")
+                if len(self.sessions) >= self.max_sessions:
+                    self.refused += 1
+                    raise ValueError(f"Server is full ({self.max_sessions} sessions).")
+                session = IngestSession(next(self._ids), json.loads(payload), self.max_session_bytes,
+                                        self.policy, self.max_message_bytes)
+            except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                if not isinstance(e, asyncio.IncompleteReadError):
+                    writer.write(pack_json({'type': 'error', 'error': str(e) or 'HELLO timed out.'}))
+                return
+
+            self.sessions[session.id] = session
+            writer.write(pack_json({'type': 'ready', 'session': session.id, 'name': session.name,
+                                    'max_message_bytes': self.max_message_bytes,
+                                    'queue_bytes': session.queue.max_bytes}))
+            receiver = asyncio.ensure_future(self._receive(session, reader))
+            consumer = asyncio.ensure_future(self._consume(session, writer))
+            try:
+                done, _ = await asyncio.wait((receiver, consumer), return_when=asyncio.FIRST_COMPLETED)
+                if consumer in done:
+                    receiver.cancel()
+                await session.queue.close()
+                # Pesan yang sudah diterima tetap diproses sebelum sesi ditutup
+                error = await consumer
+            finally:
+                receiver.cancel()
+                consumer.cancel()
+            writer.write(pack_json({'type': 'bye', 'session': session.id, 'samples': session.samples,
+                                    'frames': session.frames, 'dropped': session.queue.dropped,
+                                    'error': error}))
+        finally:
+            if session is not None:
+                self.sessions.pop(session.id, None)
+                self.total_samples += session.samples + session.frames
+                self.dropped += session.queue.dropped
+            try:
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+            except (ConnectionError, asyncio.TimeoutError):
+                pass
+            writer.close()
+
+    async def _receive(self, session, reader):
+        """
+        Reads the messages of a session into its queue until BYE, EOF or an error.
+        """
+        while True:
+            try:
+                kind, payload = await asyncio.wait_for(read_message(reader, self.max_message_bytes),
+                                                       self.read_timeout)
+            except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+                return
+            except ValueError as e:
+                await session.queue.put(e, 0)
+                return
+            if kind == MSG_BYE:
+                return
+            if kind not in (MSG_SAMPLES, MSG_FRAME):
+                await session.queue.put(ValueError(f"Unexpected message type {kind}."), 0)
+                return
+            # Pada kebijakan 'block' di sinilah pembacaan berhenti jika antrian sesi penuh
+            await session.queue.put((kind, payload, time.perf_counter()), len(payload))
+
+    async def _consume(self, session, writer):
+        """
+        Processes the queued messages of a session in order and sends the results back.
+
+        Returns:
+            str | None: The error that ended the session, if any.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await session.queue.get()
+                if item is None:
+                    return None
+                if isinstance(item, Exception):
+                    raise item
+                kind, payload, queued = item
+                self.instrumentation.record('queue_wait', time.perf_counter() - queued)
+                if kind == MSG_SAMPLES:
+                    message = await loop.run_in_executor(self.executor, self._ingest_samples, session, payload)
+                elif self.inference_executor is None:
+                    raise ValueError("This server does not accept frames; send extracted samples instead.")
+                else:
+                    message = await loop.run_in_executor(self.inference_executor, self._ingest_frame,
+                                                         session, payload)
+                if message is not None:
+                    writer.write(pack_json(message))
+                    # Client yang tidak membaca hasil menahan sesinya sendiri, lalu diputus
+                    await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except asyncio.TimeoutError:
+            return "Results were not read within the write timeout."
+        except ConnectionError as e:
+            return str(e)
+        except Exception as e:
+            writer.write(pack_json({'type': 'error', 'session': session.id, 'error': str(e)}))
+            return str(e)
+        finally:
+            # Sisa pesan dibuang agar pembaca yang tertahan di put() bisa lanjut dan selesai
+            await session.queue.close()
+            while await session.queue.get() is not None:
+                pass
+
+    def _ingest_samples(self, session, payload):
+        with self.instrumentation.stage('samples'):
+            return session.ingest_samples(payload)
+
+    def _ingest_frame(self, session, payload):
+        with self.instrumentation.stage('frame'):
+            processor = getattr(self._thread_state, 'processor', None)
+            if processor is None:
+                processor = self._thread_state.processor = self._processor_factory()
+            if len(payload) < FRAME_HEADER.size:
+                raise ValueError("Frame message is too short.")
+            (timestamp_ms,) = FRAME_HEADER.unpack_from(payload)
+            frame = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8, offset=FRAME_HEADER.size),
+                                 cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError("Frame could not be decoded.")
+            # Prosesor dipakai bersama antar sesi per thread, jadi timestamp client tidak dimasukkan ke
+            # process() (clamp last_timestamp_ms akan mencampur jam client yang berbeda). Sampel
+            # diberi waktu tangkap client agar antrian dan jitter server tidak ikut di-resample.
+            result = processor.process(frame)
+            result.timestamp_ms = timestamp_ms
+            result.resp_samples = [(timestamp_ms, value) for _, value in result.resp_samples]
+            result.frame_rgb = None  # jangan simpan salinan frame di sesi
+            return session.ingest_result(timestamp_ms, result)
+
+
+class IngestClient:
+    """
+    Minimal asyncio client of `IngestServer`, used by thin clients and the load test.
+    """
+    def __init__(self, reader, writer, ready):
+        self.reader = reader
+        self.writer = writer
+        self.session = ready['session']
+        self.max_message_bytes = ready['max_message_bytes']
+
+    @classmethod
+    async def connect(cls, host, port, fps, **config):
+        """
+        Opens a session.
+
+        Args:
+            host (str): Server address.
+            port (int): Server port.
+            fps (float): Sampling rate of the samples or frames that will be sent.
+            **config: Further HELLO fields ('window_seconds', 'hop_seconds', 'filter_mode',
+                'rate_method', 'name').
+
+        Raises:
+            ConnectionError: If the server refused the session.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(pack_message(MSG_HELLO, json.dumps(dict(config, fps=fps)).encode()))
+        await writer.drain()
+        ready = await cls._read_json(reader)
+        if ready is None or ready['type'] != 'ready':
+            writer.close()
+            raise ConnectionError((ready or {}).get('error', "Connection closed during HELLO."))
+        return cls(reader, writer, ready)
+
+    async def send_samples(self, timestamps_ms, rgb=None, resp=None):
+        """
+        Sends a batch of samples (see `pack_samples`). Waits while the server applies backpressure.
+        """
+        self.writer.write(pack_samples(timestamps_ms, rgb, resp))
+        await self.writer.drain()
+
+    async def send_frame(self, timestamp_ms, frame_bgr, quality=85):
+        """
+        JPEG-encodes and sends one BGR frame.
+        """
+        ok, encoded = cv2.imencode('.jpg', frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("Frame could not be encoded.")
+        self.writer.write(pack_frame(timestamp_ms, encoded))
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        Returns:
+            dict | None: The next JSON message from the server, or None once the connection closed.
+        """
+        return await self._read_json(self.reader)
+
+    async def close(self):
+        """
+        Ends the session; the server still processes everything sent before. Call `receive` until
+        it returns the 'bye' message (or None) to collect the remaining results.
+        """
+        self.writer.write(pack_message(MSG_BYE))
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+
+    @staticmethod
+    async def _read_json(reader):
+        try:
+            kind, payload = await read_message(reader, 1 << 24)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        if kind != MSG_JSON:
+            raise ValueError(f"Unexpected message type {kind} from the server.")
+        return json.loads(payload)
+
+
+def detector_processor_factory(delegate=None, inference_scale=1.0):
+    """
+    Returns a `processor_factory` creating stateless MediaPipe detector pairs for `IngestServer`.
+    """
+    from utils.detectors import POSE_MODE_IMAGE, create_face_detector, create_pose_landmarker
+    from utils.frame_processor import FrameProcessor
+
+    def factory():
+        return FrameProcessor(create_face_detector(delegate),
+                              create_pose_landmarker(delegate, running_mode=POSE_MODE_IMAGE),
+                              pose_mode=POSE_MODE_IMAGE, inference_scale=inference_scale)
+    return factory
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Network ingestion server computing HR/RR for many remote sessions.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on (0.0.0.0 for all).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-sessions', type=int, default=256)
+    parser.add_argument('--max-session-mb', type=float, default=8.0,
+                        help="Memory budget per session (estimator buffers + queued messages) in MiB.")
+    parser.add_argument('--max-message-kb', type=float, default=1024.0, help="Largest accepted message in KiB.")
+    parser.add_argument('--policy', choices=QUEUE_POLICIES, default=BLOCK,
+                        help="When a session's queue is full: stop reading from the client, or drop its oldest messages.")
+    parser.add_argument('--workers', type=int, default=None, help="Signal processing threads.")
+    parser.add_argument('--frames', action='store_true',
+                        help="Load the MediaPipe detectors and accept encoded frames, not only extracted samples.")
+    parser.add_argument('--inference-workers', type=int, default=1, help="Detector threads (one model pair each).")
+    parser.add_argument('--inference-scale', type=float, default=1.0)
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between status lines (0 = off).")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve per-stage latencies in Prometheus format at http://127.0.0.1:PORT/metrics.")
+    args = parser.parse_args()
+
+    factory = None
+    if args.frames:
+        from utils.detectors import select_delegate
+        from utils.download_model import prefetch_models
+        prefetch_models()
+        factory = detector_processor_factory(select_delegate(), args.inference_scale)
+    instrumentation = None
+    if args.metrics_port:
+        instrumentation = Instrumentation()
+        instrumentation.start_http_server(args.metrics_port)
+
+    server = IngestServer(args.host, args.port, max_sessions=args.max_sessions,
+                          max_session_bytes=int(args.max_session_mb * (1 << 20)),
+                          max_message_bytes=int(args.max_message_kb * 1024), policy=args.policy,
+                          workers=args.workers, processor_factory=factory,
+                          inference_workers=args.inference_workers, instrumentation=instrumentation)
+    try:
+        asyncio.run(server.serve_forever(args.stats_interval))
+    except KeyboardInterrupt:
+        pass
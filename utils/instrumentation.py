@@ -0,0 +1,314 @@
+# utils/instrumentation.py
+
+import json
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Satu context manager kosong yang dipakai ulang ketika instrumentasi mati
+_NULL_STAGE = nullcontext()
+
+
+class LatencyWindow:
+    """
+    Rolling window of the last `capacity` latencies of one stage, in seconds,
+    plus the lifetime count and sum for the Prometheus summary.
+    """
+    def __init__(self, capacity=1024):
+        self._values = np.zeros(capacity)
+        self._index = 0
+        self._size = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self._values[self._index] = seconds
+        self._index = (self._index + 1) % len(self._values)
+        self._size = min(self._size + 1, len(self._values))
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, quantiles=QUANTILES):
+        """
+        Returns:
+            np.ndarray: Latencies at `quantiles` over the window, or NaNs if it is empty.
+        """
+        if self._size == 0:
+            return np.full(len(quantiles), np.nan)
+        return np.quantile(self._values[:self._size], quantiles)
+
+
+class _Stage:
+    """
+    Context manager that records the wall-clock time of its block.
+    """
+    __slots__ = ('_instrumentation', '_name', '_start')
+
+    def __init__(self, instrumentation, name):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._instrumentation.record(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class Instrumentation:
+    """
+    Per-stage latency statistics of the monitor.
+
+    Stages are timed with `with instrumentation.stage('name'):`. Every stage keeps a rolling
+    window of latencies for the p50/p95/p99, and frame ticks give the achieved frame rate.
+    The statistics can be exported in the Prometheus text format (`prometheus_text`,
+    `start_http_server`) or appended to a JSON-lines file (`JsonLinesExporter`).
+    When `enabled` is False, `stage` returns a shared no-op context manager and
+    `record` / `tick_frame` return immediately.
+
+    Other components can publish a flat dict of numbers (e.g. `AdaptiveScheduler.status`) with
+    `add_status`; it is included in the snapshot, the overlay and the Prometheus output.
+    """
+    def __init__(self, enabled=True, nominal_fps=None, window=1024):
+        """
+        Args:
+            enabled (bool): Collect statistics. Disabled instances cost one attribute check per call.
+            nominal_fps (float, optional): Frame rate the source is expected to deliver.
+            window (int): Number of latencies (and frame ticks) per rolling window.
+        """
+        self.enabled = enabled
+        self.nominal_fps = nominal_fps
+        self.window = window
+        self.dropped_frames = lambda: 0
+        self._status_sources = {}
+        self._stages = {}
+        self._frame_times = LatencyWindow(window)
+        self._last_frame = None
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """
+        Returns:
+            Context manager that records the duration of its block under `name`.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """
+        Records one latency of stage `name`.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self._stages.get(name)
+            if window is None:
+                window = self._stages[name] = LatencyWindow(self.window)
+            window.add(seconds)
+
+    def add_status(self, name, source):
+        """
+        Publishes the status of another component.
+
+        Args:
+            name (str): Name of the component, e.g. 'scheduler'.
+            source (callable): Returns a flat dict of numbers when called.
+        """
+        self._status_sources[name] = source
+
+    def tick_frame(self):
+        """
+        Marks the completion of one frame, for the achieved frame rate.
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_frame is not None:
+                self._frame_times.add(now - self._last_frame)
+            self._last_frame = now
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Achieved and nominal FPS, dropped frames, per stage the count, mean and
+            latency quantiles in milliseconds, and the dict of every status source.
+        """
+        with self._lock:
+            stages = {}
+            for name, window in self._stages.items():
+                quantiles = window.quantiles() * 1e3
+                stages[name] = {'count': window.count, 'mean_ms': window.total / window.count * 1e3}
+                stages[name].update({f'p{int(q * 100)}_ms': float(v) for q, v in zip(QUANTILES, quantiles)})
+            frame_interval = self._frame_times.quantiles((0.5,))[0]
+        return {
+            'time': time.time(),
+            'fps': float(1.0 / frame_interval) if frame_interval > 0 else None,
+            'nominal_fps': self.nominal_fps,
+            'dropped_frames': int(self.dropped_frames()),
+            'stages': stages,
+            'status': {name: source() for name, source in self._status_sources.items()},
+        }
+
+    def prometheus_text(self):
+        """
+        Returns:
+            str: The statistics in the Prometheus text exposition format.
+        """
+        lines = [
+            '# HELP rppg_stage_latency_seconds Latency of a processing stage.',
+            '# TYPE rppg_stage_latency_seconds summary',
+        ]
+        with self._lock:
+            for name, window in sorted(self._stages.items()):
+                for q, value in zip(QUANTILES, window.quantiles()):
+                    lines.append(f'rppg_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {value:.9f}')
+                lines.append(f'rppg_stage_latency_seconds_sum{{stage="{name}"}} {window.total:.9f}')
+                lines.append(f'rppg_stage_latency_seconds_count{{stage="{name}"}} {window.count}')
+        snapshot = self.snapshot()
+        lines += [
+            '# HELP rppg_fps Achieved frame rate over the rolling window.',
+            '# TYPE rppg_fps gauge',
+            f'rppg_fps {snapshot["fps"] or 0.0:.3f}',
+            '# HELP rppg_nominal_fps Frame rate reported by the video source.',
+            '# TYPE rppg_nominal_fps gauge',
+            f'rppg_nominal_fps {self.nominal_fps or 0.0:.3f}',
+            '# HELP rppg_dropped_frames_total Frames dropped by the pipeline queues.',
+            '# TYPE rppg_dropped_frames_total counter',
+            f'rppg_dropped_frames_total {snapshot["dropped_frames"]}',
+        ]
+        if snapshot['status']:
+            lines += ['# HELP rppg_status Value published by a component with add_status.',
+                      '# TYPE rppg_status gauge']
+            for name, status in snapshot['status'].items():
+                lines += [f'rppg_status{{source="{name}",key="{key}"}} {float(value):.6g}'
+                          for key, value in status.items()]
+        return '\n'.join(lines) + '\n'
+
+    def overlay_lines(self):
+        """
+        Returns:
+            list[str]: Short text lines for an on-screen overlay.
+        """
+        snapshot = self.snapshot()
+        fps = f'{snapshot["fps"]:.1f}' if snapshot['fps'] else '--'
+        nominal = f'{self.nominal_fps:.0f}' if self.nominal_fps else '--'
+        lines = [f'FPS {fps}/{nominal}  dropped {snapshot["dropped_frames"]}']
+        for name, stats in snapshot['stages'].items():
+            lines.append(f'{name}: p50 {stats["p50_ms"]:.1f} p95 {stats["p95_ms"]:.1f} p99 {stats["p99_ms"]:.1f} ms')
+        for name, status in snapshot['status'].items():
+            lines.append(f'{name}: ' + ' '.join(f'{key} {value:.3g}' for key, value in status.items()))
+        return lines
+
+    def start_http_server(self, port, host='127.0.0.1'):
+        """
+        Serves `prometheus_text` at http://host:port/metrics from a daemon thread.
+
+        Returns:
+            ThreadingHTTPServer: The server; call `shutdown()` to stop it.
+        """
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = instrumentation.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+
+class JsonLinesExporter:
+    """
+    Appends an `Instrumentation.snapshot` as one JSON line to a file every `interval` seconds.
+    `maybe_export` is meant to be called from an existing loop (e.g. the GUI timer).
+    """
+    def __init__(self, instrumentation, path, interval=5.0):
+        self.instrumentation = instrumentation
+        self.interval = interval
+        self._file = open(path, 'a')
+        self._last_export = time.monotonic()
+
+    def maybe_export(self):
+        """
+        Writes a snapshot if `interval` seconds passed since the last one.
+        """
+        now = time.monotonic()
+        if now - self._last_export < self.interval:
+            return
+        self._last_export = now
+        self._file.write(json.dumps(self.instrumentation.snapshot()) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of the application startup, up to the first displayed frame.
+
+    Steps are timed with `with profile.step('name'):` or recorded directly with `record`.
+    Steps may run concurrently (e.g. model loading while the camera opens), so their sum can
+    exceed the total; `mark` records the time elapsed since `start` instead of a duration.
+    """
+    def __init__(self, start=None):
+        """
+        Args:
+            start (float, optional): `time.perf_counter()` value taken at process start.
+                Defaults to now.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def step(self, name):
+        """
+        Returns:
+            Context manager that records the duration of its block under `name`.
+        """
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps[name] = seconds
+
+    def mark(self, name):
+        """
+        Records the time elapsed since `start` under `name`.
+        """
+        self.record(name, time.perf_counter() - self.start)
+
+    def report(self):
+        """
+        Returns:
+            str: One line per step in milliseconds, in the order they were recorded.
+        """
+        with self._lock:
+            steps = list(self.steps.items())
+        lines = ['Startup timing:']
+        lines += [f'  {name:<20} {seconds * 1e3:8.1f} ms' for name, seconds in steps]
+        return '\n'.join(lines)
+
+
+# Instance mati bersama, default untuk komponen yang tidak diberi instrumentasi
+DISABLED = Instrumentation(enabled=False)
@@ -0,0 +1,236 @@
+# utils/pipeline.py
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.frame_processor import FrameResult
+from utils.instrumentation import DISABLED
+from utils.vitals import VitalSigns
+
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+QUEUE_POLICIES = (DROP_OLDEST, BLOCK)
+
+
+class BoundedQueue:
+    """
+    Thread-safe FIFO queue with a fixed capacity and a policy for when it is full.
+
+    With `DROP_OLDEST` the producer never waits: the oldest item is discarded to make room,
+    which keeps the consumer working on the freshest frames. With `BLOCK` the producer waits
+    until the consumer has taken an item, so no samples are lost.
+    """
+    def __init__(self, maxsize=2, policy=DROP_OLDEST):
+        """
+        Args:
+            maxsize (int): Maximum number of queued items.
+            policy (str): `DROP_OLDEST` or `BLOCK`.
+        """
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of {QUEUE_POLICIES}.")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """
+        Adds an item, dropping the oldest one or blocking if the queue is full.
+
+        Returns:
+            bool: False if the queue was closed and the item was not added.
+        """
+        with self._cond:
+            if self.policy == BLOCK:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._cond.wait()
+            elif len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest item.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an item.
+
+        Raises:
+            queue.Empty: If no item arrived within `timeout` or the queue was closed.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                raise queue.Empty
+            if not self._items:
+                raise queue.Empty
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """
+        Wakes up all waiting producers and consumers; later puts are ignored.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        """
+        bool: True once `close` was called.
+        """
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+@dataclass
+class PipelineOutput:
+    """
+    Latest state published by the signal stage for the display.
+
+    Attributes:
+        frame (np.ndarray): The most recently processed BGR frame.
+        result (FrameResult): Extraction result of that frame.
+        vitals (VitalSigns): Current heart rate / respiration rate estimates.
+        timestamp (float): Capture time of the frame (`time.monotonic()`).
+    """
+    frame: np.ndarray
+    result: FrameResult
+    vitals: VitalSigns
+    timestamp: float
+
+
+class RealtimePipeline:
+    """
+    Runs capture, detection and signal processing as separate threads connected by
+    bounded queues. The display (GUI thread) only reads the latest output.
+
+        capture --[frame queue]--> detection --[result queue]--> signal --> latest()
+    """
+    def __init__(self, cap, frame_processor, estimator, queue_size=2,
+                 capture_policy=DROP_OLDEST, detection_policy=BLOCK, instrumentation=None, recorder=None,
+                 trend_archive=None):
+        """
+        Args:
+            cap (cv2.VideoCapture): Opened video source.
+            frame_processor (FrameProcessor): Per-frame sample extraction.
+            estimator (VitalSignsEstimator): Heart rate / respiration rate estimation.
+            queue_size (int): Capacity of each queue between stages.
+            capture_policy (str): Policy of the capture -> detection queue.
+            detection_policy (str): Policy of the detection -> signal queue.
+            instrumentation (Instrumentation, optional): Receives the 'capture' and 'signal'
+                stage latencies, a frame tick per processed frame and the dropped-frame count.
+            recorder (SessionRecorder, optional): Records every result reaching the signal stage.
+            trend_archive (TrendArchive, optional): Archives the vitals after every estimator update.
+        """
+        self.cap = cap
+        self.frame_processor = frame_processor
+        self.estimator = estimator
+        self.frame_queue = BoundedQueue(queue_size, capture_policy)
+        self.result_queue = BoundedQueue(queue_size, detection_policy)
+        self.frames_captured = 0
+        self.finished = False
+        self.instrumentation = instrumentation or DISABLED
+        self.recorder = recorder
+        self.trend_archive = trend_archive
+        if instrumentation is not None:
+            instrumentation.dropped_frames = lambda: self.dropped_frames
+
+        self._latest = None
+        self._stop_event = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._detection_loop, name='detection', daemon=True),
+            threading.Thread(target=self._signal_loop, name='signal', daemon=True),
+        ]
+
+    def start(self):
+        """
+        Starts all stage threads.
+        """
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops all stage threads and waits for them to finish.
+        """
+        self._stop_event.set()
+        self.frame_queue.close()
+        self.result_queue.close()
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+
+    def latest(self):
+        """
+        Returns:
+            PipelineOutput | None: The most recent output, or None if nothing was processed yet.
+        """
+        return self._latest
+
+    @property
+    def dropped_frames(self):
+        """
+        int: Total number of frames dropped by both queues.
+        """
+        return self.frame_queue.dropped + self.result_queue.dropped
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set():
+            with self.instrumentation.stage('capture'):
+                ret, frame = self.cap.read()
+            if not ret:
+                print("Failed to grab frame.")
+                break
+            self.frames_captured += 1
+            if not self.frame_queue.put((frame, time.monotonic())):
+                break
+        self.finished = True
+        self.frame_queue.close()
+
+    def _detection_loop(self):
+        while True:
+            try:
+                frame, timestamp = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.frame_queue.closed:
+                    break
+                continue
+            result = self.frame_processor.process(frame, int(timestamp * 1000))
+            if not self.result_queue.put((frame, result, timestamp)):
+                break
+        self.result_queue.close()
+
+    def _signal_loop(self):
+        while True:
+            try:
+                frame, result, timestamp = self.result_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.result_queue.closed:
+                    break
+                continue
+            if self.recorder is not None:
+                self.recorder.add(result)
+            with self.instrumentation.stage('signal'):
+                updated = self.estimator.add(result)
+            if updated and self.trend_archive is not None:
+                self.trend_archive.append_vitals(time.time(), self.estimator.vitals)
+            self._latest = PipelineOutput(frame, result, self.estimator.vitals, timestamp)
+            self.instrumentation.tick_frame()
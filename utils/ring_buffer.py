@@ -0,0 +1,72 @@
+# utils/ring_buffer.py
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated fixed-capacity ring buffer for one or more signal channels.
+
+    Every sample is written twice, at position `i` and `i + capacity` of a buffer that is
+    twice as long as the capacity. The most recent `n` samples are therefore always stored
+    contiguously, and `view` returns them as a numpy view without copying the history.
+    """
+    def __init__(self, capacity, channels=1, dtype=np.float64):
+        """
+        Args:
+            capacity (int): Maximum number of samples kept.
+            channels (int): Number of values per sample (e.g. 3 for R, G, B).
+            dtype (np.dtype): Data type of the stored samples.
+        """
+        if capacity <= 0:
+            raise ValueError(f"RingBuffer capacity must be positive, got {capacity}.")
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._data = np.zeros((channels, 2 * self.capacity), dtype=dtype)
+        self._index = 0 # Posisi tulis berikutnya, dalam rentang [0, capacity)
+        self._count = 0
+
+    def append(self, value):
+        """
+        Adds one sample, overwriting the oldest one when the buffer is full.
+
+        Args:
+            value (float | sequence): Scalar for a single channel, or one value per channel.
+        """
+        self._data[:, self._index] = value
+        self._data[:, self._index + self.capacity] = value
+        self._index = (self._index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def view(self, n=None):
+        """
+        Returns the most recent samples in chronological order without copying.
+
+        Args:
+            n (int, optional): Number of samples. Defaults to all stored samples.
+
+        Returns:
+            np.ndarray: Read-only view of shape (channels, n).
+        """
+        n = self._count if n is None else min(n, self._count)
+        end = self._index + self.capacity
+        window = self._data[:, end - n:end]
+        window.flags.writeable = False
+        return window
+
+    def clear(self):
+        """
+        Removes all samples.
+        """
+        self._index = 0
+        self._count = 0
+
+    @property
+    def full(self):
+        """
+        bool: True once `capacity` samples have been stored.
+        """
+        return self._count == self.capacity
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,280 @@
+# utils/roi_tracker.py
+
+import numpy as np
+import cv2
+
+
+class FaceROITracker:
+    """
+    Detect-then-track helper for the face box.
+
+    The face detector only has to run every `detect_interval` frames, or as soon as tracking
+    confidence drops. In between, the box is moved by template matching the last detected face
+    inside a small search window around its previous position. All boxes, detected or tracked,
+    are smoothed with an exponential moving average to stop the ROI from jittering.
+    """
+    def __init__(self, detect_interval=5, min_confidence=0.6, smoothing=0.6, search_margin=0.25):
+        """
+        Args:
+            detect_interval (int): Run the detector at least every this many frames.
+            min_confidence (float): Minimum normalized correlation of the template match.
+                Below it the track is dropped and the detector runs on the next frame.
+            smoothing (float): Weight of the previous box in the moving average (0 = no smoothing).
+            search_margin (float): Search window padding, as a fraction of the box size.
+        """
+        self.detect_interval = max(1, int(detect_interval))
+        self.min_confidence = min_confidence
+        self.smoothing = smoothing
+        self.search_margin = search_margin
+        self.confidence = 0.0
+        self.detector_calls = 0
+        self.frames = 0
+
+        self._template = None
+        self._raw_box = None      # posisi terakhir hasil deteksi/tracking (tanpa smoothing)
+        self._smoothed_box = None # np.ndarray (x, y, w, h) float
+        self._since_detection = 0
+
+    def needs_detection(self):
+        """
+        Returns:
+            bool: True if the detector should run on the current frame.
+        """
+        return (self._template is None
+                or self._since_detection >= self.detect_interval
+                or self.confidence < self.min_confidence)
+
+    def on_detection(self, gray, box):
+        """
+        Restarts tracking from a detector result.
+
+        Args:
+            gray (np.ndarray): Current frame in grayscale.
+            box (tuple | None): Detected face box (x, y, w, h) in pixels, or None if no face was found.
+
+        Returns:
+            tuple | None: The smoothed box, or None if no face was found.
+        """
+        self.detector_calls += 1
+        self.frames += 1
+        self._since_detection = 0
+        if box is None:
+            self.reset()
+            return None
+
+        x, y, w, h = _clip_box(box, gray.shape)
+        if w < 4 or h < 4:
+            self.reset()
+            return None
+        self._template = gray[y:y + h, x:x + w].copy()
+        self._raw_box = (x, y, w, h)
+        self.confidence = 1.0
+        return self._smooth((x, y, w, h))
+
+    def track(self, gray):
+        """
+        Moves the box to the current frame by template matching.
+
+        Args:
+            gray (np.ndarray): Current frame in grayscale.
+
+        Returns:
+            tuple | None: The smoothed box, or None if the track was lost.
+        """
+        self.frames += 1
+        self._since_detection += 1
+        x, y, w, h = self._raw_box
+        pad_x = int(w * self.search_margin)
+        pad_y = int(h * self.search_margin)
+        sx, sy, sw, sh = _clip_box((x - pad_x, y - pad_y, w + 2 * pad_x, h + 2 * pad_y), gray.shape)
+        if sw < w or sh < h:
+            self.confidence = 0.0
+            return None
+
+        scores = cv2.matchTemplate(gray[sy:sy + sh, sx:sx + sw], self._template, cv2.TM_CCOEFF_NORMED)
+        _, self.confidence, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+        if self.confidence < self.min_confidence:
+            return None
+        self._raw_box = (sx + best_x, sy + best_y, w, h)
+        return self._smooth(self._raw_box)
+
+    def reset(self):
+        """
+        Drops the current track; the detector runs on the next frame.
+        """
+        self._template = None
+        self._raw_box = None
+        self._smoothed_box = None
+        self.confidence = 0.0
+
+    @property
+    def detection_ratio(self):
+        """
+        float: Fraction of frames on which the detector ran.
+        """
+        return self.detector_calls / self.frames if self.frames else 0.0
+
+    def _smooth(self, box):
+        box = np.asarray(box, dtype=float)
+        if self._smoothed_box is None:
+            self._smoothed_box = box
+        else:
+            self._smoothed_box = self.smoothing * self._smoothed_box + (1 - self.smoothing) * box
+        return tuple(int(round(v)) for v in self._smoothed_box)
+
+
+def _clip_box(box, shape):
+    """
+    Clips an (x, y, w, h) box to an image of the given shape.
+    """
+    h_img, w_img = shape[:2]
+    x, y, w, h = (int(v) for v in box)
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(w_img, x + w), min(h_img, y + h)
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+
+class ShoulderFlowTracker:
+    """
+    Sub-pixel respiration signal from the vertical optical flow inside the shoulder ROI.
+
+    The pose landmarker only has to run every `anchor_interval` frames to place the ROI
+    around the shoulder line. In between, the vertical motion of the ROI content from one frame
+    to the next is estimated with a single-parameter gradient-based (Lucas-Kanade) flow over
+    all ROI pixels, d = -sum(Iy * It) / sum(Iy^2), and integrated into a continuous shoulder
+    position. Only the small ROI crop is converted and filtered per frame.
+
+    Static background inside the ROI pulls d towards zero in proportion to its share of the
+    image gradient, so the amplitude of the signal is scaled down but its rate is unchanged.
+    The integrated position stays continuous across re-anchors; its slow drift relative to
+    the landmarks is removed by the respiration band-pass filter.
+    """
+    def __init__(self, anchor_interval=90, margin=0.2, min_gradient=0.1, max_step=3.0):
+        """
+        Args:
+            anchor_interval (int): Run the pose landmarker at least every this many frames.
+            margin (float): Half height of the flow region around the shoulder line, as a
+                fraction of the shoulder ROI width (at least 10 pixels).
+            min_gradient (float): Minimum mean squared vertical gradient of the region.
+                Below it (e.g. a flat, unlit region) the track is dropped.
+            max_step (float): Largest plausible displacement per frame in pixels. Larger steps
+                (the person moved) drop the track so the next frame re-anchors.
+        """
+        self.anchor_interval = max(1, int(anchor_interval))
+        self.margin = margin
+        self.min_gradient = min_gradient
+        self.max_step = max_step
+        self.anchor_calls = 0
+        self.frames = 0
+
+        self.position = None      # posisi bahu terintegrasi (piksel, float)
+        self._region = None       # (x0, y0, x1, y1) daerah flow pada resolusi penuh
+        self._box = None          # ROI bahu dari landmark terakhir
+        self._anchor_position = None
+        self._prev = None
+        self._since_anchor = 0
+
+    def needs_anchor(self):
+        """
+        Returns:
+            bool: True if the pose landmarker should run on the current frame.
+        """
+        return self._prev is None or self._since_anchor >= self.anchor_interval
+
+    def on_anchor(self, frame_rgb, box, shoulder_y):
+        """
+        Re-places the ROI from a landmarker result.
+
+        If a track is running, the motion up to this frame is integrated first, so the
+        signal does not jump to the (integer) landmark position.
+
+        Args:
+            frame_rgb (np.ndarray): Current frame in RGB format.
+            box (tuple): Shoulder ROI (left_x, top_y, right_x, bottom_y) from `shoulder_signal`.
+            shoulder_y (float): Average shoulder Y from the landmarks, in pixels.
+
+        Returns:
+            tuple: (position, box) for the current frame.
+        """
+        self.anchor_calls += 1
+        if self._prev is None or self._step(frame_rgb) is None:
+            self.position = float(shoulder_y)
+        self.frames += 1
+        self._since_anchor = 0
+
+        left_x, _, right_x, _ = box
+        half_height = max(10, int(self.margin * (right_x - left_x)))
+        h, w = frame_rgb.shape[:2]
+        self._region = (max(0, left_x), max(0, int(shoulder_y) - half_height),
+                        min(w, right_x), min(h, int(shoulder_y) + half_height))
+        self._box = box
+        self._anchor_position = self.position
+        self._prev = self._crop(frame_rgb)
+        if self._prev is None:
+            self.reset()
+        return self.position, box
+
+    def track(self, frame_rgb):
+        """
+        Integrates the vertical flow of the current frame.
+
+        Args:
+            frame_rgb (np.ndarray): Current frame in RGB format.
+
+        Returns:
+            tuple | None: (position, box shifted by the motion since the anchor), or None if
+            the track was lost.
+        """
+        self.frames += 1
+        self._since_anchor += 1
+        if self._step(frame_rgb) is None:
+            self.reset()
+            return None
+        shift = int(round(self.position - self._anchor_position))
+        left_x, top_y, right_x, bottom_y = self._box
+        return self.position, (left_x, top_y + shift, right_x, bottom_y + shift)
+
+    def reset(self):
+        """
+        Drops the current track; the landmarker runs on the next frame.
+        """
+        self._prev = None
+        self._region = None
+        self.position = None
+
+    @property
+    def anchor_ratio(self):
+        """
+        float: Fraction of frames on which the landmarker ran.
+        """
+        return self.anchor_calls / self.frames if self.frames else 0.0
+
+    def _crop(self, frame_rgb):
+        x0, y0, x1, y1 = self._region
+        if x1 - x0 < 4 or y1 - y0 < 4:
+            return None
+        gray = cv2.cvtColor(frame_rgb[y0:y1, x0:x1], cv2.COLOR_RGB2GRAY).astype(np.float32)
+        # Sedikit blur: menekan noise sensor dan memperlebar jangkauan linearisasi flow
+        return cv2.GaussianBlur(gray, (5, 5), 1.0)
+
+    def _step(self, frame_rgb):
+        """
+        Adds the displacement between the previous and the current crop to `position`.
+
+        Returns:
+            float | None: The displacement in pixels, or None if it could not be measured.
+        """
+        current = self._crop(frame_rgb)
+        if current is None:
+            return None
+        grad_y = cv2.Sobel((self._prev + current) * 0.5, cv2.CV_32F, 0, 1, ksize=3) / 8.0
+        grad_y, diff_t = grad_y.ravel(), (current - self._prev).ravel()
+        energy = float(np.dot(grad_y, grad_y))
+        self._prev = current
+        if energy < self.min_gradient * grad_y.size:
+            return None
+        step = -float(np.dot(grad_y, diff_t)) / energy
+        if abs(step) > self.max_step:
+            return None
+        self.position += step
+        return step
@@ -0,0 +1,215 @@
+# utils/scheduler.py
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils.instrumentation import LatencyWindow
+
+# Tingkat skala inferensi yang boleh dipilih, dari resolusi penuh ke yang paling kecil
+SCALE_LEVELS = (1.0, 0.75, 0.5, 0.35, 0.25)
+DETECTORS = ('face', 'pose')
+
+
+@dataclass
+class FramePlan:
+    """
+    Decision of the scheduler for one frame.
+
+    Attributes:
+        run_face (bool): Run the face detector; otherwise the face ROI is tracked.
+        run_pose (bool): Run the pose landmarker; otherwise the shoulders are tracked with optical flow.
+        inference_scale (float): Scale of the frame copy given to the detectors.
+    """
+    run_face: bool
+    run_pose: bool
+    inference_scale: float
+
+
+class AdaptiveScheduler:
+    """
+    Fits the detector work of every frame into a per-frame latency budget.
+
+    The sampling path (color conversion, forehead mean, ROI and shoulder tracking) always runs.
+    The scheduler measures its cost and the cost of each detector, and per frame spends only
+    the remaining budget on detectors: the face detector, the pose landmarker, both, or neither,
+    in which case the cached ROIs are tracked. A detector whose tracker lost its target, or that
+    has not run for `max_stale_frames`, runs regardless of the budget; otherwise the detector that
+    ran longest ago goes first.
+
+    Detector costs are learned separately for every inference scale in `SCALE_LEVELS`. When even
+    one detector no longer fits next to the sampling path, the scale steps down; when the next
+    larger scale fits comfortably, it steps back up. Costs at other scales are forgotten after
+    `reprobe_frames` frames, so a temporary slowdown does not pin the resolution down for good.
+    """
+    def __init__(self, budget_ms, min_scale=0.25, max_scale=1.0, smoothing=0.1, max_stale_frames=150,
+                 cooldown_frames=30, reprobe_frames=900, window=256):
+        """
+        Args:
+            budget_ms (float): Target processing time per frame in milliseconds, e.g. 1000 / fps.
+            min_scale (float): Smallest inference scale the scheduler may choose.
+            max_scale (float): Largest (and initial) inference scale.
+            smoothing (float): Weight of a new measurement in the moving average of each cost.
+            max_stale_frames (int): A detector runs at least every this many frames, even over budget.
+            cooldown_frames (int): Frames between two changes of the inference scale.
+            reprobe_frames (int): Age in frames after which the measured costs of another scale
+                are dropped and that scale may be tried again.
+            window (int): Number of frames in the rolling statistics of `status`.
+        """
+        if budget_ms <= 0:
+            raise ValueError(f"budget_ms must be positive, got {budget_ms}.")
+        if not 0 < min_scale <= max_scale <= 1:
+            raise ValueError(f"Expected 0 < min_scale <= max_scale <= 1, got {min_scale} and {max_scale}.")
+        self.budget = budget_ms / 1000.0
+        self.smoothing = smoothing
+        self.max_stale_frames = max(1, int(max_stale_frames))
+        self.cooldown_frames = cooldown_frames
+        self.reprobe_frames = reprobe_frames
+        self.levels = [max_scale] + [s for s in SCALE_LEVELS if min_scale <= s < max_scale]
+        self.level = 0
+
+        # Biaya rata-rata (detik) per tingkat skala, dan frame terakhir saat diukur
+        self._costs = [{name: None for name in DETECTORS} for _ in self.levels]
+        self._measured = [0] * len(self.levels)
+        self._base = None
+        self._since_run = {name: self.max_stale_frames for name in DETECTORS}
+        self._frame_detector_time = 0.0
+        self._since_change = 0
+        self._last_end = None
+
+        self.frames = 0
+        self._frame_times = LatencyWindow(window)
+        self._intervals = LatencyWindow(window)
+        self._runs = {name: np.zeros(window, dtype=bool) for name in DETECTORS}
+        self._over = np.zeros(window, dtype=bool)
+        self.scale_changes = 0
+
+    @property
+    def scale(self):
+        """
+        float: Current inference scale.
+        """
+        return self.levels[self.level]
+
+    def plan(self, face_required=False, pose_required=False):
+        """
+        Decides which detectors run on the next frame.
+
+        Args:
+            face_required (bool): The face ROI cannot be tracked (no track, or the track was lost).
+            pose_required (bool): The shoulder ROI cannot be tracked.
+
+        Returns:
+            FramePlan: The decision.
+        """
+        required = {'face': face_required, 'pose': pose_required}
+        costs = self._costs[self.level]
+        # Biaya yang belum pernah diukur dianggap nol agar detektor dijalankan dan terukur
+        remaining = self.budget - (self._base or 0.0)
+        run = {}
+        for name in DETECTORS:
+            run[name] = required[name] or self._since_run[name] >= self.max_stale_frames
+            if run[name]:
+                remaining -= costs[name] or 0.0
+        # Sisa anggaran: detektor yang paling lama tidak berjalan lebih dulu
+        for name in sorted(DETECTORS, key=lambda name: -self._since_run[name]):
+            if not run[name] and (costs[name] or 0.0) <= remaining:
+                run[name] = True
+                remaining -= costs[name] or 0.0
+
+        for name in DETECTORS:
+            self._since_run[name] = 0 if run[name] else self._since_run[name] + 1
+            self._runs[name][self.frames % len(self._runs[name])] = run[name]
+        self._frame_detector_time = 0.0
+        return FramePlan(run['face'], run['pose'], self.scale)
+
+    def record(self, detector, seconds):
+        """
+        Records the cost of one detector run ('face' or 'pose') at the current scale.
+        """
+        costs = self._costs[self.level]
+        costs[detector] = seconds if costs[detector] is None else self._average(costs[detector], seconds)
+        self._measured[self.level] = self.frames
+        self._frame_detector_time += seconds
+
+    def end_frame(self, seconds):
+        """
+        Records the total processing time of the frame and adapts the inference scale.
+        """
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self._intervals.add(now - self._last_end)
+        self._last_end = now
+        self._frame_times.add(seconds)
+        self._over[self.frames % len(self._over)] = seconds > self.budget
+
+        base = max(0.0, seconds - self._frame_detector_time)
+        self._base = base if self._base is None else self._average(self._base, base)
+        self.frames += 1
+        self._since_change += 1
+        self._adapt_scale()
+
+    def status(self):
+        """
+        Returns:
+            dict: Achieved frame rate, budget and frame time quantiles in milliseconds, current
+            scale, and the fraction of recent frames that ran each detector or went over budget.
+        """
+        n = min(self.frames, len(self._over))
+        interval = self._intervals.quantiles((0.5,))[0] if self._intervals.count else 0.0
+        frame_p50, frame_p95 = (self._frame_times.quantiles((0.5, 0.95)) * 1e3 if self._frame_times.count
+                                else (0.0, 0.0))
+        return {
+            'fps': 1.0 / interval if interval > 0 else 0.0,
+            'budget_ms': self.budget * 1e3,
+            'frame_p50_ms': float(frame_p50),
+            'frame_p95_ms': float(frame_p95),
+            'scale': self.scale,
+            'face_rate': float(self._runs['face'][:n].mean()) if n else 0.0,
+            'pose_rate': float(self._runs['pose'][:n].mean()) if n else 0.0,
+            'over_budget': float(self._over[:n].mean()) if n else 0.0,
+        }
+
+    def status_line(self):
+        """
+        Returns:
+            str: `status` as one short line for the console or an overlay.
+        """
+        status = self.status()
+        return (f"scheduler: {status['fps']:.1f} fps | frame p50 {status['frame_p50_ms']:.1f} / "
+                f"p95 {status['frame_p95_ms']:.1f} of {status['budget_ms']:.1f} ms | scale {status['scale']:.2f} | "
+                f"face {status['face_rate']:.0%} pose {status['pose_rate']:.0%} | over {status['over_budget']:.0%}")
+
+    def _average(self, previous, value):
+        return (1 - self.smoothing) * previous + self.smoothing * value
+
+    def _adapt_scale(self):
+        if self._since_change < self.cooldown_frames or self._base is None:
+            return
+        for level, measured in enumerate(self._measured):
+            if level != self.level and self.frames - measured > self.reprobe_frames:
+                self._costs[level] = {name: None for name in DETECTORS}
+
+        available = self.budget - self._base
+        worst = self._worst_cost(self.level)
+        if worst is not None and worst > available and self.level < len(self.levels) - 1:
+            self._set_level(self.level + 1)
+        elif self.level > 0:
+            # Naik ke skala lebih besar jika biayanya (atau perkiraannya) masih muat dengan longgar
+            larger = self._worst_cost(self.level - 1)
+            if larger is not None:
+                fits = larger <= 0.8 * available
+            else:
+                fits = worst is not None and worst <= 0.5 * available
+            if fits:
+                self._set_level(self.level - 1)
+
+    def _worst_cost(self, level):
+        costs = [cost for cost in self._costs[level].values() if cost is not None]
+        return max(costs) if costs else None
+
+    def _set_level(self, level):
+        self.level = level
+        self._since_change = 0
+        self.scale_changes += 1
@@ -0,0 +1,255 @@
+# utils/session.py
+
+import argparse
+import json
+import struct
+import time
+
+import numpy as np
+
+from utils.frame_processor import FrameResult
+from utils.skin_roi import REGION_NAMES
+
+MAGIC = b'RPPGSES1'
+HEADER_ALIGN = 64
+
+# Satu record berukuran tetap per frame; nilai yang tidak ada disimpan sebagai -1 (int) atau NaN (float)
+RECORD_DTYPE_V1 = np.dtype([
+    ('timestamp_ms', '<i8'),
+    ('face_box', '<i4', (4,)),
+    ('forehead_box', '<i4', (4,)),
+    ('rgb', '<f4', (3,)),
+    ('face_score', '<f4'),
+    ('resp_timestamp_ms', '<i8'),
+    ('resp_value', '<f4'),
+    ('resp_box', '<i4', (4,)),
+    ('shoulders', '<f4', (2, 2)),
+    ('pose_score', '<f4'),
+])
+# Versi 2: ditambah region kulit multi-ROI (NaN / -1 jika tidak dipakai)
+RECORD_DTYPE = np.dtype(RECORD_DTYPE_V1.descr + [
+    ('region_rgb', '<f4', (len(REGION_NAMES), 3)),
+    ('region_boxes', '<i4', (len(REGION_NAMES), 4)),
+])
+RECORD_VERSIONS = {1: RECORD_DTYPE_V1, 2: RECORD_DTYPE}
+
+
+class SessionRecorder:
+    """
+    Append-only binary log of the per-frame outputs of `FrameProcessor`.
+
+    The file is a small JSON header followed by fixed-size `RECORD_DTYPE` records, written in
+    chunks, so `SessionReader` can memory-map it and read every field as a column without parsing.
+    The per-region means of the multi-ROI mode are recorded too, so a replay fuses the regions
+    like the live estimator. Only the primary subject is recorded. In the live stream pose mode only the latest
+    respiration sample of a frame is kept.
+    """
+    def __init__(self, path, fps, chunk_size=256, metadata=None):
+        """
+        Args:
+            path (str): Output file, conventionally `*.rppg`.
+            fps (float): Nominal frame rate of the source.
+            chunk_size (int): Records buffered in memory before they are appended to the file.
+            metadata (dict, optional): Extra JSON-serializable information stored in the header.
+        """
+        self.path = path
+        self._chunk = np.zeros(chunk_size, dtype=RECORD_DTYPE)
+        self._pending = 0
+        self.frames = 0
+        header = json.dumps({
+            'version': 2,
+            'fps': fps,
+            'created': time.time(),
+            'dtype': RECORD_DTYPE.descr,
+            'metadata': metadata or {},
+        }).encode()
+        # Header dipadding agar record dimulai pada offset yang rapi untuk memmap
+        size = len(MAGIC) + 4 + len(header)
+        header += b' ' * (-size % HEADER_ALIGN)
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def add(self, result):
+        """
+        Appends one FrameResult.
+        """
+        record = self._chunk[self._pending]
+        record['timestamp_ms'] = result.timestamp_ms if result.timestamp_ms is not None else -1
+        record['face_box'] = result.face_box if result.face_box is not None else -1
+        record['forehead_box'] = result.forehead_box if result.forehead_box is not None else -1
+        record['rgb'] = result.rgb if result.rgb is not None else np.nan
+        record['face_score'] = result.face_score if result.face_score is not None else np.nan
+        if result.resp_samples:
+            record['resp_timestamp_ms'], record['resp_value'] = result.resp_samples[-1]
+        else:
+            record['resp_timestamp_ms'], record['resp_value'] = -1, np.nan
+        record['resp_box'] = result.resp_box if result.resp_box is not None else -1
+        record['shoulders'] = result.shoulders if result.shoulders is not None else np.nan
+        record['pose_score'] = result.pose_score if result.pose_score is not None else np.nan
+        record['region_rgb'] = result.region_rgb if result.region_rgb is not None else np.nan
+        record['region_boxes'] = result.region_boxes if result.region_boxes is not None else -1
+
+        self._pending += 1
+        self.frames += 1
+        if self._pending == len(self._chunk):
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered records to the file.
+        """
+        if self._pending:
+            self._file.write(self._chunk[:self._pending].tobytes())
+            self._file.flush()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SessionReader:
+    """
+    Memory-mapped view of a file written by `SessionRecorder`. Version 1 recordings, which
+    predate the skin region fields, are still read; their results carry no `region_rgb`.
+    """
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Session file.
+        """
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a session recording.")
+            (header_size,) = struct.unpack('<I', file.read(4))
+            self.header = json.loads(file.read(header_size))
+        offset = len(MAGIC) + 4 + header_size
+        dtype = np.dtype([tuple(field) if len(field) == 2 else (field[0], field[1], tuple(field[2]))
+                          for field in self.header['dtype']])
+        if dtype != RECORD_VERSIONS.get(self.header.get('version')):
+            raise ValueError(f"'{path}' uses an unsupported record layout.")
+        self.fps = self.header['fps']
+        # Record terakhir yang belum lengkap (misal rekaman terpotong) diabaikan
+        with open(path, 'rb') as file:
+            file.seek(0, 2)
+            n_records = (file.tell() - offset) // dtype.itemsize
+        if n_records:
+            self.records = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n_records,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def rgb_trace(self):
+        """
+        Returns:
+            np.ndarray: (3, M) mean R, G, B of the M frames with a face, ready for `estimate_heart_rate`.
+        """
+        rgb = self.records['rgb']
+        return rgb[~np.isnan(rgb[:, 0])].T.astype(float)
+
+    def resp_trace(self):
+        """
+        Returns:
+            np.ndarray: Shoulder positions of the frames with a pose, for `estimate_respiration_rate`.
+        """
+        resp = self.records['resp_value']
+        return resp[~np.isnan(resp)].astype(float)
+
+    def results(self):
+        """
+        Yields the recorded frames as `FrameResult` objects (without image data), so they can
+        be fed to `VitalSignsEstimator.add` exactly like live results.
+        """
+        # Kolom dikonversi sekaligus; akses per elemen memmap jauh lebih lambat
+        records = self.records
+        timestamps = records['timestamp_ms'].tolist()
+        face_boxes = records['face_box'].tolist()
+        forehead_boxes = records['forehead_box'].tolist()
+        rgbs = records['rgb'].astype(float).tolist()
+        face_scores = records['face_score'].astype(float).tolist()
+        resp_timestamps = records['resp_timestamp_ms'].tolist()
+        resp_values = records['resp_value'].astype(float).tolist()
+        resp_boxes = records['resp_box'].tolist()
+        shoulders = records['shoulders'].astype(float).tolist()
+        pose_scores = records['pose_score'].astype(float).tolist()
+        has_regions = 'region_rgb' in records.dtype.names
+        if has_regions:
+            region_rgbs = records['region_rgb'].astype(float)
+            region_boxes = records['region_boxes'].astype(int)
+
+        for i, timestamp_ms in enumerate(timestamps):
+            result = FrameResult(timestamp_ms=timestamp_ms)
+            if face_boxes[i][2] > 0:
+                result.face_box = tuple(face_boxes[i])
+            if forehead_boxes[i][2] > 0:
+                result.forehead_box = tuple(forehead_boxes[i])
+            if rgbs[i][0] == rgbs[i][0]:  # bukan NaN
+                result.rgb = tuple(rgbs[i])
+            if face_scores[i] == face_scores[i]:
+                result.face_score = face_scores[i]
+            if has_regions and not np.isnan(region_rgbs[i, 0, 0]):
+                result.region_rgb = region_rgbs[i]
+                result.region_boxes = region_boxes[i]
+            if resp_values[i] == resp_values[i]:
+                result.resp_value = resp_values[i]
+                result.resp_samples = [(resp_timestamps[i], resp_values[i])]
+                result.resp_box = tuple(resp_boxes[i])
+                result.shoulders = tuple(tuple(point) for point in shoulders[i])
+                if pose_scores[i] == pose_scores[i]:
+                    result.pose_score = pose_scores[i]
+            yield result
+
+
+def replay(reader, estimator):
+    """
+    Feeds a recording through a `VitalSignsEstimator` as fast as possible.
+
+    Args:
+        reader (SessionReader): The recording.
+        estimator (VitalSignsEstimator): Estimator configured with the parameters to evaluate.
+
+    Returns:
+        list[tuple]: (timestamp_ms, VitalSigns) after every update of the estimates.
+    """
+    timeline = []
+    for result in reader.results():
+        if estimator.add(result):
+            timeline.append((result.timestamp_ms, estimator.vitals))
+    return timeline
+
+
+if __name__ == '__main__':
+    from utils.vitals import ESTIMATOR_RATE_METHODS, FILTER_BLOCK, FILTER_MODES, VitalSignsEstimator
+
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the signal processing.")
+    parser.add_argument('session', help="Session file written with main.py --record.")
+    parser.add_argument('--window', type=float, default=10.0, help="Analysis window in seconds.")
+    parser.add_argument('--hop', type=float, default=0.5, help="Seconds between two estimates.")
+    parser.add_argument('--filter-mode', choices=FILTER_MODES, default=FILTER_BLOCK)
+    parser.add_argument('--rate-method', choices=ESTIMATOR_RATE_METHODS, default='peaks')
+    args = parser.parse_args()
+
+    reader = SessionReader(args.session)
+    estimator = VitalSignsEstimator(reader.fps, window_seconds=args.window, hop_seconds=args.hop,
+                                    filter_mode=args.filter_mode, rate_method=args.rate_method)
+    start = time.perf_counter()
+    timeline = replay(reader, estimator)
+    elapsed = time.perf_counter() - start
+
+    first_ms = int(reader.records['timestamp_ms'][0]) if len(reader) else 0
+    for timestamp_ms, vitals in timeline:
+        heart_rate = f'{vitals.heart_rate:6.1f}' if vitals.heart_rate is not None else '    --'
+        respiration_rate = f'{vitals.respiration_rate:5.1f}' if vitals.respiration_rate is not None else '   --'
+        print(f"{(timestamp_ms - first_ms) / 1000:8.2f} s | HR {heart_rate} BPM | RR {respiration_rate} BPM")
+    duration = len(reader) / reader.fps if reader.fps else 0.0
+    print(f"Replayed {len(reader)} frames ({duration:.1f} s) in {elapsed:.3f} s "
+          f"({duration / elapsed if elapsed else float('inf'):.0f}x real time).")
@@ -0,0 +1,308 @@
+# utils/subjects.py
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.heart_rate import RATE_METHODS, UniformResampler, estimate_heart_rates, estimate_respiration_rates
+from utils.ring_buffer import RingBuffer
+from utils.vitals import FILTER_BLOCK, VitalSigns
+
+
+@dataclass
+class SubjectSample:
+    """
+    Samples of one person in one frame, see `FrameResult.subjects`.
+
+    Attributes:
+        subject_id (int): Stable ID of the person, assigned by `SubjectTracker`.
+        rgb (tuple | None): Mean (R, G, B) of the forehead ROI.
+        face_box (tuple): Face box as (x, y, width, height) in pixels.
+        forehead_box (tuple | None): Forehead ROI as (x, y, width, height) in pixels.
+        resp_box (tuple | None): Shoulder ROI as (left_x, top_y, right_x, bottom_y) in pixels.
+        resp_samples (list): Respiration samples as (timestamp_ms, shoulder_y_px).
+    """
+    subject_id: int
+    rgb: Optional[Tuple[float, float, float]] = None
+    face_box: Optional[Tuple[int, int, int, int]] = None
+    forehead_box: Optional[Tuple[int, int, int, int]] = None
+    resp_box: Optional[Tuple[int, int, int, int]] = None
+    resp_samples: List[Tuple[int, int]] = field(default_factory=list)
+
+
+class SubjectTracker:
+    """
+    Associates face boxes across frames and gives every person a stable ID.
+
+    Detections are matched to the existing tracks greedily by intersection over union.
+    A track survives `max_missing` frames without a match before its ID is retired.
+    """
+    def __init__(self, max_subjects=8, min_iou=0.3, max_missing=15):
+        """
+        Args:
+            max_subjects (int): Maximum number of simultaneously tracked people.
+            min_iou (float): Minimum IoU between a track and a detection to match them.
+            max_missing (int): Frames a track may go unmatched before it is dropped.
+        """
+        self.max_subjects = max_subjects
+        self.min_iou = min_iou
+        self.max_missing = max_missing
+        self._boxes = np.empty((0, 4))
+        self._ids = []
+        self._missing = []
+        self._next_id = 1
+
+    def update(self, boxes):
+        """
+        Matches the face boxes of the current frame to the tracks.
+
+        Args:
+            boxes (list[tuple]): Face boxes (x, y, w, h) in pixels.
+
+        Returns:
+            list[int | None]: Subject ID of each box, or None if `max_subjects` is reached.
+        """
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        ids = [None] * len(boxes)
+        matched_tracks = set()
+        if len(self._ids) and len(boxes):
+            iou = box_iou(self._boxes, boxes)
+            # Pasangan dengan IoU terbesar diproses lebih dulu
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                track, detection = np.unravel_index(flat, iou.shape)
+                if iou[track, detection] < self.min_iou:
+                    break
+                if track in matched_tracks or ids[detection] is not None:
+                    continue
+                matched_tracks.add(track)
+                ids[detection] = self._ids[track]
+                self._boxes[track] = boxes[detection]
+                self._missing[track] = 0
+
+        keep = []
+        for track in range(len(self._ids)):
+            if track not in matched_tracks:
+                self._missing[track] += 1
+            keep.append(self._missing[track] <= self.max_missing)
+        self._boxes = self._boxes[np.array(keep, dtype=bool)] if keep else self._boxes
+        self._ids = [i for i, k in zip(self._ids, keep) if k]
+        self._missing = [m for m, k in zip(self._missing, keep) if k]
+
+        for detection, box in enumerate(boxes):
+            if ids[detection] is None and len(self._ids) < self.max_subjects:
+                ids[detection] = self._next_id
+                self._next_id += 1
+                self._ids.append(ids[detection])
+                self._boxes = np.vstack([self._boxes, box])
+                self._missing.append(0)
+        return ids
+
+    def reset(self):
+        """
+        Drops all tracks. New IDs keep counting up.
+        """
+        self._boxes = np.empty((0, 4))
+        self._ids = []
+        self._missing = []
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise intersection over union of two sets of (x, y, w, h) boxes.
+
+    Returns:
+        np.ndarray: Array of shape (len(boxes_a), len(boxes_b)).
+    """
+    a = np.asarray(boxes_a, dtype=float)[:, np.newaxis]
+    b = np.asarray(boxes_b, dtype=float)[np.newaxis]
+    inter_w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def assign_poses(face_boxes, shoulder_points, max_offset=1.5):
+    """
+    Assigns each pose to the face right above its shoulders.
+
+    Args:
+        face_boxes (list[tuple]): Face boxes (x, y, w, h) in pixels.
+        shoulder_points (list[tuple]): Shoulder midpoints (x, y) of each pose in pixels.
+        max_offset (float): Maximum horizontal distance between face center and shoulder
+            midpoint, in face widths.
+
+    Returns:
+        list[int | None]: Index of the matched face for each pose.
+    """
+    assignment = [None] * len(shoulder_points)
+    if not face_boxes or not shoulder_points:
+        return assignment
+    faces = np.asarray(face_boxes, dtype=float)
+    points = np.asarray(shoulder_points, dtype=float)
+    face_center_x = faces[:, 0] + faces[:, 2] / 2
+    # Jarak horizontal dalam satuan lebar wajah; bahu harus berada di bawah wajah
+    distance = np.abs(points[:, np.newaxis, 0] - face_center_x) / np.maximum(faces[:, 2], 1)
+    distance[points[:, np.newaxis, 1] < faces[:, 1] + faces[:, 3] / 2] = np.inf
+
+    taken = set()
+    for flat in np.argsort(distance, axis=None):
+        pose, face = np.unravel_index(flat, distance.shape)
+        if distance[pose, face] > max_offset:
+            break
+        if assignment[pose] is not None or face in taken:
+            continue
+        assignment[pose] = int(face)
+        taken.add(face)
+    return assignment
+
+
+class _SubjectTrack:
+    """
+    Sample windows of one subject.
+    """
+    def __init__(self, window_size, fps):
+        self.rgb_buffer = RingBuffer(window_size, channels=3, dtype=np.float32)
+        self.resp_buffer = RingBuffer(window_size, dtype=np.float32)
+        self.rgb_resampler = UniformResampler(fps, channels=3)
+        self.resp_resampler = UniformResampler(fps)
+        self.last_seen = 0.0
+
+
+def check_multi_subject_options(filter_mode=FILTER_BLOCK, rate_method='fft'):
+    """
+    Rejects `VitalSignsEstimator` options that `MultiSubjectEstimator` does not support, so a
+    caller can fail before opening the camera or loading the models.
+
+    Raises:
+        ValueError: For the streaming filter or a rate method outside `RATE_METHODS` (e.g. 'sdft').
+    """
+    if filter_mode != FILTER_BLOCK:
+        raise ValueError(f"Filter mode '{filter_mode}' is not supported with more than one subject; "
+                         f"the batched estimation always filters per window ('{FILTER_BLOCK}').")
+    if rate_method not in RATE_METHODS:
+        raise ValueError(f"Rate method '{rate_method}' is not supported with more than one subject. "
+                         f"Expected one of {RATE_METHODS}.")
+
+
+class MultiSubjectEstimator:
+    """
+    `VitalSignsEstimator` for several people at once.
+
+    Every subject keeps its own RGB and respiration windows. Every `hop_seconds` the windows of
+    all subjects are stacked and go through one batched POS, filter and spectral pass
+    (`estimate_heart_rates` / `estimate_respiration_rates`), so the per-update cost is dominated
+    by a few vectorized calls instead of growing with a Python loop per person.
+
+    As in `VitalSignsEstimator`, the samples are resampled onto a uniform `fps` grid by their
+    timestamps, and the hop and the expiry of subjects follow the frame timestamps.
+    """
+    def __init__(self, fps, window_seconds=10.0, hop_seconds=0.5, rate_method='fft', missing_seconds=2.0,
+                 filter_mode=FILTER_BLOCK):
+        """
+        Args:
+            fps (float): Nominal frame rate (Hz); the samples are resampled to exactly this rate.
+            window_seconds (float): Length of the analysis window in seconds.
+            hop_seconds (float): Time between two estimates in seconds.
+            rate_method (str): 'peaks', 'fft' or 'welch', see `estimate_heart_rates`.
+            missing_seconds (float): Drop a subject's windows after it was not seen for this long.
+            filter_mode (str): Only `FILTER_BLOCK`; accepted so the options of `VitalSignsEstimator`
+                are checked instead of silently ignored (see `check_multi_subject_options`).
+        """
+        check_multi_subject_options(filter_mode, rate_method)
+        self.fps = fps
+        self.rate_method = rate_method
+        self.window_size = max(1, int(round(fps * window_seconds)))
+        self.hop_seconds = hop_seconds
+        self.missing_seconds = missing_seconds
+        self._tracks: Dict[int, _SubjectTrack] = {}
+        self._clock = 0.0
+        self._last_update = None
+        # Dict baru diterbitkan setiap pembaruan agar aman dibaca dari thread lain
+        self.subject_vitals: Dict[int, VitalSigns] = {}
+        self.vitals = VitalSigns()
+        # (ID, hr_version, resp_version) subjek yang terakhir diterbitkan sebagai `vitals`
+        self._primary = (None, 0, 0)
+
+    def add(self, result):
+        """
+        Adds the per-subject samples of one frame and re-estimates all subjects every hop.
+
+        Args:
+            result (FrameResult): Output of `FrameProcessor.process` with `subjects` filled in.
+
+        Returns:
+            bool: True if the estimates were updated.
+        """
+        # Tanpa timestamp, frame dianggap tepat 1/fps setelah frame sebelumnya
+        now = result.timestamp_ms / 1000.0 if result.timestamp_ms is not None else self._clock + 1.0 / self.fps
+        self._clock = now
+        if self._last_update is None:
+            self._last_update = now
+        for subject in result.subjects:
+            track = self._tracks.get(subject.subject_id)
+            if track is None:
+                track = self._tracks[subject.subject_id] = _SubjectTrack(self.window_size, self.fps)
+            if subject.rgb is not None:
+                for rgb in track.rgb_resampler.process(now, subject.rgb).T:
+                    track.rgb_buffer.append(rgb)
+            for timestamp_ms, resp_value in subject.resp_samples:
+                for value in track.resp_resampler.process(timestamp_ms / 1000.0, resp_value)[0]:
+                    track.resp_buffer.append(value)
+            track.last_seen = now
+
+        expired = [i for i, track in self._tracks.items() if now - track.last_seen > self.missing_seconds]
+        for subject_id in expired:
+            del self._tracks[subject_id]
+
+        hop_due = now - self._last_update >= self.hop_seconds - 0.5 / self.fps
+        if not hop_due and not expired:
+            return False
+        if hop_due:
+            self._last_update = now
+        self._update()
+        return True
+
+    def _update(self):
+        subject_vitals = {i: v for i, v in self.subject_vitals.items() if i in self._tracks}
+
+        hr_ready = [i for i, track in self._tracks.items() if track.rgb_buffer.full]
+        if hr_ready:
+            rgb = np.stack([self._tracks[i].rgb_buffer.view() for i in hr_ready])
+            rates, signals, snr_db = estimate_heart_rates(rgb, self.fps, method=self.rate_method)
+            for row, subject_id in enumerate(hr_ready):
+                vitals = subject_vitals.get(subject_id, VitalSigns())
+                subject_vitals[subject_id] = replace(
+                    vitals, heart_rate=float(rates[row]), hr_signal=signals[row],
+                    hr_snr_db=None if np.isnan(snr_db[row]) else float(snr_db[row]),
+                    hr_version=vitals.hr_version + 1)
+
+        resp_ready = [i for i, track in self._tracks.items() if track.resp_buffer.full]
+        if resp_ready:
+            resp = np.stack([self._tracks[i].resp_buffer.view()[0] for i in resp_ready])
+            rates, signals, snr_db = estimate_respiration_rates(resp, self.fps, method=self.rate_method)
+            for row, subject_id in enumerate(resp_ready):
+                vitals = subject_vitals.get(subject_id, VitalSigns())
+                subject_vitals[subject_id] = replace(
+                    vitals, respiration_rate=float(rates[row]), resp_signal=signals[row],
+                    resp_snr_db=None if np.isnan(snr_db[row]) else float(snr_db[row]),
+                    resp_version=vitals.resp_version + 1)
+
+        self.subject_vitals = subject_vitals
+        # Subjek dengan ID terkecil ditampilkan di label dan plot utama GUI. Versinya milik subjek itu
+        # sendiri, jadi `vitals` memakai penghitung sendiri yang naik setiap isinya berganti
+        if subject_vitals:
+            subject_id = min(subject_vitals)
+            primary = subject_vitals[subject_id]
+            previous_id, hr_version, resp_version = self._primary
+            hr_changed = subject_id != previous_id or primary.hr_version != hr_version
+            resp_changed = subject_id != previous_id or primary.resp_version != resp_version
+            self._primary = (subject_id, primary.hr_version, primary.resp_version)
+            self.vitals = replace(primary, hr_version=self.vitals.hr_version + hr_changed,
+                                  resp_version=self.vitals.resp_version + resp_changed)
+        else:
+            self._primary = (None, 0, 0)
+            if self.vitals.heart_rate is not None or self.vitals.respiration_rate is not None:
+                self.vitals = VitalSigns(hr_version=self.vitals.hr_version + 1,
+                                         resp_version=self.vitals.resp_version + 1)
@@ -0,0 +1,201 @@
+# utils/trend_archive.py
+
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+TREND_FIELDS = ('heart_rate', 'respiration_rate', 'hr_snr_db', 'resp_snr_db')
+
+
+def _level_dtype(fields):
+    """
+    Record layout shared by all levels: block start time, number of raw samples in the block,
+    and the mean / min / max of every field over the block.
+    """
+    columns = [('time', '<f8'), ('count', '<u4')]
+    for name in fields:
+        columns += [(f'{name}_mean', '<f4'), (f'{name}_min', '<f4'), (f'{name}_max', '<f4')]
+    return np.dtype(columns)
+
+
+class TrendArchive:
+    """
+    On-disk archive of the HR/RR history of arbitrarily long sessions.
+
+    Level 0 stores every estimate. Level `L` stores one summary record (mean, min, max) per
+    `factor ** L` estimates, so a zoomed-out plot of an overnight session reads a few thousand
+    records from a coarse level instead of the full history. Records are appended to one file
+    per level and read back through memory maps. Only the write buffers and at most `factor`
+    pending records per level live in memory, so resident memory does not grow with the session.
+    Appending (e.g. from the signal thread) and reading (e.g. from the GUI thread) are thread-safe.
+    """
+    def __init__(self, directory, fields=TREND_FIELDS, factor=10, levels=4, flush_every=64):
+        """
+        Args:
+            directory (str): Archive directory. An existing archive is reopened and appended to.
+            fields (tuple[str]): Names of the archived values.
+            factor (int): Number of records of level L-1 summarized by one record of level L.
+            levels (int): Number of levels, including the raw level 0.
+            flush_every (int): Records buffered per level before they are written to disk.
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                meta = json.load(file)
+            fields, factor, levels = tuple(meta['fields']), meta['factor'], meta['levels']
+        else:
+            with open(meta_path, 'w') as file:
+                json.dump({'fields': list(fields), 'factor': factor, 'levels': levels}, file)
+
+        self.directory = directory
+        self.fields = tuple(fields)
+        self.factor = factor
+        self.levels = levels
+        self.flush_every = flush_every
+        self.dtype = _level_dtype(self.fields)
+        self._paths = [os.path.join(directory, f'level{level}.bin') for level in range(levels)]
+        self._buffers = [[] for _ in range(levels)]
+        self._lock = threading.Lock()
+        # Record level L-1 yang belum lengkap satu blok, dipulihkan dari disk saat arsip dibuka ulang
+        self._pending = [None] + [list(self._tail(level)) for level in range(1, levels)]
+
+    def append(self, timestamp, values):
+        """
+        Archives one estimate.
+
+        Args:
+            timestamp (float): Time of the estimate (e.g. `time.time()`).
+            values (dict | sequence): Value of every field, by name or in `fields` order.
+                None is stored as NaN.
+        """
+        if isinstance(values, dict):
+            values = [values.get(name) for name in self.fields]
+        record = np.zeros((), dtype=self.dtype)
+        record['time'] = timestamp
+        record['count'] = 1
+        for name, value in zip(self.fields, values):
+            value = np.nan if value is None else value
+            record[f'{name}_mean'] = record[f'{name}_min'] = record[f'{name}_max'] = value
+        with self._lock:
+            self._emit(0, record)
+
+    def append_vitals(self, timestamp, vitals):
+        """
+        Archives the rates and confidences of a `VitalSigns`.
+        """
+        self.append(timestamp, {name: getattr(vitals, name, None) for name in self.fields})
+
+    def read(self, field, start=None, end=None, max_points=2000):
+        """
+        Reads the history of one field, from the finest level that fits in `max_points`.
+
+        Args:
+            field (str): One of `fields`.
+            start (float, optional): First time to include.
+            end (float, optional): Last time to include.
+            max_points (int): Maximum number of returned points.
+
+        Returns:
+            tuple: (times, mean, min, max) as numpy arrays, and the level they were read from.
+        """
+        with self._lock:
+            self._flush()
+            for level in range(self.levels):
+                records = self._records(level)
+                first = 0 if start is None else np.searchsorted(records['time'], start, side='left')
+                last = len(records) if end is None else np.searchsorted(records['time'], end, side='right')
+                if last - first <= max_points or level == self.levels - 1:
+                    break
+        selected = records[first:last]
+        if len(selected) > max_points:
+            selected = selected[-max_points:]
+        return (np.array(selected['time']), np.array(selected[f'{field}_mean']),
+                np.array(selected[f'{field}_min']), np.array(selected[f'{field}_max']), level)
+
+    def flush(self):
+        """
+        Writes all buffered records to disk.
+        """
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+
+    def __len__(self):
+        """
+        Number of archived estimates.
+        """
+        with self._lock:
+            return self._count(0) + len(self._buffers[0])
+
+    def _flush(self, levels=None):
+        for level in range(self.levels) if levels is None else levels:
+            buffer = self._buffers[level]
+            if buffer:
+                with open(self._paths[level], 'ab') as file:
+                    file.write(np.array(buffer, dtype=self.dtype).tobytes())
+                buffer.clear()
+
+    def _emit(self, level, record):
+        self._buffers[level].append(record)
+        if len(self._buffers[level]) >= self.flush_every:
+            self._flush((level,))
+
+        if level + 1 < self.levels:
+            pending = self._pending[level + 1]
+            pending.append(record)
+            if len(pending) == self.factor:
+                self._emit(level + 1, self._summarize(np.array(pending, dtype=self.dtype)))
+                pending.clear()
+
+    def _summarize(self, rows):
+        summary = np.zeros((), dtype=self.dtype)
+        summary['time'] = rows['time'][0]
+        summary['count'] = rows['count'].sum()
+        for name in self.fields:
+            means = rows[f'{name}_mean'].astype(float)
+            valid = ~np.isnan(means)
+            weights = rows['count'] * valid
+            # Rata-rata berbobot jumlah sampel; NaN (estimasi tidak tersedia) diabaikan
+            total = weights.sum()
+            summary[f'{name}_mean'] = np.sum(np.where(valid, means, 0) * weights) / total if total else np.nan
+            summary[f'{name}_min'] = np.fmin.reduce(rows[f'{name}_min'])
+            summary[f'{name}_max'] = np.fmax.reduce(rows[f'{name}_max'])
+        return summary
+
+    def _count(self, level):
+        path = self._paths[level]
+        return os.path.getsize(path) // self.dtype.itemsize if os.path.exists(path) else 0
+
+    def _records(self, level):
+        n_records = self._count(level)
+        if n_records == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(self._paths[level], dtype=self.dtype, mode='r', shape=(n_records,))
+
+    def _tail(self, level):
+        """
+        Records of level `level - 1` not yet summarized into level `level`.
+        """
+        lower = self._records(level - 1)
+        done = self._count(level) * self.factor
+        return np.array(lower[done:])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print a zoomed-out summary of a trend archive.")
+    parser.add_argument('directory', help="Archive directory written with main.py --archive.")
+    parser.add_argument('--field', default='heart_rate', help=f"One of {TREND_FIELDS}.")
+    parser.add_argument('--points', type=int, default=24, help="Maximum number of printed rows.")
+    args = parser.parse_args()
+
+    archive = TrendArchive(args.directory)
+    times, mean, low, high, level = archive.read(args.field, max_points=args.points)
+    print(f"{len(archive)} estimates archived; showing level {level} ({archive.factor ** level} estimates per row).")
+    for t, m, lo, hi in zip(times, mean, low, high):
+        print(f"{(t - times[0]) / 60:8.1f} min | mean {m:7.2f} | min {lo:7.2f} | max {hi:7.2f}")
@@ -0,0 +1,257 @@
+# utils/vitals.py
+
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+import numpy as np
+
+from utils.heart_rate import (HR_BAND, RR_BAND, RATE_METHODS, SlidingDFT, StreamingBandpassFilter, StreamingPOS,
+                              UniformResampler, estimate_fused_heart_rate, estimate_heart_rate,
+                              estimate_respiration_rate, moving_average_filter)
+from utils.ring_buffer import RingBuffer
+
+FILTER_BLOCK = 'block'
+FILTER_STREAM = 'stream'
+FILTER_MODES = (FILTER_BLOCK, FILTER_STREAM)
+ESTIMATOR_RATE_METHODS = RATE_METHODS + ('sdft',)
+
+
+@dataclass
+class VitalSigns:
+    """
+    Latest heart rate and respiration rate estimates.
+
+    A new object is published on every update, so a reader in another thread always sees
+    a consistent snapshot. The version counters tell a reader whether the plots need redrawing.
+
+    Attributes:
+        heart_rate (float | None): Heart rate in BPM, or None if it could not be computed.
+        hr_signal (np.ndarray): Processed rPPG signal the heart rate was computed from.
+        hr_version (int): Incremented on every heart rate update.
+        respiration_rate (float | None): Respiration rate in breaths per minute, or None.
+        resp_signal (np.ndarray): Processed respiration signal.
+        resp_version (int): Incremented on every respiration rate update.
+        hr_snr_db (float | None): Spectral confidence of the heart rate (spectral methods only).
+        resp_snr_db (float | None): Spectral confidence of the respiration rate (spectral methods only).
+        hr_region_weights (np.ndarray | None): SNR weight of every skin region in the fused heart rate,
+            in `utils.skin_roi.REGION_NAMES` order, when the samples come from several regions.
+    """
+    heart_rate: Optional[float] = None
+    hr_signal: np.ndarray = field(default_factory=lambda: np.empty(0))
+    hr_version: int = 0
+    respiration_rate: Optional[float] = None
+    resp_signal: np.ndarray = field(default_factory=lambda: np.empty(0))
+    resp_version: int = 0
+    hr_snr_db: Optional[float] = None
+    resp_snr_db: Optional[float] = None
+    hr_region_weights: Optional[np.ndarray] = None
+
+
+class VitalSignsEstimator:
+    """
+    Collects per-frame samples in sliding windows and recomputes the heart rate and
+    respiration rate every `hop_seconds` over the last `window_seconds` of samples.
+
+    Samples are placed by their capture timestamps and resampled onto a uniform `fps` grid
+    (`UniformResampler`) before they enter the windows, so dropped, skipped or jittered frames
+    and short face/pose misses do not distort the rates.
+
+    When the frame results carry per-region samples (`FrameResult.region_rgb`, multi-ROI mode),
+    the window holds the R, G, B traces of every region and the heart rate is fused across the
+    regions by their SNR (`estimate_fused_heart_rate`).
+
+    With `rate_method='sdft'` the rates are instead tracked incrementally after every sample
+    with a `SlidingDFT` over the HR and RR bands, and only the plotted signals follow the hop.
+    This path uses the pooled mean of the regions (`FrameResult.rgb`).
+    """
+    def __init__(self, fps, window_seconds=10.0, hop_seconds=0.5, filter_mode=FILTER_BLOCK, rate_method='peaks'):
+        """
+        Args:
+            fps (float): Nominal frame rate (Hz); the samples are resampled to exactly this rate.
+            window_seconds (float): Length of the analysis window in seconds.
+            hop_seconds (float): Time between two estimates in seconds. Using
+                `hop_seconds == window_seconds` gives non-overlapping windows.
+            filter_mode (str): `FILTER_BLOCK` re-filters every window with a zero-phase filter.
+                `FILTER_STREAM` filters the respiration samples once on arrival with a stateful
+                causal filter, so an estimate no longer re-filters the whole window. The rPPG
+                signal is always block filtered because POS works on the unfiltered RGB traces.
+                The 'sdft' rate method always filters in streaming mode.
+            rate_method (str): 'peaks', 'fft' or 'welch' (see `estimate_heart_rate`), or 'sdft'.
+        """
+        if filter_mode not in FILTER_MODES:
+            raise ValueError(f"Unknown filter mode '{filter_mode}'. Expected one of {FILTER_MODES}.")
+        if rate_method not in ESTIMATOR_RATE_METHODS:
+            raise ValueError(f"Unknown rate method '{rate_method}'. Expected one of {ESTIMATOR_RATE_METHODS}.")
+        self.fps = fps
+        self.rate_method = rate_method
+        self.window_size = max(1, int(round(fps * window_seconds)))
+        self.hop_size = max(1, int(round(fps * hop_seconds)))
+        # float32 cukup untuk sampel mentah; estimasi mengonversi jendela ke float64
+        self.rgb_buffer = RingBuffer(self.window_size, channels=3, dtype=np.float32)
+        self.resp_buffer = RingBuffer(self.window_size, dtype=np.float32)
+        self.rgb_resampler = UniformResampler(fps, channels=3)
+        self.resp_resampler = UniformResampler(fps)
+        self._clock = 0.0
+        self._rgb_since_update = 0
+        self._resp_since_update = 0
+        streaming = filter_mode == FILTER_STREAM or rate_method == 'sdft'
+        self.resp_filter = StreamingBandpassFilter(*RR_BAND, fps) if streaming else None
+
+        if rate_method == 'sdft':
+            # Jalur inkremental: POS per sampel -> filter streaming -> sliding DFT
+            self.pos_stream = StreamingPOS(fps)
+            self.hr_filter = StreamingBandpassFilter(*HR_BAND, fps)
+            self.hr_trace = RingBuffer(self.window_size, dtype=np.float32)
+            self.hr_sdft = SlidingDFT(fps, self.window_size, HR_BAND)
+            self.resp_sdft = SlidingDFT(fps, self.window_size, RR_BAND)
+        self.vitals = VitalSigns()
+
+    @staticmethod
+    def expected_bytes(fps, window_seconds=10.0, rate_method='peaks'):
+        """
+        Bytes the estimator allocates up front for its windows (and, with 'sdft', the sliding-DFT
+        bases), computed without allocating, so a configuration can be rejected before it is built.
+        """
+        window_size = max(1, int(round(fps * window_seconds)))
+        # Ring buffer float32 menyimpan 2 * kapasitas sampel per kanal (RGB dan respirasi)
+        total = (3 + 1) * 2 * window_size * 4
+        if rate_method == 'sdft':
+            total += 2 * window_size * 4
+            total += SlidingDFT.expected_bytes(fps, window_size, HR_BAND)
+            total += SlidingDFT.expected_bytes(fps, window_size, RR_BAND)
+        return total
+
+    def add(self, result):
+        """
+        Adds the samples of one frame and recomputes the rates once the window is full
+        and `hop_size` new samples arrived since the last estimate.
+
+        Args:
+            result (FrameResult): Output of `FrameProcessor.process` for the frame.
+
+        Returns:
+            bool: True if `self.vitals` was updated.
+        """
+        if self.rate_method == 'sdft':
+            return self._add_incremental(result)
+
+        vitals = self.vitals
+
+        # rPPG processing (multi-ROI: R, G, B setiap region berdampingan dalam satu buffer)
+        if result.rgb is not None:
+            sample = result.rgb if result.region_rgb is None else np.ravel(result.region_rgb)
+            if len(sample) != self.rgb_buffer.channels:
+                self._reset_rgb(len(sample))
+            for rgb in self.rgb_resampler.process(self._frame_time(result), sample).T:
+                self.rgb_buffer.append(rgb)
+                self._rgb_since_update += 1
+            if self.rgb_buffer.full and self._rgb_since_update >= self.hop_size:
+                window = self.rgb_buffer.view()
+                if self.rgb_buffer.channels == 3:
+                    heart_rate, hr_signal, hr_snr_db = estimate_heart_rate(window, self.fps, method=self.rate_method)
+                    weights = None
+                else:
+                    heart_rate, hr_signal, hr_snr_db, weights = estimate_fused_heart_rate(
+                        window.reshape(-1, 3, window.shape[-1]), self.fps, method=self.rate_method)
+                vitals = replace(vitals, heart_rate=heart_rate, hr_signal=hr_signal, hr_snr_db=hr_snr_db,
+                                 hr_region_weights=weights, hr_version=vitals.hr_version + 1)
+                self._rgb_since_update = 0
+
+        # Respiration processing (mode live stream bisa mengirim beberapa sampel per frame)
+        for resp_value in self._resp_grid(result):
+            if self.resp_filter is not None:
+                resp_value = self.resp_filter.process(resp_value)
+            self.resp_buffer.append(resp_value)
+            self._resp_since_update += 1
+            if self.resp_buffer.full and self._resp_since_update >= self.hop_size:
+                respiration_rate, resp_signal, resp_snr_db = estimate_respiration_rate(
+                    self.resp_buffer.view()[0], self.fps,
+                    prefiltered=self.resp_filter is not None, method=self.rate_method)
+                vitals = replace(vitals, respiration_rate=respiration_rate, resp_signal=resp_signal,
+                                 resp_snr_db=resp_snr_db, resp_version=vitals.resp_version + 1)
+                self._resp_since_update = 0
+
+        updated = vitals is not self.vitals
+        self.vitals = vitals
+        return updated
+
+    def _add_incremental(self, result):
+        """
+        `add` for the 'sdft' rate method: O(bins) work per sample, rates refreshed every frame.
+        """
+        vitals = self.vitals
+
+        rgb_grid = ()
+        if result.rgb is not None:
+            rgb_grid = self.rgb_resampler.process(self._frame_time(result), result.rgb).T
+        for rgb in rgb_grid:
+            pulse = self.pos_stream.process(rgb)
+            if pulse is not None:
+                pulse = self.hr_filter.process(pulse)
+                self.hr_trace.append(pulse)
+                self.hr_sdft.update(pulse)
+                self._rgb_since_update += 1
+                if self.hr_sdft.ready:
+                    frequency, snr_db = self.hr_sdft.dominant_frequency()
+                    vitals = replace(vitals, heart_rate=60.0 * frequency, hr_snr_db=snr_db)
+                    if self._rgb_since_update >= self.hop_size:
+                        vitals = replace(vitals, hr_signal=self._display_signal(self.hr_trace),
+                                         hr_version=vitals.hr_version + 1)
+                        self._rgb_since_update = 0
+
+        for resp_value in self._resp_grid(result):
+            resp_value = self.resp_filter.process(resp_value)
+            self.resp_buffer.append(resp_value)
+            self.resp_sdft.update(resp_value)
+            self._resp_since_update += 1
+            if self.resp_sdft.ready:
+                frequency, snr_db = self.resp_sdft.dominant_frequency()
+                vitals = replace(vitals, respiration_rate=60.0 * frequency, resp_snr_db=snr_db)
+                if self._resp_since_update >= self.hop_size:
+                    vitals = replace(vitals, resp_signal=self._display_signal(self.resp_buffer),
+                                     resp_version=vitals.resp_version + 1)
+                    self._resp_since_update = 0
+
+        updated = vitals is not self.vitals
+        self.vitals = vitals
+        return updated
+
+    def _reset_rgb(self, channels):
+        """
+        Restarts the RGB window with `channels` channels, when the results switch between
+        one ROI and several regions.
+        """
+        self.rgb_buffer = RingBuffer(self.window_size, channels=channels, dtype=np.float32)
+        self.rgb_resampler = UniformResampler(self.fps, channels=channels)
+        self._rgb_since_update = 0
+
+    def _frame_time(self, result):
+        """
+        Capture time of the frame in seconds. Results without a timestamp are assumed to be
+        exactly 1/fps apart.
+        """
+        if result.timestamp_ms is not None:
+            self._clock = result.timestamp_ms / 1000.0
+        else:
+            self._clock += 1.0 / self.fps
+        return self._clock
+
+    def _resp_grid(self, result):
+        """
+        The respiration samples of a frame, resampled onto the uniform grid.
+        """
+        if not result.resp_samples:
+            return ()
+        if len(result.resp_samples) == 1:
+            timestamp_ms, resp_value = result.resp_samples[0]
+            return self.resp_resampler.process(timestamp_ms / 1000.0, resp_value)[0]
+        return np.concatenate([self.resp_resampler.process(timestamp_ms / 1000.0, resp_value)[0]
+                               for timestamp_ms, resp_value in result.resp_samples])
+
+    def _display_signal(self, buffer):
+        """
+        Normalized and smoothed copy of a filtered trace for plotting.
+        """
+        signal = buffer.view()[0]
+        normalized = (signal - np.mean(signal)) / (np.std(signal) + 1e-6)
+        return moving_average_filter(normalized, window_size=int(self.fps / 2))